@@ -4,6 +4,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from config import DBConfig
 from models import Base
 
 # this is the Alembic Config object, which provides
@@ -15,6 +16,9 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# The app and migrations always target the same database
+config.set_main_option("sqlalchemy.url", DBConfig.DB_URL)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -0,0 +1,41 @@
+"""cache generations
+
+Revision ID: 5b7d2e9c41a0
+Revises: 13df810a474a
+Create Date: 2026-10-17 09:12:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2e9c41a0'
+down_revision: Union[str, Sequence[str], None] = '13df810a474a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cache_generations',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # chunk ids must never be reused once deleted (vector stores reconcile by id). Only SQLite
+    # reuses rowids; PostgreSQL sequences never do, and recreating chunks there is blocked
+    # by the embeddings foreign key
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table('chunks', recreate='always', table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+            pass
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table('chunks', recreate='always', table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+            pass
+    op.drop_table('cache_generations')
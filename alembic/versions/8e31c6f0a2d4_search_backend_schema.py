@@ -0,0 +1,34 @@
+"""search backend schema
+
+Revision ID: 8e31c6f0a2d4
+Revises: 5b7d2e9c41a0
+Create Date: 2026-10-17 14:03:27.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from rag.search_backend import backend_for
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e31c6f0a2d4'
+down_revision: Union[str, Sequence[str], None] = '5b7d2e9c41a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite: FTS5 table. PostgreSQL: tsvector table + GIN index, pgvector column + ANN index.
+    bind = op.get_bind()
+    backend_for(bind.dialect.name).create_schema(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        # on SQLite projects_fts predates this revision (created with the models)
+        backend_for(bind.dialect.name).drop_schema(bind)
@@ -0,0 +1,33 @@
+"""backfill pgvector
+
+Revision ID: 9c1e4b7a2f58
+Revises: d5f2a8c3e716
+Create Date: 2026-10-18 10:21:37.664015
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from rag.search_backend import backend_for
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1e4b7a2f58'
+down_revision: Union[str, Sequence[str], None] = 'd5f2a8c3e716'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PostgreSQL: vector search only sees rows with the pgvector column set, which new
+    # writes fill; copy it from the stored vectors of the rows written before. SQLite: no-op.
+    bind = op.get_bind()
+    backend_for(bind.dialect.name).backfill_vectors(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # the column is dropped with the search backend schema (8e31c6f0a2d4)
+    pass
@@ -0,0 +1,38 @@
+"""source file sha
+
+Revision ID: a7d4c2e8f615
+Revises: f3c7a1d9e254
+Create Date: 2026-10-17 19:41:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4c2e8f615'
+down_revision: Union[str, Sequence[str], None] = 'f3c7a1d9e254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('source_sha256', sa.String(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_projects_source_sha256'), ['source_sha256'], unique=False)
+
+    with op.batch_alter_table('ingest_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('source_sha256', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ingest_jobs', schema=None) as batch_op:
+        batch_op.drop_column('source_sha256')
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projects_source_sha256'))
+        batch_op.drop_column('source_sha256')
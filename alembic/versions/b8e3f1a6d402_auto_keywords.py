@@ -0,0 +1,30 @@
+"""auto keywords
+
+Revision ID: b8e3f1a6d402
+Revises: a7d4c2e8f615
+Create Date: 2026-10-17 21:12:05.418377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3f1a6d402'
+down_revision: Union[str, Sequence[str], None] = 'a7d4c2e8f615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('project_keywords', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('auto_generated', sa.Boolean(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('project_keywords', schema=None) as batch_op:
+        batch_op.drop_column('auto_generated')
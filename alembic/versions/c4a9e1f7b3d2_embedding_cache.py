@@ -0,0 +1,33 @@
+"""embedding cache
+
+Revision ID: c4a9e1f7b3d2
+Revises: 8e31c6f0a2d4
+Create Date: 2026-10-17 16:41:08.117930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e1f7b3d2'
+down_revision: Union[str, Sequence[str], None] = '8e31c6f0a2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('embedding_cache',
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('text_sha256', sa.String(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('model', 'text_sha256')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('embedding_cache')
@@ -0,0 +1,44 @@
+"""pdf sections
+
+Revision ID: d5f2a8c3e716
+Revises: b8e3f1a6d402
+Create Date: 2026-10-17 23:04:51.227690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f2a8c3e716'
+down_revision: Union[str, Sequence[str], None] = 'b8e3f1a6d402'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pdf_sha256', sa.String(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_projects_pdf_sha256'), ['pdf_sha256'], unique=False)
+
+    with op.batch_alter_table('sections', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('source_sha256', sa.String(), nullable=True))
+
+    with op.batch_alter_table('ingest_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('project_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ingest_jobs', schema=None) as batch_op:
+        batch_op.drop_column('project_id')
+
+    with op.batch_alter_table('sections', schema=None) as batch_op:
+        batch_op.drop_column('source_sha256')
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projects_pdf_sha256'))
+        batch_op.drop_column('pdf_sha256')
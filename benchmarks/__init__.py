@@ -0,0 +1,5 @@
+import os
+
+from benchmarks.scratch_db import use_scratch_db
+
+use_scratch_db(os.getenv("BENCHMARK_DB_URL"))
@@ -0,0 +1,67 @@
+
+# ------------------------------
+# IVF recall/latency vs the exact scan
+#   python -m benchmarks.ann_recall [--n 200000] [--from-db]
+# ------------------------------
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from rag.ann_index import IVFIndex, default_nlist
+from rag.vector_store import VectorStore
+
+def synthetic_corpus(n, dim=384, topics=500, seed=0):
+    # clustered unit vectors, closer to real abstracts than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    vecs = centers[rng.integers(0, topics, n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return np.arange(1, n + 1, dtype=np.int64), vecs
+
+def db_corpus():
+    from db import SessionLocal
+    from helpers.embeddings import unpack_vector
+    db = SessionLocal()
+    try:
+        rows = db.execute(text("SELECT chunk_id, vector FROM embeddings")).fetchall()
+    finally:
+        db.close()
+    if not rows:
+        raise SystemExit("no stored embeddings: point BENCHMARK_DB_URL at a database with a corpus")
+    return np.array([r[0] for r in rows], dtype=np.int64), np.vstack([unpack_vector(r[1]) for r in rows])
+
+def run(ids, vecs, queries, k, nprobes):
+    exact = VectorStore()
+    exact.add(ids, vecs)
+    t0 = time.perf_counter()
+    truth = [{cid for cid, _ in exact.search(q, k)} for q in queries]
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    print(f"corpus={len(ids)} k={k} exact: {exact_ms:.2f} ms/query")
+
+    t0 = time.perf_counter()
+    index = IVFIndex.build(ids, vecs, nlist=default_nlist(len(ids)))
+    print(f"build: {time.perf_counter() - t0:.1f}s nlist={len(index.centroids)}")
+
+    print(f"{'nprobe':>6} {'recall@k':>9} {'ms/query':>9} {'speedup':>8}")
+    for nprobe in nprobes:
+        t0 = time.perf_counter()
+        found = [{cid for cid, _ in index.search(q, k, nprobe=nprobe)} for q in queries]
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(f"{nprobe:>6} {recall:>9.3f} {ms:>9.2f} {exact_ms / ms:>7.1f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--from-db", action="store_true", help="use the embeddings table instead of synthetic data")
+    args = parser.parse_args()
+
+    ids, vecs = db_corpus() if args.from_db else synthetic_corpus(args.n)
+    rng = np.random.default_rng(1)
+    queries = vecs[rng.choice(len(vecs), min(args.queries, len(vecs)), replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+    run(ids, vecs, queries, args.k, [1, 2, 4, 8, 16, 32, 64])
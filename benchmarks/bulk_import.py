@@ -0,0 +1,108 @@
+
+# ------------------------------
+# Import of a synthetic large compilation: entry-by-entry upserts vs the
+# batched pipeline (rag.indexing.upsert_entries)
+#   python -m benchmarks.bulk_import [--entries 300] [--docx]
+# ------------------------------
+import argparse
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import rag.embedding_cache as embedding_cache
+from db import create_db_engine
+from models import Base
+from rag.indexing import upsert_entries, upsert_project_from_fields
+
+WORDS = ("system mobile web application monitoring farmers rice water quality school clinic inventory "
+         "students attendance records sensors automated management platform barangay tracking").split()
+
+def synthetic_entries(n: int):
+    rng = random.Random(0)
+    def sentence():
+        return " ".join(rng.choices(WORDS, k=rng.randint(10, 24))).capitalize() + "."
+    return [{
+        "title": " ".join(rng.choices(WORDS, k=6)).title() + f" {i}",
+        "researchers": [f"Juan Dela Cruz {i}", f"Maria Santos {i}", f"Jose Rizal {i}"],
+        "course": "BSIT", "host": "CBSUA", "doc_type": "Capstone Project",
+        "keywords": rng.sample(WORDS, 4), "year": str(2015 + i % 10),
+        "abstract": " ".join(sentence() for _ in range(rng.randint(8, 30))),
+    } for i in range(n)]
+
+def compilation_docx(entries) -> bytes:
+    import docx
+    document = docx.Document()
+    for e in entries:
+        document.add_paragraph(f"Title: {e['title']}")
+        document.add_paragraph(f"Researchers: {', '.join(e['researchers'])}")
+        document.add_paragraph(f"Course: {e['course']}")
+        document.add_paragraph(f"Host: {e['host']}")
+        document.add_paragraph(f"Type of Document: {e['doc_type']}")
+        document.add_paragraph(f"Keywords: {', '.join(e['keywords'])}")
+        document.add_paragraph(f"Year: {e['year']}")
+        document.add_paragraph(e["abstract"])
+    buf = io.BytesIO()
+    document.save(buf)
+    return buf.getvalue()
+
+def per_entry(db, entries):
+    for e in entries:
+        upsert_project_from_fields(
+            db, "bench.docx", None, title=e["title"], researchers=e["researchers"], course=e["course"],
+            host=e["host"], doc_type=e["doc_type"], keywords=e["keywords"], abstract_text=e["abstract"], year=e["year"]
+        )
+
+def batched(db, entries):
+    upsert_entries(db, "bench.docx", None, entries)
+
+def run(tmp: Path, label: str, fn, entries):
+    engine = create_db_engine(f"sqlite:///{tmp / label}.db")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    counts = {"statements": 0, "model_calls": 0}
+    def count(*_):
+        counts["statements"] += 1
+    event.listen(engine, "before_cursor_execute", count)
+    embed = embedding_cache.embed_texts
+    def counted_embed(texts):
+        counts["model_calls"] += 1
+        return embed(texts)
+    embedding_cache.embed_texts = counted_embed
+    try:
+        t0 = time.perf_counter()
+        fn(db, entries)
+        db.commit()
+        elapsed = time.perf_counter() - t0
+    finally:
+        embedding_cache.embed_texts = embed
+        db.close()
+        engine.dispose()
+    return elapsed, counts
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=300)
+    parser.add_argument("--docx", action="store_true", help="also build and parse a real .docx compilation")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    entries = synthetic_entries(args.entries)
+    if args.docx:
+        from helpers.docx_parser import parse_compilation_docx
+        data = compilation_docx(entries)
+        t0 = time.perf_counter()
+        entries = parse_compilation_docx(data)
+        print(f"parsed {len(entries)} entries from {len(data) / 1e6:.1f} MB docx in {time.perf_counter() - t0:.2f}s")
+
+    from helpers.embeddings import embed_texts
+    embed_texts(["warm up"])
+    print(f"entries={len(entries)} chunks~{sum(len(e['abstract']) for e in entries) // 1200}")
+    print(f"{'mode':<10} {'s':>8} {'entries/s':>10} {'statements':>11} {'model calls':>12}")
+    for label, fn in (("per-entry", per_entry), ("batched", batched)):
+        elapsed, counts = run(tmp, label, fn, entries)
+        print(f"{label:<10} {elapsed:>8.2f} {len(entries) / elapsed:>10.1f} {counts['statements']:>11} {counts['model_calls']:>12}")
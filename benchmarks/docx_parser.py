@@ -0,0 +1,133 @@
+
+# ------------------------------
+# Streaming DOCX parser vs python-docx: golden comparison, time and peak memory
+#   python -m benchmarks.docx_parser [--entries 2000] [FILE.docx ...]
+# The generated compilation mixes in formatted runs, tabs, line breaks,
+# hyperlinks, tables and empty paragraphs. Exits non-zero when the streaming
+# parser's paragraphs or entries differ from python-docx on any input.
+# ------------------------------
+import argparse
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.bulk_import import compilation_docx, synthetic_entries
+from helpers.docx_parser import iter_docx_paragraphs, parse_compilation_docx
+from helpers.regex import FIELD_LABELS
+from helpers.text import split_keywords, split_names
+
+def reference_paragraphs(data: bytes):
+    import docx
+    return [p.text for p in docx.Document(io.BytesIO(data)).paragraphs]
+
+def reference_parse(data: bytes):
+    # the parser as it was before streaming, kept verbatim (not sharing the field scan) so a
+    # change to either the paragraph reader or _entries_from_paragraphs shows up as a mismatch
+    paras = [p.strip() for p in reference_paragraphs(data) if p and p.strip()]
+
+    entries, cur = [], {
+        "title": None, "researchers": [], "course": None, "host": None,
+        "doc_type": None, "keywords": [], "abstract": [], "year": None
+    }
+
+    def flush():
+        if cur["title"] or cur["abstract"]:
+            entries.append({
+                "title": cur["title"],
+                "researchers": cur["researchers"],
+                "course": cur["course"],
+                "host": cur["host"],
+                "doc_type": cur["doc_type"],
+                "keywords": cur["keywords"],
+                "year": cur["year"] or None,
+                "abstract": "\n\n".join(cur["abstract"]).strip()
+            })
+
+    for line in paras:
+        m = FIELD_LABELS["title"].match(line)
+        if m:
+            if cur["title"] or cur["abstract"]:
+                flush()
+                cur = {"title": None, "researchers": [], "course": None, "host": None,
+                       "doc_type": None, "keywords": [], "abstract": [], "year": None}
+            cur["title"] = m.group(1).strip(); continue
+
+        for key in ("researchers", "course", "host", "doc_type", "keywords", "year"):
+            m = FIELD_LABELS[key].match(line)
+            if m:
+                val = m.group(1)
+                if key == "researchers": cur["researchers"] = split_names(val)
+                elif key == "keywords": cur["keywords"] = split_keywords(val)
+                else: cur[key] = val.strip()
+                break
+        else:
+            cur["abstract"].append(line)
+
+    flush()
+    return entries
+
+def tricky_docx(entries) -> bytes:
+    import docx
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.enum.text import WD_BREAK
+
+    document = docx.Document(io.BytesIO(compilation_docx(entries)))
+    p = document.add_paragraph("Title: ")
+    p.add_run("Split ").bold = True
+    p.add_run("Run\tTitle").italic = True
+    document.add_paragraph("Researchers: Ana Reyes and Ben Cruz; Carla Diaz")
+    document.add_paragraph("")
+    document.add_paragraph("   ")
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Title: inside a table is ignored"
+    p = document.add_paragraph("First line")
+    p.add_run().add_break()
+    p.add_run("second line")
+    p.add_run().add_break(WD_BREAK.PAGE)
+    p.add_run("after page break.")
+    p = document.add_paragraph("See ")
+    p._p.append(parse_xml(
+        f'<w:hyperlink {nsdecls("w", "r")} r:id="rId99"><w:r><w:t>the portal</w:t></w:r></w:hyperlink>'
+    ))
+    p.add_run(" for details.")
+    p._p.append(parse_xml(f'<w:ins {nsdecls("w")} w:id="1" w:author="x"><w:r><w:t>tracked</w:t></w:r></w:ins>'))
+    buf = io.BytesIO()
+    document.save(buf)
+    return buf.getvalue()
+
+def measure(fn, data):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(data)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*", type=Path, help="real compilations to check as well")
+    parser.add_argument("--entries", type=int, default=2000)
+    args = parser.parse_args()
+
+    inputs = [("generated", tricky_docx(synthetic_entries(args.entries)))]
+    inputs += [(f.name, f.read_bytes()) for f in args.files]
+
+    failed = False
+    print(f"{'input':<24} {'MB':>6} {'entries':>8} {'parser':<10} {'s':>7} {'peak MB':>8}")
+    for name, data in inputs:
+        paragraphs_ok = list(iter_docx_paragraphs(data)) == reference_paragraphs(data)
+        ref, ref_s, ref_peak = measure(reference_parse, data)
+        new, new_s, new_peak = measure(parse_compilation_docx, data)
+        for label, s, peak in (("python-docx", ref_s, ref_peak), ("streaming", new_s, new_peak)):
+            print(f"{name[:24]:<24} {len(data) / 1e6:>6.1f} {len(ref):>8} {label:<10} {s:>7.2f} {peak / 1e6:>8.1f}")
+        if not paragraphs_ok or new != ref:
+            failed = True
+            print(f"MISMATCH in {name}: paragraphs {'match' if paragraphs_ok else 'differ'}, "
+                  f"entries {'match' if new == ref else 'differ'}")
+
+    if failed:
+        sys.exit(1)
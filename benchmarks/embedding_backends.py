@@ -0,0 +1,98 @@
+
+# ------------------------------
+# Embedding backends: sentences/sec and equivalence against torch
+#   python -m benchmarks.embedding_backends [--sentences 2000] [--backends torch onnx onnx-int8]
+# Exits non-zero when a backend drifts past --min-cosine / --min-overlap, so it
+# doubles as the check to run after `python -m scripts.export_onnx`.
+# ------------------------------
+import argparse
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from db import SessionLocal
+from helpers.embeddings import EMBEDDING_BACKENDS, load_sentence_transformer
+
+QUERIES = [
+    "inventory management system", "mobile app for farmers", "student attendance monitoring",
+    "water quality iot sensors", "clinic appointment scheduling", "library book tracking",
+    "rice crop disease detection", "school enrollment web portal", "barangay records system",
+    "smart parking", "online voting", "point of sale for small stores",
+]
+
+def load_sentences(n: int):
+    db = SessionLocal()
+    try:
+        rows = [r[0] for r in db.execute(text("SELECT content FROM chunks LIMIT :n"), {"n": n})]
+    finally:
+        db.close()
+    if len(rows) < n:
+        words = "the system uses a mobile web app to monitor farm rice water school clinic inventory records".split()
+        rng = np.random.default_rng(0)
+        rows += [" ".join(rng.choice(words, size=rng.integers(12, 40))) + "." for _ in range(n - len(rows))]
+    return rows[:n]
+
+def encode(model, texts, batch_size):
+    vecs = model.encode(texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True)
+    return np.asarray(vecs, dtype=np.float32)
+
+def topk(scores, k):
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-overlap", type=float, default=0.8)
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.sentences)
+    print(f"sentences={len(sentences)} batch_size={args.batch_size} "
+          f"avg_words={np.mean([len(s.split()) for s in sentences]):.0f}")
+    print(f"{'backend':<10} {'load s':>7} {'sent/s':>8} {'q ms':>7} {'cos min':>8} {'cos mean':>9} "
+          f"{'score err':>10} {f'top{args.k}':>7}")
+
+    reference = None
+    failed = False
+    # torch always runs first: it is the reference the others are compared to
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        t0 = time.perf_counter()
+        try:
+            model = load_sentence_transformer(backend)
+        except (FileNotFoundError, ImportError) as e:
+            print(f"{backend:<10} skipped: {e}")
+            continue
+        load_s = time.perf_counter() - t0
+        encode(model, sentences[:32], args.batch_size)  # warm up
+
+        t0 = time.perf_counter()
+        docs = encode(model, sentences, args.batch_size)
+        sps = len(sentences) / (time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        queries = np.vstack([encode(model, [q], 1) for q in QUERIES])
+        q_ms = (time.perf_counter() - t0) * 1000 / len(QUERIES)
+        scores = queries @ docs.T
+
+        if reference is None:
+            reference = (docs, scores)
+            cos_min = cos_mean = 1.0
+            err, overlap = 0.0, 1.0
+        else:
+            ref_docs, ref_scores = reference
+            cos = np.sum(ref_docs * docs, axis=1)
+            cos_min, cos_mean = float(cos.min()), float(cos.mean())
+            err = float(np.abs(ref_scores - scores).max())
+            overlap = float(np.mean([len(a & b) / args.k for a, b in zip(topk(ref_scores, args.k), topk(scores, args.k))]))
+            if cos_mean < args.min_cosine or overlap < args.min_overlap:
+                failed = True
+        print(f"{backend:<10} {load_s:>7.2f} {sps:>8.0f} {q_ms:>7.2f} {cos_min:>8.4f} {cos_mean:>9.4f} "
+              f"{err:>10.4f} {overlap:>7.2f}")
+
+    if failed:
+        print(f"FAIL: cosine mean < {args.min_cosine} or top{args.k} overlap < {args.min_overlap}")
+        sys.exit(1)
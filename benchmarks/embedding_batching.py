@@ -0,0 +1,68 @@
+
+# ------------------------------
+# Query-encode throughput at 1/8/32 concurrent clients: one encode() per call
+# vs the micro-batching dispatcher
+#   python -m benchmarks.embedding_batching [--queries 256] [--clients 1 8 32]
+# ------------------------------
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from config import EmbeddingConfig
+from helpers.embedding_dispatcher import EmbeddingDispatcher
+from helpers.embeddings import embed_texts
+
+WORDS = "smart iot inventory system mobile web app monitoring farm rice water school clinic attendance".split()
+
+def make_queries(n: int):
+    rng = np.random.default_rng(0)
+    # distinct strings so nothing downstream can be served from a cache
+    return [" ".join(rng.choice(WORDS, size=4)) + f" {i}" for i in range(n)]
+
+def run(embed, queries, clients: int):
+    latencies = []
+    lock = threading.Lock()
+    parts = [queries[i::clients] for i in range(clients)]
+
+    def client(part):
+        mine = []
+        for q in part:
+            t0 = time.perf_counter()
+            embed([q])
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(p,)) for p in parts]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000
+    return len(queries) / elapsed, float(np.percentile(lat, 50)), float(np.percentile(lat, 99))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-batch", type=int, default=EmbeddingConfig.EMBED_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=EmbeddingConfig.EMBED_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries)
+    embed_texts(queries[:8])  # load + warm the model outside the timings
+
+    print(f"queries={args.queries} max_batch={args.max_batch} max_wait_ms={args.max_wait_ms}")
+    print(f"{'clients':>7} {'mode':<10} {'q/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6} {'queue ms':>9}")
+    for clients in args.clients:
+        qps, p50, p99 = run(embed_texts, queries, clients)
+        print(f"{clients:>7} {'direct':<10} {qps:>8.0f} {p50:>8.2f} {p99:>8.2f} {'1':>6} {'-':>9}")
+        dispatcher = EmbeddingDispatcher(embed_texts, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        qps, p50, p99 = run(dispatcher.embed, queries, clients)
+        stats = dispatcher.stats()
+        print(f"{clients:>7} {'batched':<10} {qps:>8.0f} {p50:>8.2f} {p99:>8.2f} "
+              f"{stats['batch_size']['mean']:>6.1f} {stats['queue_ms']['mean']:>9.2f}")
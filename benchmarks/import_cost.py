@@ -0,0 +1,65 @@
+
+# ------------------------------
+# Wall time and peak RSS of `import main` (and of the model warm-up that now
+# follows it), for this tree and optionally an older git ref
+#   python -m benchmarks.import_cost [--ref <git ref>] [--repeat 3]
+# ------------------------------
+import argparse
+import io
+import json
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import main
+out = {"import_s": time.perf_counter() - t0,
+       "import_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+       "torch_loaded": "torch" in sys.modules}
+if "--warm" in sys.argv:
+    from helpers.embeddings import warm_up_models
+    t0 = time.perf_counter()
+    warm_up_models("blocking")
+    out["warm_s"] = time.perf_counter() - t0
+    out["warm_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(out))
+"""
+
+def measure(tree: Path, warm: bool, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        args = [sys.executable, "-c", PROBE] + (["--warm"] if warm else [])
+        proc = subprocess.run(args, cwd=tree, capture_output=True, text=True, check=True)
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    # best of N: the first run also pays for cold disk caches
+    return min(runs, key=lambda r: r["import_s"])
+
+def export_ref(ref: str) -> Path:
+    dest = Path(tempfile.mkdtemp())
+    archive = subprocess.run(["git", "archive", ref], cwd=ROOT, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+    return dest
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ref", help="also measure this git ref (e.g. the commit before the lazy registry)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    trees = [("working tree", ROOT)]
+    if args.ref:
+        trees.insert(0, (args.ref, export_ref(args.ref)))
+
+    print(f"{'tree':<14} {'import s':>9} {'rss MB':>8} {'torch':>6} {'warm s':>8} {'warm rss MB':>12}")
+    for label, tree in trees:
+        r = measure(tree, warm=(tree == ROOT), repeat=args.repeat)
+        warm_s = f"{r['warm_s']:.2f}" if "warm_s" in r else "-"
+        warm_rss = f"{r['warm_rss_mb']:.0f}" if "warm_rss_mb" in r else "-"
+        print(f"{label:<14} {r['import_s']:>9.2f} {r['import_rss_mb']:>8.0f} {str(r['torch_loaded']):>6} {warm_s:>8} {warm_rss:>12}")
@@ -0,0 +1,50 @@
+
+# ------------------------------
+# Keyphrase extraction throughput: nlp.pipe single- vs multi-process
+#   python -m benchmarks.keyphrases [--docs 2000] [--processes 1 2 4] [--batch-size 64]
+# Abstracts come from the database (repeated up to --docs), or from
+# synthetic entries when it has none. Times include worker start-up, as an
+# ingest job pays it on every compilation.
+# ------------------------------
+import argparse
+import time
+
+from benchmarks.bulk_import import synthetic_entries
+from db import ReadSessionLocal
+from models import Project
+from rag.keyphrases import extract_keyphrases
+
+def abstracts(n: int):
+    db = ReadSessionLocal()
+    try:
+        texts = [a for (a,) in db.query(Project.abstract).filter(Project.abstract.isnot(None)).limit(n) if a.strip()]
+    finally:
+        db.close()
+    source = "database"
+    if not texts:
+        texts, source = [e["abstract"] for e in synthetic_entries(min(n, 500))], "synthetic"
+    return (texts * (n // len(texts) + 1))[:n], source
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    texts, source = abstracts(args.docs)
+    # loads the model once, outside the timings
+    if extract_keyphrases(texts[:1]) is None:
+        raise SystemExit("spaCy model not available; run `python -m spacy download en_core_web_sm`")
+    words = sum(len(t.split()) for t in texts)
+    print(f"{len(texts)} {source} abstracts, {words / len(texts):.0f} words each on average, batch size {args.batch_size}")
+
+    print(f"{'processes':>9} {'seconds':>8} {'docs/s':>8} {'speedup':>8}")
+    base = None
+    for n in args.processes:
+        t0 = time.perf_counter()
+        phrases = extract_keyphrases(texts, batch_size=args.batch_size, n_process=n)
+        seconds = time.perf_counter() - t0
+        base = base or seconds
+        print(f"{n:>9} {seconds:>8.2f} {len(texts) / seconds:>8.1f} {base / seconds:>7.2f}x")
+    print("sample:", "; ".join(phrases[0]))
@@ -0,0 +1,104 @@
+
+# ------------------------------
+# Query count/latency of per-page metadata: per-row lookups vs batched
+#   python -m benchmarks.metadata_queries [--projects 2000]
+# ------------------------------
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from db import insert_fts_row
+from models import Author, Base, Chunk, Project, ProjectKeyword
+import modules.capstones.api_search_capstones as search_module
+from modules.capstones.api_get_capstones import register_api_get_capstones_route
+
+def build_db(path: Path, projects: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(0)
+    words = "smart iot inventory system mobile web app monitoring farm rice water school clinic".split()
+    for i in range(projects):
+        title = " ".join(rng.choices(words, k=5))
+        p = Project(sha256=f"sha{i}", filename="bench.docx", title=title, year=2015 + i % 10, abstract=title * 20)
+        db.add(p); db.flush()
+        db.add_all([Author(project_id=p.id, full_name=f"Author {i}-{a}") for a in range(3)])
+        db.add_all([ProjectKeyword(project_id=p.id, keyword=w) for w in rng.sample(words, 4)])
+        db.add_all([Chunk(project_id=p.id, content=f"chunk {c} of {title}", ord_in_sec=c) for c in range(3)])
+        insert_fts_row(db, p.id, title, p.abstract, p.abstract)
+    db.commit()
+    return engine
+
+def per_row_metadata(db, project_ids):
+    # the previous implementation: two lookups per row/hit
+    out = {}
+    for pid in project_ids:
+        authors = [r[0] for r in db.execute(text("SELECT full_name FROM authors WHERE project_id=:pid"), {"pid": pid}).fetchall()]
+        keywords = [r[0] for r in db.execute(text("SELECT keyword FROM project_keywords WHERE project_id=:pid"), {"pid": pid}).fetchall()]
+        out[pid] = (authors, keywords)
+    return out
+
+def measure(engine, fn, repeat=20):
+    counter = {"n": 0}
+    def count(*_):
+        counter["n"] += 1
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        ms = (time.perf_counter() - t0) * 1000 / repeat
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return counter["n"] // repeat, ms
+
+def endpoint(app, path):
+    return next(r.endpoint for r in app.routes if getattr(r, "path", None) == path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--k", type=int, default=100)
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp()) / "bench.db"
+    engine = build_db(path, args.projects)
+    db = sessionmaker(bind=engine)()
+
+    app = FastAPI()
+    register_api_get_capstones_route(app)
+    search_module.register_api_search_capstones_routes(app)
+    list_projects = endpoint(app, "/api/capstones")
+    search = endpoint(app, "/api/search")
+
+    # search: feed k fixed chunk hits so only the metadata stage is measured
+    rows = db.execute(text("SELECT c.id, c.content, c.project_id, p.title, p.year FROM chunks c "
+                           "JOIN projects p ON p.id = c.project_id ORDER BY random() LIMIT :k"), {"k": args.k}).fetchall()
+    hits = [{"chunk_id": cid, "content": content, "project_id": pid, "section_id": None,
+             "title": title, "year": year, "sim": 0.5} for cid, content, pid, title, year in rows]
+    search_module.hybrid_retrieve = lambda db, q, k: hits
+    hit_pids = [h["project_id"] for h in hits]
+    page_pids = [r[0] for r in db.execute(text("SELECT id FROM projects ORDER BY id DESC LIMIT :n"), {"n": args.per_page})]
+
+    def run_search():
+        search_module.search_cache.clear()
+        search(q="inventory", k=args.k, db=db)
+
+    print(f"projects={args.projects}")
+    print(f"{'case':<34} {'queries':>8} {'ms':>8}")
+    for label, fn in [
+        (f"list per_page={args.per_page} per-row", lambda: per_row_metadata(db, page_pids)),
+        (f"list per_page={args.per_page} endpoint", lambda: list_projects(q=None, per_page=args.per_page, page=1, cursor=None, db=db)),
+        (f"list q=inventory endpoint", lambda: list_projects(q="inventory", per_page=args.per_page, page=1, cursor=None, db=db)),
+        (f"search k={args.k} per-hit", lambda: per_row_metadata(db, hit_pids)),
+        (f"search k={args.k} endpoint", run_search),
+    ]:
+        n, ms = measure(engine, fn)
+        print(f"{label:<34} {n:>8} {ms:>8.2f}")
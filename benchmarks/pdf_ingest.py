@@ -0,0 +1,184 @@
+
+# ------------------------------
+# Full-text PDF ingestion on a generated thesis
+#   python -m benchmarks.pdf_ingest [--pages 150] [--workers 1 2 4] [--ingest] [--pdf thesis.pdf]
+# Reports heading detection against the headings the generator wrote,
+# extraction throughput per number of parse workers, and peak memory of
+# streaming extraction against reading the whole document at once, at the
+# given size and at four times it (each measured in a fresh process). With
+# --ingest it also indexes the PDF into a scratch database (embedding
+# included). --pdf measures a real file instead; headings are then listed.
+# ------------------------------
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bulk_import import WORDS
+
+CHAPTERS = [
+    ("INTRODUCTION", ["Background of the Study", "Statement of the Problem", "Objectives of the Study",
+                      "Scope and Limitations", "Definition of Terms"]),
+    ("REVIEW OF RELATED LITERATURE", ["Related Studies", "Related Systems", "Synthesis"]),
+    ("METHODOLOGY", ["Research Design", "Data Gathering", "System Architecture", "Testing and Evaluation"]),
+    ("RESULTS AND DISCUSSION", ["System Features", "Evaluation Results", "Discussion"]),
+    ("CONCLUSIONS AND RECOMMENDATIONS", ["Conclusions", "Recommendations"]),
+]
+ROMAN = ["I", "II", "III", "IV", "V"]
+
+def thesis_pdf(pages: int, path: Path):
+    """Write a thesis-shaped PDF with `pages` pages; returns the headings it contains."""
+    import pymupdf
+    rng = random.Random(0)
+    def paragraph():
+        sentences = [" ".join(rng.choices(WORDS, k=rng.randint(10, 22))).capitalize() + "." for _ in range(rng.randint(3, 6))]
+        return " ".join(sentences)
+
+    doc = pymupdf.open()
+    headings = []
+    page = doc.new_page()
+    page.insert_text((72, 200), "MOBILE RICE MONITORING SYSTEM", fontsize=20, fontname="hebo")
+    page.insert_text((72, 240), "A Capstone Project Presented to the Faculty", fontsize=12, fontname="helv")
+    body_pages = pages - 1
+    subs = sum(len(s) for _, s in CHAPTERS)
+    per_sub = max(1, body_pages // subs)
+    written = 1
+    for c, (title, subsections) in enumerate(CHAPTERS):
+        for s, sub in enumerate(subsections):
+            count = per_sub if (c, s) != (len(CHAPTERS) - 1, len(subsections) - 1) else max(1, pages - written)
+            for p in range(count):
+                page = doc.new_page()
+                written += 1
+                y = 72
+                if s == 0 and p == 0:
+                    page.insert_text((72, y), f"CHAPTER {ROMAN[c]}", fontsize=14, fontname="hebo")
+                    page.insert_text((72, y + 22), title, fontsize=14, fontname="hebo")
+                    headings.append(f"CHAPTER {ROMAN[c]} {title}")
+                    y += 50
+                if p == 0:
+                    name = f"{c + 1}.{s + 1} {sub}"
+                    page.insert_text((72, y + 14), name, fontsize=12, fontname="hebo")
+                    headings.append(name)
+                    y += 30
+                while y < 660:
+                    rect = pymupdf.Rect(72, y, 540, 720)
+                    left = page.insert_textbox(rect, paragraph(), fontsize=11, fontname="helv")
+                    if left < 0:
+                        break  # did not fit; nothing was written
+                    y = rect.y1 - left + 14
+                page.insert_text((300, 760), str(written), fontsize=10, fontname="helv")
+    doc.save(path)
+    doc.close()
+    return headings
+
+def extract(path: Path, workers: int):
+    from config import ExecutorConfig, PdfConfig
+    from helpers import executors
+    from helpers.pdf_parser import iter_pdf_sections
+    from rag.pdf_ingest import iter_pdf_lines
+    executors.shutdown()
+    ExecutorConfig.PARSE_WORKERS = workers
+    t0 = time.perf_counter()
+    sections = [(s["heading"], len(s["content"])) for s in iter_pdf_sections(
+        iter_pdf_lines(str(path)), PdfConfig.PDF_MAX_SECTION_CHARS, PdfConfig.PDF_HEADING_SIZE_RATIO)]
+    return sections, time.perf_counter() - t0
+
+def memory_run(path: str, mode: str):
+    # runs in its own process with PARSE_WORKERS=0, so ru_maxrss covers extraction
+    t0 = time.perf_counter()
+    if mode == "streaming":
+        from config import PdfConfig
+        from helpers.pdf_parser import iter_pdf_sections
+        from rag.pdf_ingest import iter_pdf_lines
+        chars = sum(len(s["content"]) for s in iter_pdf_sections(iter_pdf_lines(path), PdfConfig.PDF_MAX_SECTION_CHARS))
+    else:
+        import pymupdf
+        # the straightforward way: every page's layout and the full text in memory
+        with pymupdf.open(path) as doc:
+            layouts = [doc.load_page(i).get_text("dict") for i in range(doc.page_count)]
+            text = "\n".join(span["text"] for layout in layouts for block in layout["blocks"]
+                             for line in block.get("lines", []) for span in line["spans"])
+        chars = len(text)
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, chars, time.perf_counter() - t0)
+
+def peak_rss(path: Path, mode: str):
+    env = {**os.environ, "PARSE_WORKERS": "0"}
+    out = subprocess.run([sys.executable, "-m", "benchmarks.pdf_ingest", "--memory-run", mode, "--pdf", str(path)],
+                         env=env, capture_output=True, text=True, check=True).stdout.split()
+    return int(out[0]) / 1024, float(out[2])
+
+def ingest(path: Path, tmp: Path):
+    from sqlalchemy.orm import sessionmaker
+    from db import create_db_engine
+    from helpers.hash import sha256_bytes
+    from models import Base, Project
+    from rag.embedding_cache import cache_report, new_cache_stats
+    from rag.pdf_ingest import index_pdf
+    engine = create_db_engine(f"sqlite:///{tmp / 'pdf.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        project = Project(sha256="benchmark", filename=path.name, title="Benchmark thesis", abstract="A thesis.")
+        db.add(project)
+        db.commit()
+        cache = new_cache_stats()
+        t0 = time.perf_counter()
+        stats = index_pdf(db, project.id, str(path), sha256_bytes(path.read_bytes()), cache)
+        return stats, time.perf_counter() - t0, cache_report(cache)
+    finally:
+        db.close()
+        engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=150)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--ingest", action="store_true", help="also index into a scratch database")
+    parser.add_argument("--pdf", type=Path, help="use this PDF instead of a generated one")
+    parser.add_argument("--memory-run", choices=["streaming", "whole"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.memory_run:
+        memory_run(str(args.pdf), args.memory_run)
+        raise SystemExit
+
+    tmp = Path(tempfile.mkdtemp())
+    if args.pdf:
+        pdfs, expected = [args.pdf], None
+    else:
+        pdfs = [tmp / f"thesis_{args.pages}.pdf", tmp / f"thesis_{args.pages * 4}.pdf"]
+        expected = thesis_pdf(args.pages, pdfs[0])
+        thesis_pdf(args.pages * 4, pdfs[1])
+    path = pdfs[0]
+    import pymupdf
+    with pymupdf.open(path) as doc:
+        pages = doc.page_count
+    print(f"{path.name}: {pages} pages, {path.stat().st_size / 1e6:.1f} MB")
+
+    sections = None
+    print(f"{'workers':>7} {'seconds':>8} {'pages/s':>8} {'sections':>9}")
+    for n in args.workers:
+        sections, seconds = extract(path, n)
+        print(f"{n:>7} {seconds:>8.2f} {pages / seconds:>8.1f} {len(sections):>9}")
+    found = [part for h, _ in sections if h for part in h.split(" / ")]
+    if expected is not None:
+        hits = [h for h in expected if h in found]
+        print(f"headings: {len(hits)}/{len(expected)} detected, {len(set(found) - set(expected))} extra"
+              + (f"; missed {[h for h in expected if h not in found][:5]}" if len(hits) < len(expected) else ""))
+    else:
+        print("headings:", "; ".join(found[:40]))
+
+    print(f"{'pdf':<22} {'mode':<10} {'peak RSS MB':>12} {'seconds':>8}")
+    for pdf in pdfs:
+        for mode in ("whole", "streaming"):
+            rss, seconds = peak_rss(pdf, mode)
+            print(f"{pdf.name:<22} {mode:<10} {rss:>12.1f} {seconds:>8.2f}")
+
+    if args.ingest:
+        stats, seconds, cache = ingest(path, tmp)
+        print(f"indexed {stats['sections']} sections, {stats['chunks']} chunks, {stats['tokens']} tokens "
+              f"in {seconds:.2f}s ({stats['chunks'] / seconds:.1f} chunks/s); embedding cache {cache}")
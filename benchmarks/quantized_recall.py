@@ -0,0 +1,44 @@
+
+# ------------------------------
+# Memory, latency and recall of float16/int8 vector stores vs float32
+#   python -m benchmarks.quantized_recall [--n 100000] [--from-db]
+# ------------------------------
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.ann_recall import db_corpus, synthetic_corpus
+from helpers.embeddings import pack_vector
+from rag.vector_store import VectorStore
+
+def run(ids, vecs, queries, k):
+    stores = {}
+    for fmt in ("float32", "float16", "int8"):
+        store = VectorStore(fmt)
+        store.add(ids, vecs)
+        stores[fmt] = store
+    truth = [{cid for cid, _ in stores["float32"].search(q, k)} for q in queries]
+
+    print(f"corpus={len(ids)} k={k}")
+    print(f"{'format':>8} {'blob B':>7} {'RAM MiB':>8} {'ms/query':>9} {'recall@k':>9}")
+    for fmt, store in stores.items():
+        t0 = time.perf_counter()
+        found = [{cid for cid, _ in store.search(q, k)} for q in queries]
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        blob = len(pack_vector(vecs[0], fmt))
+        print(f"{fmt:>8} {blob:>7} {store.nbytes / 2**20:>8.1f} {ms:>9.2f} {recall:>9.3f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--from-db", action="store_true")
+    args = parser.parse_args()
+
+    ids, vecs = db_corpus() if args.from_db else synthetic_corpus(args.n)
+    rng = np.random.default_rng(1)
+    queries = vecs[rng.choice(len(vecs), min(args.queries, len(vecs)), replace=False)]
+    run(ids, vecs, queries, args.k)
@@ -0,0 +1,129 @@
+
+# ------------------------------
+# Reader throughput/latency while a DOCX import holds the write transaction,
+# default SQLite settings vs the tuned profile (WAL + pragmas + read pool)
+#   python -m benchmarks.read_during_import [--projects 2000] [--entries 100] [--readers 8]
+# ------------------------------
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.metadata_queries import build_db, endpoint
+from db import create_db_engine
+from modules.capstones.api_get_capstone import register_api_get_capstone_route
+from modules.capstones.api_get_capstones import register_api_get_capstones_route
+from rag.indexing import upsert_project_from_fields
+
+WORDS = "smart iot inventory system mobile web app monitoring farm rice water school clinic".split()
+
+def run_import(Session, entries: int):
+    # same shape as /api/capstones/upload-docx: every entry in one transaction
+    rng = random.Random(1)
+    db = Session()
+    try:
+        for i in range(entries):
+            title = " ".join(rng.choices(WORDS, k=6))
+            abstract = ". ".join(" ".join(rng.choices(WORDS, k=12)) for _ in range(12)) + "."
+            upsert_project_from_fields(
+                db, "bench.docx", None,
+                title=f"{title} {i}", researchers=[f"Researcher {i}"], course="BSIT", host=None,
+                doc_type=None, keywords=rng.sample(WORDS, 3), abstract_text=abstract, year=2024
+            )
+        db.commit()
+    finally:
+        db.close()
+
+def run_readers(ReadSession, list_projects, get_project, readers: int, max_id: int, stop: threading.Event):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        mine, failed = [], 0
+        while not stop.is_set():
+            db = ReadSession()
+            t0 = time.perf_counter()
+            try:
+                if rng.random() < 0.5:
+                    list_projects(q=None, per_page=20, page=rng.randint(1, 20), cursor=None, db=db)
+                else:
+                    get_project(project_id=rng.randint(1, max_id), db=db)
+                mine.append(time.perf_counter() - t0)
+            except OperationalError:
+                failed += 1
+            finally:
+                db.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=reader, args=(s,)) for s in range(readers)]
+    for t in threads:
+        t.start()
+    return threads, latencies, errors
+
+def phase(ReadSession, routes, readers, max_id, work=None, seconds=3.0):
+    stop = threading.Event()
+    threads, latencies, errors = run_readers(ReadSession, *routes, readers, max_id, stop)
+    t0 = time.perf_counter()
+    if work:
+        work()
+    else:
+        time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "seconds": elapsed, "rps": len(latencies) / elapsed,
+        "p50": float(np.percentile(lat, 50)), "p99": float(np.percentile(lat, 99)), "errors": errors[0],
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    seed = tmp / "seed.db"
+    build_db(seed, args.projects).dispose()
+
+    app = FastAPI()
+    register_api_get_capstones_route(app)
+    register_api_get_capstone_route(app)
+    routes = (endpoint(app, "/api/capstones"), endpoint(app, "/api/capstones/{project_id}"))
+
+    print(f"projects={args.projects} import_entries={args.entries} readers={args.readers}")
+    print(f"{'profile':<12} {'phase':<8} {'s':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for profile in ("off", "production"):
+        path = tmp / f"{profile}.db"
+        shutil.copy(seed, path)
+        url = f"sqlite:///{path}"
+        writer = create_db_engine(url, tuning=profile)
+        reader = create_db_engine(url, read_only=True, tuning=profile)
+        with writer.connect():
+            pass  # the writer sets journal_mode before readers attach
+        Session = sessionmaker(bind=writer, autoflush=False)
+        ReadSession = sessionmaker(bind=reader, autoflush=False)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            idle = phase(ReadSession, routes, args.readers, args.projects)
+            busy = phase(ReadSession, routes, args.readers, args.projects, work=lambda: run_import(Session, args.entries))
+        for name, r in (("idle", idle), ("import", busy)):
+            print(f"{profile:<12} {name:<8} {r['seconds']:>6.1f} {r['rps']:>8.0f} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['errors']:>7}")
+        writer.dispose()
+        reader.dispose()
@@ -0,0 +1,19 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+# ------------------------------
+# Database for benchmark runs
+# ------------------------------
+# Importing `db` opens DB_URL and runs create_all and the SQLite pragmas on
+# it, so benchmarks never use the configured database: benchmarks/__init__
+# points DB_URL at a throwaway file before any benchmark module (and so any
+# app module) is imported. To measure a real corpus (--from-db, keyphrases,
+# embedding_backends), set BENCHMARK_DB_URL, preferably to a copy of it.
+# Subprocesses and parse workers inherit the setting.
+
+def use_scratch_db(url: Optional[str] = None) -> str:
+    url = url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'scratch.db'}"
+    os.environ["DB_URL"] = os.environ["DB_READ_URL"] = url
+    return url
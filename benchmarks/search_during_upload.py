@@ -0,0 +1,116 @@
+
+# ------------------------------
+# Search latency while uploads are processed, against a running server
+#   uvicorn main:app --port 8000          (with DB_URL pointing at a scratch copy)
+#   python -m benchmarks.search_during_upload [--url http://127.0.0.1:8000] [--seconds 20]
+#       [--searchers 4] [--uploaders 2] [--docx compilation.docx]
+# Measures /api/search latency with no writes, then while uploader threads keep
+# creating capstones (and, with --docx, while a compilation is imported).
+# Everything the run created is deleted afterwards.
+# ------------------------------
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import timedelta
+
+import numpy as np
+
+from benchmarks.bulk_import import synthetic_entries
+from benchmarks.embedding_backends import QUERIES
+from helpers.session import create_access_token
+
+def request(url, method="GET", data=None, headers=None, timeout=120):
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read() or b"null")
+
+def searcher(base, stop, latencies, errors, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        q = urllib.parse.quote(rng.choice(QUERIES))
+        t0 = time.perf_counter()
+        try:
+            request(f"{base}/api/search?q={q}&k=10")
+            latencies.append((time.perf_counter() - t0) * 1000)
+        except Exception:
+            errors.append(1)
+
+def uploader(base, auth, stop, created, seed):
+    rng = random.Random(seed)
+    entries = synthetic_entries(50)
+    while not stop.is_set():
+        e = rng.choice(entries)
+        tag = uuid.uuid4().hex[:8]
+        # unique text, so every upload is embedded instead of hitting the embedding cache
+        form = urllib.parse.urlencode({
+            "title": f"{e['title']} {tag}", "abstract": f"Study {tag}. {e['abstract']}",
+            "authors": ", ".join(e["researchers"]), "keywords": ", ".join(e["keywords"]), "year": e["year"],
+        }).encode()
+        try:
+            body = request(f"{base}/api/capstones", "POST", form,
+                           {**auth, "Content-Type": "application/x-www-form-urlencoded"})
+            if isinstance(body, dict) and "id" in body:
+                created.append(body["id"])
+        except Exception:
+            pass
+
+def upload_docx(base, auth, path):
+    boundary = uuid.uuid4().hex
+    data = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{path.split('/')[-1]}\"\r\n"
+            "Content-Type: application/vnd.openxmlformats-officedocument.wordprocessingml.document\r\n\r\n").encode()
+    data += open(path, "rb").read() + f"\r\n--{boundary}--\r\n".encode()
+    return request(f"{base}/api/capstones/upload-docx", "POST", data,
+                   {**auth, "Content-Type": f"multipart/form-data; boundary={boundary}"})["job_id"]
+
+def phase(base, auth, seconds, searchers, uploaders):
+    stop = threading.Event()
+    latencies, errors, created = [], [], []
+    threads = [threading.Thread(target=searcher, args=(base, stop, latencies, errors, i)) for i in range(searchers)]
+    threads += [threading.Thread(target=uploader, args=(base, auth, stop, created, i)) for i in range(uploaders)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return np.array(latencies), len(errors), created
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--searchers", type=int, default=4)
+    parser.add_argument("--uploaders", type=int, default=2)
+    parser.add_argument("--docx", help="also import this compilation during the loaded phase")
+    args = parser.parse_args()
+
+    auth = {"Authorization": "Bearer " + create_access_token(
+        {"sub": "benchmark", "role": "Admin"}, timedelta(hours=1))}
+    request(f"{args.url}/api/search?q=warm+up&k=10")
+
+    print(f"{'phase':<14} {'searches':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'writes':>7}")
+    created, job_id = [], None
+    for label, uploaders in (("idle", 0), ("uploading", args.uploaders)):
+        if uploaders and args.docx:
+            job_id = upload_docx(args.url, auth, args.docx)
+        lat, errors, made = phase(args.url, auth, args.seconds, args.searchers, uploaders)
+        created += made
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (float("nan"),) * 3
+        print(f"{label:<14} {len(lat):>9} {errors:>7} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {len(made):>7}")
+
+    if job_id is not None:
+        while True:
+            job = request(f"{args.url}/api/jobs/{job_id}")["data"]
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(1)
+        print(f"docx job {job['status']}: {job['done']} entries, {job['elapsed_seconds']}s")
+        created += [pid for pid in (job["result"] or {}).get("inserted", []) if pid]
+    for pid in created:
+        request(f"{args.url}/api/capstones/{pid}", "DELETE", headers=auth)
+    print(f"deleted {len(created)} capstone(s) created by the run")
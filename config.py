@@ -23,12 +23,142 @@ class EmbeddingConfig:
     # Embedding Options
     # ------------------------------
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+    # Inference backend: torch | onnx | onnx-int8 (run `python -m scripts.export_onnx` first)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", PathConfig.BASE_DIR / "models" / "all-MiniLM-L6-v2-onnx"))
+    # dynamic int8 quantization target: avx2 | avx512 | avx512_vnni | arm64
+    ONNX_QUANT_CONFIG = os.getenv("ONNX_QUANT_CONFIG", "avx2")
+    # Model load on startup: background (serve while loading) | blocking | off (first request)
+    MODEL_WARMUP = os.getenv("MODEL_WARMUP", "background")
+    # Query encodes from concurrent requests are flushed together once this many
+    # texts are queued or the oldest has waited this long; 1 disables batching
+    EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+    EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "2"))
+    # Unix socket of a shared `python -m scripts.embedding_server`; empty encodes in-process.
+    # While the server is unreachable workers fall back to a local model, retrying it after
+    # EMBED_SERVER_RETRY_SECONDS.
+    EMBED_SERVER_SOCKET = os.getenv("EMBED_SERVER_SOCKET", "")
+    EMBED_SERVER_TIMEOUT = float(os.getenv("EMBED_SERVER_TIMEOUT", "30"))
+    EMBED_SERVER_RETRY_SECONDS = float(os.getenv("EMBED_SERVER_RETRY_SECONDS", "5"))
+    # Abstract chunks are filled up to this many model tokens, [CLS]/[SEP] included: the
+    # model's max sequence length (256 for all-MiniLM-L6-v2), past which the encoder truncates
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+    # sentences repeated from the end of one chunk at the start of the next (0 = none)
+    CHUNK_OVERLAP_SENTENCES = int(os.getenv("CHUNK_OVERLAP_SENTENCES", "0"))
+    # per-sentence token counts kept between calls (re-imports and edits mostly repeat sentences)
+    TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "50000"))
+    # Chunks per model call (and per bulk insert) when importing a compilation
+    INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "256"))
+    # Storage/in-memory encoding of chunk vectors: float32 | float16 | int8
+    # Quantizing saves memory only; it never makes a query faster. Scoring has no int8 or
+    # float16 kernel: every query widens the matrix to float32 block by block. For 100k x 384,
+    # int8 (1/4 of the memory) scans in about the same time as float32 (18 vs 17 ms), and
+    # float16 (1/2 of the memory) takes about 7x as long (117 ms). float16 rows written by
+    # scripts.requantize_embeddings still load as float32 when this stays float32.
+    VECTOR_FORMAT = os.getenv("VECTOR_FORMAT", "float32")
+    # LRU of query vectors keyed by (model, backend, normalized query); size 0 disables it
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+    QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "86400"))
     
+class VectorIndexConfig:
+    # ------------------------------
+    # Vector Index Options
+    # ------------------------------
+    # IVF index built offline by `python -m scripts.build_ann_index`; when the
+    # directory is missing, retrieval falls back to the exact in-memory scan
+    ANN_ENABLED = os.getenv("ANN_ENABLED", "1") == "1"
+    ANN_INDEX_DIR = Path(os.getenv("ANN_INDEX_DIR", PathConfig.BASE_DIR / "capstone_repo.ivf"))
+    ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+    # online inserts/deletes are merged into the index files once they reach this fraction of
+    # it (checked every ANN_MERGE_INTERVAL seconds; 0 disables the thread) and at shutdown
+    ANN_MERGE_RATIO = float(os.getenv("ANN_MERGE_RATIO", "0.1"))
+    ANN_MERGE_INTERVAL = float(os.getenv("ANN_MERGE_INTERVAL", "300"))
+    # Exact search backend: "memory" (resident matrix) or "segment" (shared mmap files)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "memory")
+    SEGMENT_DIR = Path(os.getenv("SEGMENT_DIR", PathConfig.BASE_DIR / "capstone_repo.vectors"))
+    SEGMENT_COMPACT_RATIO = float(os.getenv("SEGMENT_COMPACT_RATIO", "0.25"))
+    SEGMENT_COMPACT_INTERVAL = float(os.getenv("SEGMENT_COMPACT_INTERVAL", "300"))
+    # PostgreSQL only: pgvector index type ("hnsw" | "ivfflat") and its search knobs
+    # (ivfflat reuses ANN_NPROBE as ivfflat.probes)
+    PG_VECTOR_INDEX = os.getenv("PG_VECTOR_INDEX", "hnsw")
+    PG_IVFFLAT_LISTS = int(os.getenv("PG_IVFFLAT_LISTS", "100"))
+    PG_HNSW_EF_SEARCH = int(os.getenv("PG_HNSW_EF_SEARCH", "40"))
+
+class CacheConfig:
+    # ------------------------------
+    # Result Cache Options
+    # ------------------------------
+    # /api/search results, keyed by the corpus generation
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+    SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # COUNT(*) totals for /api/capstones and /api/users
+    COUNT_CACHE_SIZE = int(os.getenv("COUNT_CACHE_SIZE", "512"))
+
 class DBConfig:
     # ------------------------------
     # Database Options
     # ------------------------------
     DB_URL = os.getenv("DB_URL", "sqlite:///capstone_repo.db")
+    # GET endpoints and retrieval read through a separate pool (a replica URL on PostgreSQL)
+    DB_READ_URL = os.getenv("DB_READ_URL", DB_URL)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+    # SQLite pragmas set on every new connection; SQLITE_TUNING=off keeps SQLite defaults
+    SQLITE_TUNING = os.getenv("SQLITE_TUNING", "production")
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+class JobConfig:
+    # ------------------------------
+    # Background ingestion jobs
+    # ------------------------------
+    # worker threads per app process; 0 leaves jobs to `python -m scripts.ingest_worker`
+    JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", "1"))
+    # entries committed per transaction (the unit of progress and of resume)
+    JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "25"))
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+    # a running job whose heartbeat (refreshed every quarter lease while it runs) is older than this is considered
+    # orphaned, e.g. by a restart, and is claimed again
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+class ExecutorConfig:
+    # ------------------------------
+    # Bounded executors for blocking work (helpers/executors)
+    # ------------------------------
+    # parser processes; 0 parses inline in the calling thread
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "1"))
+    # concurrent bulk embedding calls (imports, create/update); search queries use the dispatcher
+    EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+    # concurrent write transactions from request handlers and ingest jobs; SQLite has one writer anyway
+    DB_WRITE_WORKERS = int(os.getenv("DB_WRITE_WORKERS", "1"))
+
+class PdfConfig:
+    # ------------------------------
+    # Full-text PDF ingestion (rag/pdf_ingest)
+    # ------------------------------
+    # pages per extraction task; at most two tasks per parse worker are in flight
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+    # longer sections are written in parts, so memory stays bounded without detectable headings
+    PDF_MAX_SECTION_CHARS = int(os.getenv("PDF_MAX_SECTION_CHARS", "20000"))
+    # a line this much larger than the body text is a heading
+    PDF_HEADING_SIZE_RATIO = float(os.getenv("PDF_HEADING_SIZE_RATIO", "1.15"))
+
+class KeyphraseConfig:
+    # ------------------------------
+    # Keyphrases extracted from abstracts at ingest (rag/keyphrases)
+    # ------------------------------
+    # "off" skips the stage, and spaCy is never loaded
+    KEYPHRASES = os.getenv("KEYPHRASES", "on")
+    # noun-chunk keyphrases stored per project, next to the keywords listed in the source
+    KEYPHRASE_TOP_K = int(os.getenv("KEYPHRASE_TOP_K", "8"))
+    KEYPHRASE_BATCH_SIZE = int(os.getenv("KEYPHRASE_BATCH_SIZE", "64"))
+    # nlp.pipe worker processes; only pays off for large compilations (see benchmarks/keyphrases)
+    KEYPHRASE_N_PROCESS = int(os.getenv("KEYPHRASE_N_PROCESS", "1"))
 
 class OllamaConfig:
     # ------------------------------
@@ -1,18 +1,63 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 
 from contextlib import contextmanager
 from sqlalchemy import text
 
+from config import CacheConfig, DBConfig
+from helpers.lru import LRUCache
 from models import Base
 
 # ------------------------------
 # Database setup
 # ------------------------------
-DATABASE_URL = "sqlite:///./capstone_repo.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = DBConfig.DB_URL
+
+_SQLITE_MEMORY = ("sqlite://", "sqlite:///:memory:")
+
+def _sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            if not read_only:
+                # persistent in the file; readers pick it up from the writer
+                cur.execute(f"PRAGMA journal_mode={DBConfig.SQLITE_JOURNAL_MODE}")
+            cur.execute(f"PRAGMA synchronous={DBConfig.SQLITE_SYNCHRONOUS}")
+            cur.execute(f"PRAGMA mmap_size={int(DBConfig.SQLITE_MMAP_SIZE)}")
+            cur.execute(f"PRAGMA cache_size=-{int(DBConfig.SQLITE_CACHE_SIZE_KB)}")
+            cur.execute(f"PRAGMA busy_timeout={int(DBConfig.SQLITE_BUSY_TIMEOUT_MS)}")
+            cur.execute("PRAGMA foreign_keys=ON")
+            if read_only:
+                cur.execute("PRAGMA query_only=ON")
+        finally:
+            cur.close()
+    return on_connect
+
+def create_db_engine(url: str, *, read_only: bool = False, tuning: str = None):
+    tuning = tuning or DBConfig.SQLITE_TUNING
+    pool_size = DBConfig.DB_READ_POOL_SIZE if read_only else DBConfig.DB_POOL_SIZE
+    if not url.startswith("sqlite"):
+        options = {"postgresql_readonly": True} if read_only and url.startswith("postgresql") else {}
+        return create_engine(url, pool_size=pool_size, pool_pre_ping=True, execution_options=options)
+
+    pooling = {} if url in _SQLITE_MEMORY else {"pool_size": pool_size, "max_overflow": pool_size}
+    eng = create_engine(url, connect_args={"check_same_thread": False}, **pooling)
+    if tuning != "off":
+        event.listen(eng, "connect", _sqlite_pragmas(read_only))
+    elif read_only:
+        event.listen(eng, "connect", lambda conn, _record: conn.execute("PRAGMA query_only=ON"))
+    return eng
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# In-memory SQLite is private to one connection, so it cannot have a reader pool
+if DBConfig.DB_READ_URL in _SQLITE_MEMORY:
+    read_engine = engine
+else:
+    read_engine = create_db_engine(DBConfig.DB_READ_URL, read_only=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base.metadata.create_all(bind=engine)
 
 # ------------------------------
@@ -25,6 +70,14 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    # read-only session for GET endpoints and retrieval; writes raise
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def get_db_session() -> Session:
     db = SessionLocal()
     return db
@@ -42,10 +95,40 @@ def session_scope() -> Session:
         s.close()
 
 def insert_fts_row(db: Session, project_id: int, title: str, abstract: str, fullbody: str):
+    from rag.search_backend import search_backend
+    search_backend().insert_fts_row(db, project_id, title, abstract, fullbody)
+
+def delete_fts_row(db: Session, project_id: int):
+    from rag.search_backend import search_backend
+    search_backend().delete_fts_row(db, project_id)
+
+# ------------------------------
+# Cache generations
+# ------------------------------
+# Every write path bumps the counter inside its own transaction, so all
+# workers see the new value (and drop cached results) exactly when the
+# write becomes visible.
+CORPUS = "corpus"
+USERS = "users"
+
+def current_generation(db: Session, name: str = CORPUS) -> int:
+    value = db.execute(text("SELECT value FROM cache_generations WHERE name=:n"), {"n": name}).scalar()
+    return value or 0
+
+def bump_generation(db: Session, name: str = CORPUS):
     db.execute(
-        text("INSERT INTO projects_fts(rowid, title, abstract, content, project_id) VALUES (:rid,:t,:a,:c,:pid)"),
-        {"rid": project_id, "t": title or "", "a": abstract or "", "c": fullbody or "", "pid": project_id}
+        text("""INSERT INTO cache_generations(name, value) VALUES (:n, 1)
+                ON CONFLICT(name) DO UPDATE SET value = cache_generations.value + 1"""),
+        {"n": name}
     )
 
-def delete_fts_row(db: Session, project_id: int):
-    db.execute(text("DELETE FROM projects_fts WHERE rowid=:rid"), {"rid": project_id})
+# Row counts behind paginated listings, reused until the generation moves
+count_cache = LRUCache(CacheConfig.COUNT_CACHE_SIZE)
+
+def cached_count(db: Session, key, compute, name: str = CORPUS) -> int:
+    cache_key = (name, current_generation(db, name), key)
+    total = count_cache.get(cache_key)
+    if total is None:
+        total = compute()
+        count_cache.put(cache_key, total)
+    return total
@@ -58,6 +58,7 @@ class PaginatedProjectOutput(BaseModel):
     page: int
     per_page: int
     results: List[ProjectOut] = []
+    next_cursor: Optional[str] = None
     
 class SummarizeIn(BaseModel):
     query: str
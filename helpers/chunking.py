@@ -0,0 +1,92 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from config import EmbeddingConfig
+from helpers.embeddings import tokenizer
+from helpers.lru import LRUCache
+from helpers.text import split_sentences
+
+# ------------------------------
+# Token-budget chunking
+# ------------------------------
+# Chunk length is measured with the embedding model's own tokenizer, so no
+# chunk is longer than what the encoder reads (CHUNK_MAX_TOKENS) and nothing
+# is embedded only to be truncated. Sentences are packed whole; a sentence
+# over the budget on its own is cut at word boundaries. Sentence token counts
+# are computed in one tokenizer call per batch of texts and cached.
+SPECIAL_TOKENS = 2  # [CLS] and [SEP], added by the encoder to every chunk
+MIN_CHUNK_CHARS = 20
+
+_token_counts = LRUCache(EmbeddingConfig.TOKEN_COUNT_CACHE_SIZE)
+
+def count_tokens(texts: Sequence[str]) -> List[int]:
+    """Model tokens in each text, special tokens excluded."""
+    counts = [_token_counts.get(t) for t in texts]
+    missing = list(dict.fromkeys(t for t, n in zip(texts, counts) if n is None))
+    if missing:
+        ids = tokenizer()(missing, add_special_tokens=False)["input_ids"]
+        fresh = {t: len(i) for t, i in zip(missing, ids)}
+        for t, n in fresh.items():
+            _token_counts.put(t, n)
+        counts = [fresh[t] if n is None else n for t, n in zip(texts, counts)]
+    return counts
+
+def _split_long(sentence: str, budget: int) -> List[Tuple[str, int]]:
+    offsets = tokenizer()(sentence, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    pieces, start = [], 0
+    while start < len(offsets):
+        end = min(start + budget, len(offsets))
+        if end < len(offsets):
+            # back off to a token that starts a word, so "embed ##ding" is not split
+            cut = end
+            while cut > start + 1 and not sentence[offsets[cut][0] - 1].isspace():
+                cut -= 1
+            if cut > start + 1:
+                end = cut
+        pieces.append((sentence[offsets[start][0]:offsets[end - 1][1]], end - start))
+        start = end
+    return pieces
+
+def _pack(units: List[Tuple[str, int]], budget: int, overlap: int) -> List[Tuple[str, int]]:
+    chunks, cur, used = [], [], 0
+    for sent, n in units:
+        if cur and used + n > budget:
+            chunks.append((" ".join(s for s, _ in cur), used))
+            # repeat the last `overlap` sentences, as many as still fit next to this one
+            carry = []
+            for unit in reversed(cur[-overlap:] if overlap else []):
+                if sum(m for _, m in carry) + unit[1] + n > budget:
+                    break
+                carry.insert(0, unit)
+            cur, used = carry, sum(m for _, m in carry)
+        cur.append((sent, n))
+        used += n
+    if cur:
+        chunks.append((" ".join(s for s, _ in cur), used))
+    return [(c, n + SPECIAL_TOKENS) for c, n in chunks if len(c) > MIN_CHUNK_CHARS]
+
+def token_chunks_batch(
+    texts: Iterable[Optional[str]],
+    max_tokens: Optional[int] = None,
+    overlap: Optional[int] = None,
+) -> List[List[Tuple[str, int]]]:
+    """
+    Chunk each text to at most `max_tokens` model tokens (default
+    CHUNK_MAX_TOKENS, special tokens included), repeating `overlap` sentences
+    between neighbouring chunks (default CHUNK_OVERLAP_SENTENCES). Returns
+    (chunk, tokens) pairs per text; all sentences are measured in one batch.
+    """
+    budget = (max_tokens or EmbeddingConfig.CHUNK_MAX_TOKENS) - SPECIAL_TOKENS
+    overlap = EmbeddingConfig.CHUNK_OVERLAP_SENTENCES if overlap is None else overlap
+    sentences = [split_sentences(t) for t in texts]
+    counts = iter(count_tokens([s for sents in sentences for s in sents]))
+    out = []
+    for sents in sentences:
+        units = []
+        for sent in sents:
+            n = next(counts)
+            units += _split_long(sent, budget) if n > budget else [(sent, n)]
+        out.append(_pack(units, budget, overlap))
+    return out
+
+def token_chunks(text: Optional[str], max_tokens: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+    return [c for c, _ in token_chunks_batch([text], max_tokens, overlap)[0]]
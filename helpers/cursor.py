@@ -0,0 +1,21 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+# ------------------------------
+# Opaque keyset-pagination cursors
+# ------------------------------
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *required: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(data, dict) or any(key not in data for key in required):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return data
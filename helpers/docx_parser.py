@@ -1,49 +1,105 @@
 import io
-from typing import List, Dict
-import docx
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Union
+from xml.etree.ElementTree import iterparse, parse
+
 from helpers.regex import FIELD_LABELS
 from helpers.text import split_keywords, split_names
 
-def parse_compilation_docx(file_bytes: bytes) -> List[Dict]:
+DocxSource = Union[bytes, str, Path, BinaryIO]
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY, _P, _R, _HYPERLINK = _W + "body", _W + "p", _W + "r", _W + "hyperlink"
+_BR_TYPE = _W + "type"
+# run children that contribute to paragraph.text (python-docx 1.x CT_R.text)
+_RUN_TEXT = {_W + "t", _W + "tab", _W + "br", _W + "cr", _W + "noBreakHyphen", _W + "ptab"}
+_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+def _main_part(zf: zipfile.ZipFile) -> str:
+    # the package relationships name the main document part; it is almost always word/document.xml
+    try:
+        with zf.open("_rels/.rels") as f:
+            for rel in parse(f).getroot():
+                if rel.get("Type") == _OFFICE_DOCUMENT:
+                    return posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    except KeyError:
+        pass
+    return "word/document.xml"
+
+def _run_text(el) -> str:
+    tag = el.tag
+    if tag == _W + "t":
+        return el.text or ""
+    if tag in (_W + "tab", _W + "ptab"):
+        return "\t"
+    if tag == _W + "br":
+        return "\n" if el.get(_BR_TYPE, "textWrapping") == "textWrapping" else ""
+    if tag == _W + "cr":
+        return "\n"
+    return "-"  # noBreakHyphen
+
+def iter_docx_paragraphs(source: DocxSource) -> Iterator[str]:
     """
-    Return entries extracted from a .docx compilation:
-    [{
-      'title': str|None,
-      'researchers': [str],
-      'course': str|None,
-      'host': str|None,
-      'doc_type': str|None,
-      'keywords': [str],
-      'abstract': str
-    }, ...]
+    Yield the text of each body paragraph of a .docx, in order, without
+    building the document model. Matches python-docx `Document.paragraphs`
+    / `Paragraph.text`: only paragraphs directly under <w:body> (not table
+    cells), and only runs directly in the paragraph or in a hyperlink.
     """
-    buf = io.BytesIO(file_bytes)
-    document = docx.Document(buf)
-    paras = [p.text.strip() for p in document.paragraphs if p.text and p.text.strip()]
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as zf, zf.open(_main_part(zf)) as xml:
+        stack: List[str] = []
+        body = None
+        parts: List[str] = []
+        for event, el in iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(el.tag)
+                if el.tag == _BODY:
+                    body = el
+                continue
+            stack.pop()
+            depth = len(stack)
+            # stack is now the ancestors of el: [document, body, p, (hyperlink,) r]
+            if el.tag in _RUN_TEXT and depth >= 4 and stack[-1] == _R and (
+                (stack[-2] == _P and stack[-3] == _BODY)
+                or (stack[-2] == _HYPERLINK and depth >= 5 and stack[-3] == _P and stack[-4] == _BODY)
+            ):
+                parts.append(_run_text(el))
+            elif depth >= 1 and stack[-1] == _BODY:
+                if el.tag == _P:
+                    yield "".join(parts)
+                parts = []
+                # finished top-level blocks are dropped so memory stays flat
+                body.remove(el)
 
-    entries, cur = [], {
+def _entries_from_paragraphs(paragraphs: Iterable[str]) -> Iterator[Dict]:
+    cur = {
         "title": None, "researchers": [], "course": None, "host": None,
         "doc_type": None, "keywords": [], "abstract": [], "year": None
     }
 
-    def flush():
-        if cur["title"] or cur["abstract"]:
-            entries.append({
-                "title": cur["title"],
-                "researchers": cur["researchers"],
-                "course": cur["course"],
-                "host": cur["host"],
-                "doc_type": cur["doc_type"],
-                "keywords": cur["keywords"],
-                "year": cur["year"] or None,
-                "abstract": "\n\n".join(cur["abstract"]).strip()
-            })
-
-    for line in paras:
+    def entry():
+        return {
+            "title": cur["title"],
+            "researchers": cur["researchers"],
+            "course": cur["course"],
+            "host": cur["host"],
+            "doc_type": cur["doc_type"],
+            "keywords": cur["keywords"],
+            "year": cur["year"] or None,
+            "abstract": "\n\n".join(cur["abstract"]).strip()
+        }
+
+    for text in paragraphs:
+        if not text or not text.strip():
+            continue
+        line = text.strip()
         m = FIELD_LABELS["title"].match(line)
         if m:
             if cur["title"] or cur["abstract"]:
-                flush()
+                yield entry()
                 cur = {"title": None, "researchers": [], "course": None, "host": None,
                        "doc_type": None, "keywords": [], "abstract": [], "year": None}
             cur["title"] = m.group(1).strip(); continue
@@ -59,5 +115,25 @@ def parse_compilation_docx(file_bytes: bytes) -> List[Dict]:
         else:
             cur["abstract"].append(line)
 
-    flush()
-    return entries
+    if cur["title"] or cur["abstract"]:
+        yield entry()
+
+def iter_compilation_entries(source: DocxSource) -> Iterator[Dict]:
+    """Streaming form of parse_compilation_docx: entries are yielded as soon
+    as the next "Title:" paragraph (or the end of the file) is read."""
+    return _entries_from_paragraphs(iter_docx_paragraphs(source))
+
+def parse_compilation_docx(source: DocxSource) -> List[Dict]:
+    """
+    Return entries extracted from a .docx compilation:
+    [{
+      'title': str|None,
+      'researchers': [str],
+      'course': str|None,
+      'host': str|None,
+      'doc_type': str|None,
+      'keywords': [str],
+      'abstract': str
+    }, ...]
+    """
+    return list(iter_compilation_entries(source))
@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List
+
+import numpy as np
+
+# ------------------------------
+# Micro-batching encode dispatcher
+# ------------------------------
+# Concurrent callers (search requests on the threadpool, coroutines via
+# embed_async) enqueue their texts; one worker thread flushes the queue as a
+# single encode() call once max_batch texts are waiting or the oldest request
+# has waited max_wait_ms. One batched forward pass is much cheaper than N
+# single-text passes fighting over the same CPU threads.
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class EmbeddingDispatcher:
+    def __init__(self, encode: Callable, max_batch: int = 64, max_wait_ms: float = 5.0, window: int = 2048):
+        self._encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # metrics: totals plus a window of recent samples for percentiles
+        self._stats_lock = threading.Lock()
+        self._requests = self._batches = self._texts = self._direct = 0
+        self._batch_sizes = deque(maxlen=window)
+        self._queue_ms = deque(maxlen=window)
+        self._encode_ms = deque(maxlen=window)
+
+    def embed(self, texts) -> np.ndarray:
+        return self.submit(texts).result()
+
+    async def embed_async(self, texts) -> np.ndarray:
+        import asyncio
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def submit(self, texts) -> Future:
+        texts = list(texts)
+        if not texts or len(texts) >= self.max_batch:
+            # already a full batch (e.g. ingestion): nothing to coalesce with
+            with self._stats_lock:
+                self._direct += 1
+            future = Future()
+            try:
+                future.set_result(self._encode(texts))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._ensure_worker()
+        req = _Request(texts)
+        self._queue.put(req)
+        return req.future
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embed-dispatcher", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            n = len(batch[0].texts)
+            deadline = batch[0].enqueued + self.max_wait
+            while n < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    # past the deadline still take whatever is already queued
+                    req = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(req)
+                n += len(req.texts)
+            self._flush(batch, n)
+
+    def _flush(self, batch: List[_Request], n: int):
+        started = time.perf_counter()
+        texts = [t for req in batch for t in req.texts]
+        try:
+            vecs = self._encode(texts)
+        except Exception as e:
+            for req in batch:
+                req.future.set_exception(e)
+            vecs = None
+        encode_ms = (time.perf_counter() - started) * 1000
+        if vecs is not None:
+            offset = 0
+            for req in batch:
+                # copy: a view would keep the whole batch array alive in caches
+                req.future.set_result(np.array(vecs[offset:offset + len(req.texts)]))
+                offset += len(req.texts)
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._texts += n
+            self._batch_sizes.append(n)
+            self._encode_ms.append(encode_ms)
+            self._queue_ms.extend((started - req.enqueued) * 1000 for req in batch)
+
+    def stats(self):
+        with self._stats_lock:
+            sizes = np.array(self._batch_sizes or [0])
+            waits = np.array(self._queue_ms or [0.0])
+            encodes = np.array(self._encode_ms or [0.0])
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "texts": self._texts,
+                "direct_calls": self._direct,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "batch_size": {"mean": round(float(sizes.mean()), 2), "max": int(sizes.max())},
+                "queue_ms": {
+                    "mean": round(float(waits.mean()), 3),
+                    "p50": round(float(np.percentile(waits, 50)), 3),
+                    "p99": round(float(np.percentile(waits, 99)), 3),
+                },
+                "encode_ms": {"mean": round(float(encodes.mean()), 3)},
+            }
@@ -0,0 +1,128 @@
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+# ------------------------------
+# Out-of-process embedding server
+# ------------------------------
+# One process owns the model; every uvicorn worker talks to it over a Unix
+# socket, so model memory does not grow with --workers. Frames are a uint32
+# big-endian length followed by a JSON header; encode replies append the
+# float32 rows (n x dim) as raw bytes after the header.
+_LEN = struct.Struct(">I")
+
+def _send(sock: socket.socket, header: dict, payload: bytes = b""):
+    raw = json.dumps(header).encode("utf-8")
+    sock.sendall(_LEN.pack(len(raw)) + raw + payload)
+
+def _recv_exact(sock: socket.socket, n: int) -> bytearray:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("embedding server closed the connection")
+        buf += chunk
+    return buf  # writable, so decoded rows behave like locally encoded ones
+
+def _recv_header(sock: socket.socket) -> dict:
+    (n,) = _LEN.unpack(_recv_exact(sock, _LEN.size))
+    return json.loads(_recv_exact(sock, n))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                req = _recv_header(self.request)
+            except (ConnectionError, OSError):
+                return
+            op = req.get("op")
+            try:
+                if op == "ping":
+                    _send(self.request, {"ok": True, "model": self.server.model_name})
+                elif op == "encode":
+                    vecs = np.ascontiguousarray(self.server.encode(req["texts"]), dtype=np.float32)
+                    _send(self.request, {"ok": True, "shape": list(vecs.shape)}, vecs.tobytes())
+                else:
+                    _send(self.request, {"ok": False, "error": f"unknown op {op!r}"})
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                _send(self.request, {"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # one connection per client thread in every worker
+
+    def __init__(self, path: str, encode: Callable, model_name: str):
+        if os.path.exists(path):
+            os.unlink(path)  # stale socket from a previous run
+        self.encode = encode
+        self.model_name = model_name
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+
+class EmbeddingClient:
+    """Thin client; encode() returns None whenever the server can't answer so
+    the caller can fall back to in-process encoding."""
+
+    def __init__(self, path: str, timeout: float = 30.0, retry_seconds: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._local = threading.local()  # one connection per thread
+        self._down_until = 0.0
+
+    def _conn(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _drop(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _call(self, header: dict, read_rows: bool = False):
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            sock = self._conn()
+            _send(sock, header)
+            reply = _recv_header(sock)
+            if not reply.get("ok"):
+                # the server is up but failed this request: surface it like a local error
+                raise RuntimeError(f"embedding server: {reply.get('error')}")
+            if not read_rows:
+                return reply
+            n, dim = reply["shape"] if len(reply["shape"]) == 2 else (0, 0)
+            payload = _recv_exact(sock, n * dim * 4)
+            return np.frombuffer(payload, dtype=np.float32).reshape(n, dim)
+        except (OSError, ConnectionError, ValueError):
+            self._drop()
+            self._down_until = time.monotonic() + self.retry_seconds
+            return None
+
+    def encode(self, texts) -> Optional[np.ndarray]:
+        return self._call({"op": "encode", "texts": list(texts)}, read_rows=True)
+
+    def ping(self) -> bool:
+        return self._call({"op": "ping"}) is not None
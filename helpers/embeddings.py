@@ -1,34 +1,190 @@
+import struct
+import threading
 import numpy as np
-import spacy
-from sentence_transformers import SentenceTransformer
 from config import EmbeddingConfig
+from helpers.embedding_dispatcher import EmbeddingDispatcher
+from helpers.embedding_server import EmbeddingClient
+from helpers.lru import LRUCache
+from helpers.model_registry import get_model, is_loaded, register_model, warm_up
 
-_nlp = None
-_embedder = None
+SPACY_MODEL = "en_core_web_sm"
+# noun_chunks and lemmas need tok2vec, tagger, parser, attribute_ruler and lemmatizer;
+# the entity recognizer and the sentence splitter (the parser sets sentences) are not loaded
+SPACY_EXCLUDE = ["ner", "senter"]
+
+def _load_spacy():
+    # the model is installed at setup (README); a missing one raises OSError instead of downloading at runtime
+    import spacy
+    return spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def onnx_file_name(backend: str) -> str:
+    if backend == "onnx-int8":
+        return f"onnx/model_qint8_{EmbeddingConfig.ONNX_QUANT_CONFIG}.onnx"
+    return "onnx/model.onnx"
+
+def load_sentence_transformer(backend: str = None):
+    from sentence_transformers import SentenceTransformer
+    backend = backend or EmbeddingConfig.EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {EMBEDDING_BACKENDS}")
+    if backend == "torch":
+        return SentenceTransformer(EmbeddingConfig.EMBEDDING_MODEL)
+    path = EmbeddingConfig.ONNX_MODEL_DIR
+    if not (path / onnx_file_name(backend)).exists():
+        raise FileNotFoundError(f"{path / onnx_file_name(backend)} missing; run `python -m scripts.export_onnx`")
+    return SentenceTransformer(str(path), backend="onnx", model_kwargs={"file_name": onnx_file_name(backend)})
+
+def _load_embedder():
+    return load_sentence_transformer()
+
+TOKENIZER = f"{EmbeddingConfig.EMBEDDING_MODEL}:tokenizer"
+
+def _load_tokenizer():
+    # just the tokenizer files, so chunking does not load the model (e.g. behind EMBED_SERVER_SOCKET)
+    from transformers import AutoTokenizer
+    name = EmbeddingConfig.EMBEDDING_MODEL
+    return AutoTokenizer.from_pretrained(name if "/" in name else f"sentence-transformers/{name}")
+
+register_model(SPACY_MODEL, _load_spacy)
+register_model(TOKENIZER, _load_tokenizer)
+register_model(EmbeddingConfig.EMBEDDING_MODEL, _load_embedder,
+               warm=lambda model: model.encode(["warm up"], show_progress_bar=False))
 
 def nlp():
-    global _nlp
-    if _nlp is None:
-        try:
-            _nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            import subprocess, sys
-            subprocess.run([sys.executable, "-m", "spacy", "download", "en_core_web_sm"], check=True)
-            _nlp = spacy.load("en_core_web_sm")
-    return _nlp
+    return get_model(SPACY_MODEL)
 
 def embedder():
-    global _embedder
-    if _embedder is None:
-        _embedder = SentenceTransformer(EmbeddingConfig.EMBEDDING_MODEL)
-    return _embedder
+    return get_model(EmbeddingConfig.EMBEDDING_MODEL)
 
-def embed_texts(texts):
+def tokenizer():
+    return get_model(TOKENIZER)
+
+def encode_local(texts):
     vecs = embedder().encode(texts, show_progress_bar=False, normalize_embeddings=True)
     return np.asarray(vecs, dtype=np.float32)
 
-def pack_vector(vec):
-    return vec.astype(np.float32).tobytes()
+_client = None
+
+def embedding_client():
+    # None unless EMBED_SERVER_SOCKET points at a running scripts.embedding_server
+    global _client
+    if _client is None and EmbeddingConfig.EMBED_SERVER_SOCKET:
+        _client = EmbeddingClient(
+            EmbeddingConfig.EMBED_SERVER_SOCKET,
+            timeout=EmbeddingConfig.EMBED_SERVER_TIMEOUT,
+            retry_seconds=EmbeddingConfig.EMBED_SERVER_RETRY_SECONDS,
+        )
+    return _client
+
+def embed_texts(texts):
+    client = embedding_client()
+    if client is not None:
+        vecs = client.encode(texts)
+        if vecs is not None:
+            return vecs
+    # no server configured, or it is down: load the model in this process
+    return encode_local(texts)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def embed_dispatcher() -> EmbeddingDispatcher:
+    # coalesces concurrent query encodes; EMBED_BATCH_MAX_SIZE=1 encodes each call directly
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = EmbeddingDispatcher(
+                    lambda texts: embed_texts(texts),
+                    max_batch=EmbeddingConfig.EMBED_BATCH_MAX_SIZE,
+                    max_wait_ms=EmbeddingConfig.EMBED_BATCH_MAX_WAIT_MS,
+                )
+    return _dispatcher
+
+# Models a request can't be served without; /api/system/ready waits for these
+REQUIRED_MODELS = (EmbeddingConfig.EMBEDDING_MODEL,)
+
+def models_ready() -> bool:
+    client = embedding_client()
+    if client is not None and client.ping():
+        return True
+    return all(is_loaded(name) for name in REQUIRED_MODELS)
+
+def warm_up_models(mode: str = None):
+    mode = mode or EmbeddingConfig.MODEL_WARMUP
+    if mode == "off":
+        return None
+    client = embedding_client()
+    if client is not None and client.ping():
+        return None  # the server owns the model; fallback loads it lazily if needed
+    return warm_up(REQUIRED_MODELS, background=(mode == "background"))
+
+# ------------------------------
+# Query embedding cache
+# ------------------------------
+query_cache = LRUCache(EmbeddingConfig.QUERY_CACHE_SIZE, EmbeddingConfig.QUERY_CACHE_TTL)
+
+def normalize_query(query: str) -> str:
+    # the default MiniLM tokenizer is uncased and splits on whitespace, so
+    # queries differing only in case/spacing encode to the same vector
+    return " ".join((query or "").lower().split())
+
+def embed_query(query: str):
+    key = (EmbeddingConfig.EMBEDDING_MODEL, EmbeddingConfig.EMBEDDING_BACKEND, normalize_query(query))
+    vec = query_cache.get(key)
+    if vec is None:
+        vec = embed_dispatcher().embed([query.strip()])[0]
+        vec.setflags(write=False)
+        query_cache.put(key, vec)
+    return vec
+
+# ------------------------------
+# Vector blob encoding
+# ------------------------------
+# float32 rows are stored bare (the original layout). Quantized rows carry a
+# header: b"EV", format version, format code, uint16 dim; int8 rows follow it
+# with a float32 per-vector scale. Blobs without a valid header are float32.
+_MAGIC = b"EV"
+_BLOB_VERSION = 1
+_HEADER = struct.Struct("<2sBBH")
+_SCALE = struct.Struct("<f")
+VECTOR_FORMATS = {"float32": 0, "float16": 1, "int8": 2}
+
+def quantize_int8(vecs):
+    """Symmetric per-vector int8 quantization: vec ~= codes * scale."""
+    vecs = np.atleast_2d(np.asarray(vecs, dtype=np.float32))
+    scales = np.abs(vecs).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vecs / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def pack_vector(vec, fmt=None):
+    fmt = fmt or EmbeddingConfig.VECTOR_FORMAT
+    vec = np.asarray(vec, dtype=np.float32).ravel()
+    if fmt == "float32":
+        return vec.tobytes()
+    header = _HEADER.pack(_MAGIC, _BLOB_VERSION, VECTOR_FORMATS[fmt], len(vec))
+    if fmt == "float16":
+        return header + vec.astype(np.float16).tobytes()
+    codes, scales = quantize_int8(vec)
+    return header + _SCALE.pack(scales[0]) + codes.tobytes()
+
+def decode_vector(blob):
+    """Return (format, payload, scale) without dequantizing; scale is 1.0 unless int8."""
+    if len(blob) >= _HEADER.size:
+        magic, version, code, dim = _HEADER.unpack_from(blob)
+        if magic == _MAGIC and version == _BLOB_VERSION:
+            if code == VECTOR_FORMATS["float16"] and len(blob) == _HEADER.size + 2 * dim:
+                return "float16", np.frombuffer(blob, dtype=np.float16, offset=_HEADER.size), 1.0
+            if code == VECTOR_FORMATS["int8"] and len(blob) == _HEADER.size + _SCALE.size + dim:
+                scale = _SCALE.unpack_from(blob, _HEADER.size)[0]
+                return "int8", np.frombuffer(blob, dtype=np.int8, offset=_HEADER.size + _SCALE.size), scale
+    return "float32", np.frombuffer(blob, dtype=np.float32), 1.0
 
 def unpack_vector(blob):
-    return np.frombuffer(blob, dtype=np.float32)
+    fmt, payload, scale = decode_vector(blob)
+    if fmt == "float32":
+        return payload
+    return payload.astype(np.float32) * np.float32(scale)
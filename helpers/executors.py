@@ -0,0 +1,99 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from config import ExecutorConfig
+
+# ------------------------------
+# Bounded executors for blocking work
+# ------------------------------
+# Async endpoints hand blocking work to a small pool per kind, so the event
+# loop keeps serving searches while uploads are processed:
+#   parse  document parsing; CPU-bound, so it runs in processes (no GIL)
+#   embed  bulk model inference
+#   db     write transactions
+# Sync code (ingest jobs, threadpool endpoints) goes through `call` or
+# `bounded`, which apply the same per-kind limit.
+
+def limit(kind: str) -> int:
+    return {
+        "parse": ExecutorConfig.PARSE_WORKERS,
+        "embed": ExecutorConfig.EMBED_WORKERS,
+        "db": ExecutorConfig.DB_WRITE_WORKERS,
+    }[kind]
+
+_executors: Dict[str, Executor] = {}
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+def _semaphore(kind: str) -> threading.BoundedSemaphore:
+    sem = _semaphores.get(kind)
+    if sem is None:
+        with _lock:
+            sem = _semaphores.get(kind)
+            if sem is None:
+                sem = _semaphores[kind] = threading.BoundedSemaphore(max(limit(kind), 1))
+    return sem
+
+def executor(kind: str) -> Executor:
+    ex = _executors.get(kind)
+    if ex is None:
+        with _lock:
+            ex = _executors.get(kind)
+            if ex is None:
+                workers = max(limit(kind), 1)
+                if kind == "parse":
+                    # spawn: workers import only what the task needs, never the model
+                    ex = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    ex = ThreadPoolExecutor(workers, thread_name_prefix=f"{kind}-worker")
+                _executors[kind] = ex
+    return ex
+
+@contextmanager
+def bounded(kind: str):
+    with _semaphore(kind):
+        yield
+
+def call(kind: str, fn: Callable, *args, **kwargs):
+    """Run fn under the kind's limit from sync code and return its result."""
+    if kind == "parse" and limit(kind) > 0:
+        return executor(kind).submit(fn, *args, **kwargs).result()
+    with bounded(kind):
+        return fn(*args, **kwargs)
+
+def submit(kind: str, fn: Callable, *args, **kwargs) -> Future:
+    """Start fn on the kind's executor from sync code without waiting for it;
+    the caller bounds how many it keeps in flight."""
+    if kind == "parse" and limit(kind) == 0:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    if kind == "parse":
+        return executor(kind).submit(fn, *args, **kwargs)
+    return executor(kind).submit(call, kind, fn, *args, **kwargs)
+
+async def run_in(kind: str, fn: Callable, *args, **kwargs):
+    """Await fn on the kind's executor instead of running it on the event loop."""
+    loop = asyncio.get_running_loop()
+    if kind == "parse":
+        if limit(kind) == 0:
+            return await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        task = functools.partial(fn, *args, **kwargs)
+    else:
+        # also take the semaphore so sync callers and executor tasks share one limit
+        task = functools.partial(call, kind, fn, *args, **kwargs)
+    return await loop.run_in_executor(executor(kind), task)
+
+def shutdown():
+    with _lock:
+        for ex in _executors.values():
+            ex.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
@@ -0,0 +1,58 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from config import PathConfig
+
+# ------------------------------
+# Content-addressed storage for uploaded source files
+# ------------------------------
+# A file is written once, as uploads/compilations/{sha256}{suffix}, however
+# many projects it produced; projects point at it through source_sha256.
+# Unreferenced files are removed by `python -m scripts.gc_uploads`.
+_CHUNK = 1 << 20
+
+def blob_dir() -> Path:
+    return PathConfig.UPLOAD_DIR / "compilations"
+
+def blob_path(sha: str, suffix: str = ".docx") -> Path:
+    return blob_dir() / f"{sha}{suffix}"
+
+def store_stream(stream: BinaryIO, suffix: str = ".docx") -> Tuple[str, Path, int]:
+    """Copy `stream` into the store in fixed-size chunks, hashing on the way.
+    Returns (sha256, path, size); a file already stored is not written again."""
+    directory = blob_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f"{uuid.uuid4().hex}.part"
+    h, size = hashlib.sha256(), 0
+    try:
+        with open(tmp, "wb") as out:
+            while True:
+                chunk = stream.read(_CHUNK)
+                if not chunk:
+                    break
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha = h.hexdigest()
+        path = blob_path(sha, suffix)
+        if path.exists():
+            tmp.unlink()
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return sha, path, size
+
+def store_file(source: Path, sha: Optional[str] = None) -> Tuple[str, Path]:
+    """Store a file from disk. With its sha256 already known, an existing copy
+    is reused without reading the source again."""
+    source = Path(source)
+    if sha is not None and blob_path(sha, source.suffix).exists():
+        return sha, blob_path(sha, source.suffix)
+    with open(source, "rb") as f:
+        sha, path, _ = store_stream(f, source.suffix)
+    return sha, path
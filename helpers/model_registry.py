@@ -0,0 +1,64 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+# ------------------------------
+# Process-wide model registry
+# ------------------------------
+# Heavy models (sentence-transformers, spaCy) are registered by name and only
+# loaded on first use, so importing the app, Alembic or seed.py never pulls in
+# torch. Ingestion and retrieval share the single instance per name.
+_loaders: Dict[str, Callable] = {}
+_warmers: Dict[str, Callable] = {}
+_models: Dict[str, object] = {}
+_locks: Dict[str, threading.Lock] = {}
+_info: Dict[str, Dict] = {}
+
+def register_model(name: str, loader: Callable, warm: Optional[Callable] = None):
+    _loaders[name] = loader
+    if warm is not None:
+        _warmers[name] = warm
+    _locks.setdefault(name, threading.Lock())
+    _info.setdefault(name, {"state": "idle", "load_seconds": None, "error": None})
+
+def get_model(name: str):
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _locks[name]:
+        model = _models.get(name)
+        if model is None:
+            _info[name].update(state="loading", error=None)
+            t0 = time.perf_counter()
+            try:
+                model = _loaders[name]()
+                if name in _warmers:
+                    # first inference allocates kernels/buffers; pay it here, not on a request
+                    _warmers[name](model)
+            except Exception as e:
+                _info[name].update(state="error", error=f"{type(e).__name__}: {e}")
+                raise
+            _models[name] = model
+            _info[name].update(state="ready", load_seconds=round(time.perf_counter() - t0, 3))
+    return model
+
+def is_loaded(name: str) -> bool:
+    return name in _models
+
+def warm_up(names: Iterable[str], background: bool = True):
+    names = list(names)
+    def run():
+        for name in names:
+            try:
+                get_model(name)
+            except Exception:
+                pass  # recorded in status(); the next get_model retries
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def status() -> Dict[str, Dict]:
+    return {name: dict(info) for name, info in _info.items()}
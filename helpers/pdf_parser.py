@@ -0,0 +1,124 @@
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+PdfSource = Union[str, Path]
+
+class PdfLine(NamedTuple):
+    page: int
+    text: str
+    size: float      # largest font size in the line
+    bold: bool       # every span is bold
+    block_start: bool  # first line of a text block (paragraph)
+
+_BOLD_FLAG = 1 << 4
+# page furniture: "12", "Page 3", "3 of 150", roman page numbers in the front matter
+_PAGE_NUMBER = re.compile(r"^\s*(page\s*)?(\d+|[ivxlc]+)(\s*of\s*\d+)?\s*$", re.I)
+_CHAPTER = re.compile(r"^chapter\s+([ivxlc]+|\d+|[a-z]+)\b", re.I)
+_NUMBERED = re.compile(r"^\d+(\.\d+){0,3}\.?\s+[A-Z]")
+_CAPTION = re.compile(r"^(table|figure|fig\.|appendix)\s*[\dA-Z]", re.I)
+
+def pdf_page_count(source: PdfSource) -> int:
+    import pymupdf
+    with pymupdf.open(source) as doc:
+        return doc.page_count
+
+def extract_pdf_lines(source: PdfSource, start: int, stop: int) -> List[PdfLine]:
+    """
+    Text lines of pages [start, stop) with the font information heading
+    detection needs. Only these pages are loaded, so a worker's memory
+    depends on the page range, not on the size of the PDF.
+    """
+    import pymupdf
+    lines: List[PdfLine] = []
+    with pymupdf.open(source) as doc:
+        for pno in range(start, min(stop, doc.page_count)):
+            page = doc.load_page(pno)
+            for block in page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]:
+                first = True
+                for line in block.get("lines", []):
+                    spans = [s for s in line["spans"] if s["text"].strip()]
+                    text = " ".join("".join(s["text"] for s in spans).split())
+                    if not text or _PAGE_NUMBER.match(text):
+                        continue
+                    bold = all(s["flags"] & _BOLD_FLAG or "bold" in s["font"].lower() for s in spans)
+                    lines.append(PdfLine(pno, text, round(max(s["size"] for s in spans), 1), bold, first))
+                    first = False
+            page = None
+    return lines
+
+def is_heading(line: PdfLine, body_size: Optional[float], size_ratio: float) -> bool:
+    text = line.text
+    words = text.split()
+    if len(text) > 90 or len(words) > 12 or _CAPTION.match(text) or not any(c.isalpha() for c in text):
+        return False
+    if _CHAPTER.match(text):
+        return True
+    if body_size and line.size >= body_size * size_ratio:
+        return True
+    if text.endswith((".", ",", ";")):
+        return False
+    upper = text.isupper() and len(words) <= 8
+    # numbered or all-caps lines count when set apart by weight or by starting a block
+    return (line.bold and (upper or bool(_NUMBERED.match(text)))) or (upper and line.block_start)
+
+def _join(parts: List[str]) -> str:
+    return "\n".join(parts).strip()
+
+def iter_pdf_sections(
+    lines: Iterable[PdfLine],
+    max_chars: int = 20000,
+    size_ratio: float = 1.15,
+) -> Iterator[Dict]:
+    """
+    Group lines into sections under detected headings, yielding
+    {"heading", "content", "page"} as soon as the next heading is reached.
+    Body text size is the most common size seen so far (by characters).
+    A section over `max_chars` is yielded in parts with the same heading,
+    so memory stays bounded even for a PDF without detectable headings.
+    Headings with no text between them are joined with " / ". Text before
+    the first heading has heading None.
+    """
+    sizes: Counter = Counter()
+    heading: Optional[str] = None
+    page = 0
+    paragraphs: List[str] = []
+    para = ""
+    length = 0
+
+    def section():
+        return {"heading": heading, "content": _join(paragraphs + [para]), "page": page}
+
+    for line in lines:
+        body = sizes.most_common(1)[0][0] if sizes else None
+        if is_heading(line, body, size_ratio):
+            if paragraphs or para:
+                yield section()
+                heading = line.text
+            elif heading is not None and _CHAPTER.match(heading) and len(heading.split()) <= 2:
+                # "CHAPTER I" followed by "INTRODUCTION": one heading
+                heading = f"{heading} {line.text}"
+            elif heading is not None and len(heading) + len(line.text) < 150:
+                # a heading directly under another keeps it as context: "CHAPTER I INTRODUCTION / 1.1 Background"
+                heading = f"{heading} / {line.text}"
+            else:
+                heading = line.text
+            paragraphs, para, length, page = [], "", 0, line.page
+            continue
+        sizes[line.size] += len(line.text)
+        if not paragraphs and not para:
+            page = line.page
+        if line.block_start and para:
+            paragraphs.append(para)
+            para = line.text
+        elif para.endswith("-") and line.text[:1].islower():
+            para = para[:-1] + line.text  # word hyphenated across lines
+        else:
+            para = f"{para} {line.text}" if para else line.text
+        length += len(line.text) + 1
+        if length >= max_chars:
+            yield section()
+            paragraphs, para, length = [], "", 0
+    if paragraphs or para:
+        yield section()
@@ -1,6 +1,5 @@
-from http.client import HTTPException
 from typing import List, Optional
-from fastapi import Depends, Request
+from fastapi import Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from datetime import datetime, timedelta
 
@@ -1,8 +1,12 @@
 import re
 from typing import List
 
+def split_sentences(text: str) -> List[str]:
+    return [s for s in re.split(r"(?<=[.!?])\s+(?=[A-Z(])", (text or "").strip()) if s]
+
 def sentence_chunks(text: str, target_chars=1200) -> List[str]:
-    sents = re.split(r"(?<=[.!?])\s+(?=[A-Z(])", (text or "").strip())
+    # the character-budget chunker; indexing uses helpers.chunking.token_chunks
+    sents = split_sentences(text)
     chunks, buf = [], ""
     for s in sents:
         if len(buf) + len(s) + 1 <= target_chars:
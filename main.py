@@ -1,15 +1,22 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from config import PathConfig
+from helpers import executors
+from helpers.embeddings import warm_up_models
+from rag.ingest_jobs import ingest_worker
+from rag.vector_store import close_store
 from modules.admin.capstones import configure_admin_capstone_module
 from modules.admin.users import configure_admin_users_module
 from modules.auth import configure_auth_module
 from modules.capstones import configure_capstone_module
 from modules.home import configure_home_module
+from modules.jobs import configure_jobs_module
+from modules.system import configure_system_module
 
 PathConfig.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 PathConfig.TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
@@ -23,7 +30,18 @@ print("############################")
 # ------------------------------
 # FastAPI app setup
 # ------------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load the embedding model once per worker (see MODEL_WARMUP)
+    warm_up_models()
+    # picks up queued uploads, including ones interrupted by the last shutdown
+    ingest_worker().start()
+    yield
+    ingest_worker().stop()
+    executors.shutdown()
+    close_store()
+
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount("/uploads", StaticFiles(directory=str(PathConfig.UPLOAD_DIR)), name="uploads")
 app.add_middleware(
@@ -43,4 +61,6 @@ configure_capstone_module(app)
 configure_auth_module(app)
 configure_admin_users_module(app)
 configure_admin_capstone_module(app)
+configure_system_module(app)
+configure_jobs_module(app)
 
@@ -1,13 +1,11 @@
 import json
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String, Text, event
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, LargeBinary, String, Text, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from sqlalchemy import DateTime
 from typing import List, Optional
 
-from helpers.embedding import encode_text
-
 Base = declarative_base()
 
 class User(Base):
@@ -22,6 +20,10 @@ class Project(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     sha256: Mapped[str] = mapped_column(String, unique=True, index=True)
     filename: Mapped[str] = mapped_column(String)
+    # uploaded file this entry came from, stored once in helpers/file_store
+    source_sha256: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    # full-text PDF indexed by rag/pdf_ingest, also in the file store
+    pdf_sha256: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
     title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     year: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     external_links: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -43,6 +45,8 @@ class ProjectKeyword(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"))
     keyword: Mapped[str] = mapped_column(String, index=True)
+    # extracted from the abstract at ingest (rag/keyphrases) rather than listed in the source
+    auto_generated: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0")
     project: Mapped[Project] = relationship(back_populates="keywords")
 
 class Section(Base):
@@ -52,11 +56,15 @@ class Section(Base):
     heading: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     content: Mapped[str] = mapped_column(Text)
     order_no: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # PDF the section was extracted from; None for the ABSTRACT section
+    source_sha256: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     project: Mapped[Project] = relationship(back_populates="sections")
     chunks: Mapped[List["Chunk"]] = relationship(back_populates="section", cascade="all, delete-orphan")
 
 class Chunk(Base):
     __tablename__ = "chunks"
+    # never reuse ids: vector stores in other workers reconcile by chunk id
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"))
     section_id: Mapped[Optional[int]] = mapped_column(ForeignKey("sections.id", ondelete="SET NULL"), nullable=True)
@@ -76,16 +84,60 @@ class Author(Base):
 
 
 
+class CacheGeneration(Base):
+    __tablename__ = "cache_generations"
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+
 class Embedding(Base):
     __tablename__ = "embeddings"
     chunk_id: Mapped[int] = mapped_column(ForeignKey("chunks.id", ondelete="CASCADE"), primary_key=True)
     vector: Mapped[bytes] = mapped_column(LargeBinary)
     chunk: Mapped[Chunk] = relationship(back_populates="embedding")
+
+
+class IngestJob(Base):
+    # persistent upload queue processed by rag/ingest_jobs
+    __tablename__ = "ingest_jobs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, default="docx")
+    status: Mapped[str] = mapped_column(String, default="queued", index=True)  # queued | running | done | failed
+    filename: Mapped[str] = mapped_column(String)
+    spool_path: Mapped[str] = mapped_column(String)
+    source_sha256: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    project_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # pdf jobs: the project to index into
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    done: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    progress: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON, one item per entry
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)    # JSON
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class ImportedFile(Base):
+    # compilation files loaded by scripts/import_compilations; makes re-runs resumable
+    __tablename__ = "imported_files"
+    sha256: Mapped[str] = mapped_column(String, primary_key=True)
+    path: Mapped[str] = mapped_column(String)
+    entries: Mapped[int] = mapped_column(Integer, default=0)
+    imported_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class EmbeddingCacheEntry(Base):
+    # float32 vector per (model, sha256 of chunk text); see rag/embedding_cache
+    __tablename__ = "embedding_cache"
+    model: Mapped[str] = mapped_column(String, primary_key=True)
+    text_sha256: Mapped[str] = mapped_column(String, primary_key=True)
+    vector: Mapped[bytes] = mapped_column(LargeBinary)
     
 
 @event.listens_for(Base.metadata, "after_create")
 def create_fts(target, connection, **kw):
-    connection.exec_driver_sql("""
-    CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts
-    USING fts5(title, abstract, content, project_id UNINDEXED, tokenize="porter");
-    """)
+    from rag.search_backend import backend_for
+    backend_for(connection.dialect.name).create_schema(connection)
@@ -4,6 +4,7 @@ from modules.admin.capstones.api_create_capstone import register_api_create_caps
 from modules.admin.capstones.api_delete_capstone import register_api_delete_capstone_route
 from modules.admin.capstones.api_update_capstone import register_api_update_capstone_route
 from modules.admin.capstones.api_upload_docx import register_api_upload_docx_route
+from modules.admin.capstones.api_upload_pdf import register_api_upload_pdf_route
 from modules.admin.capstones.manage_capstones import register_manage_capstones_route
 
 def configure_admin_capstone_module(app: FastAPI):
@@ -12,4 +13,5 @@ def configure_admin_capstone_module(app: FastAPI):
     register_api_update_capstone_route(app)
     register_api_delete_capstone_route(app)
     register_api_update_capstone_route(app)
-    register_api_upload_docx_route(app)
\ No newline at end of file
+    register_api_upload_docx_route(app)
+    register_api_upload_pdf_route(app)
\ No newline at end of file
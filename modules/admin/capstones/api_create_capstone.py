@@ -4,16 +4,21 @@ from fastapi import FastAPI, UploadFile
 from fastapi import Form
 from fastapi.params import Depends
 
-from db import get_db, insert_fts_row
-from helpers.embeddings import embed_texts, pack_vector
+from db import bump_generation, get_db, insert_fts_row
+from helpers.embeddings import pack_vector
+from helpers.executors import run_in
 from helpers.hash import sha256_bytes
 from helpers.pdf import PdfHelper
 from helpers.session import require_role
 from dtos import CapstoneResponse
 from sqlalchemy.orm import Session
 
-from helpers.text import sentence_chunks
+from helpers.chunking import token_chunks
 from models import Author, Chunk, Embedding, Project, ProjectKeyword, Section
+from rag.embedding_cache import embed_texts_cached, store_encoded
+from rag.indexing import encode_abstract
+from rag.search_backend import search_backend
+from rag.vector_store import stage_add
 
 
 def register_api_create_capstone_route(app: FastAPI):
@@ -28,46 +33,59 @@ def register_api_create_capstone_route(app: FastAPI):
         db: Session = Depends(get_db),
         claims=Depends(require_role(["Admin", "Staff"]))
     ):
-        
-        basis = (title or "") + "|" + authors + "|" + abstract[:1000]
-        sha = sha256_bytes(basis.encode("utf-8"))
-        
-        existing = db.query(Project).filter_by(sha256=sha).one_or_none()
-        if existing:
-            return {
-                "status": "error",
-                "message": "Project already exists"
-            }
-        
-        capstone = Project(
-            sha256=sha, filename="default.docx", title=title, year=year, abstract=abstract,
-            external_links=external_links,
-            course="BSIT", host="CBSUA", doc_type="Capstone Project"
-        )
-        db.add(capstone); db.flush()
-        
-        for a in authors.split(','):
-            a = a.strip()
-            db.add(Author(project_id=capstone.id, full_name=a))
-            
-        for k in keywords.split(','):
-            k = k.strip()
-            db.add(ProjectKeyword(project_id=capstone.id, keyword=k))
-        
-        # index abstract as a section with chunks + embeddings
-        if abstract:
-            sec = Section(project_id=capstone.id, heading="ABSTRACT", content=abstract, order_no=1)
-            db.add(sec); db.flush()
-            parts = sentence_chunks(abstract)
-            if parts:
-                vecs = embed_texts(parts)
-                for j, (part, vec) in enumerate(zip(parts, vecs), start=1):
-                    ch = Chunk(project_id=capstone.id, section_id=sec.id, content=part, ord_in_sec=j)
-                    db.add(ch); db.flush()
-                    db.add(Embedding(chunk_id=ch.id, vector=pack_vector(vec)))
+        # off the event loop: the abstract is encoded on the embed executor, then only the
+        # write transaction takes a slot on the bounded DB executor
+        encoded = await run_in("embed", encode_abstract, abstract)
+        return await run_in("db", _create_capstone, db, title, abstract, authors, keywords, year, external_links, encoded)
+
 
-        insert_fts_row(db, capstone.id, capstone.title or "", capstone.abstract or "", abstract or "")
+def _create_capstone(db: Session, title: str, abstract: str, authors: str, keywords: str, year: int, external_links: str,
+                     encoded: dict):
+    basis = (title or "") + "|" + authors + "|" + abstract[:1000]
+    sha = sha256_bytes(basis.encode("utf-8"))
+    
+    existing = db.query(Project).filter_by(sha256=sha).one_or_none()
+    if existing:
+        return {
+            "status": "error",
+            "message": "Project already exists"
+        }
+    
+    capstone = Project(
+        sha256=sha, filename="default.docx", title=title, year=year, abstract=abstract,
+        external_links=external_links,
+        course="BSIT", host="CBSUA", doc_type="Capstone Project"
+    )
+    db.add(capstone); db.flush()
+    store_encoded(db, encoded)
+    
+    for a in authors.split(','):
+        a = a.strip()
+        db.add(Author(project_id=capstone.id, full_name=a))
         
-        db.commit()
-        db.refresh(capstone)
-        return capstone
+    for k in keywords.split(','):
+        k = k.strip()
+        db.add(ProjectKeyword(project_id=capstone.id, keyword=k))
+    
+    # index abstract as a section with chunks + embeddings
+    if abstract:
+        sec = Section(project_id=capstone.id, heading="ABSTRACT", content=abstract, order_no=1)
+        db.add(sec); db.flush()
+        parts = token_chunks(abstract)
+        if parts:
+            vecs = embed_texts_cached(db, parts)
+            chunk_ids = []
+            for j, (part, vec) in enumerate(zip(parts, vecs), start=1):
+                ch = Chunk(project_id=capstone.id, section_id=sec.id, content=part, ord_in_sec=j)
+                db.add(ch); db.flush()
+                db.add(Embedding(chunk_id=ch.id, vector=pack_vector(vec)))
+                chunk_ids.append(ch.id)
+            stage_add(db, chunk_ids, vecs)
+            search_backend().index_vectors(db, chunk_ids, vecs)
+
+    insert_fts_row(db, capstone.id, capstone.title or "", capstone.abstract or "", abstract or "")
+    bump_generation(db)
+    
+    db.commit()
+    db.refresh(capstone)
+    return capstone
@@ -1,9 +1,10 @@
 from fastapi import Depends, FastAPI, HTTPException
 
-from db import delete_fts_row, get_db
+from db import bump_generation, delete_fts_row, get_db
 from helpers.pdf import PdfHelper
 from helpers.session import require_role
 from models import Author, Chunk, Embedding, Project, ProjectKeyword, Section
+from rag.vector_store import stage_remove
 from sqlalchemy.orm import Session
 
 
@@ -16,6 +17,7 @@ def register_api_delete_capstone_route(app: FastAPI):
             raise HTTPException(status_code=404, detail="Capstone not found")
             
         delete_fts_row(db, capstone.id)
+        stage_remove(db, [cid for (cid,) in db.query(Chunk.id).filter_by(project_id=capstone.id)])
         db.query(Author).filter_by(project_id=capstone.id).delete()
         db.query(ProjectKeyword).filter_by(project_id=capstone.id).delete()
         db.query(Embedding).filter(Embedding.chunk_id.in_(
@@ -25,5 +27,6 @@ def register_api_delete_capstone_route(app: FastAPI):
         db.query(Section).filter_by(project_id=capstone.id).delete()
 
         db.delete(capstone)
+        bump_generation(db)
         db.commit()
         return {"message": "Capstone deleted successfully"}
@@ -2,11 +2,14 @@ from http.client import HTTPException
 from fastapi import FastAPI, File, Form, UploadFile
 from fastapi.params import Depends
 from sqlalchemy import text
-from db import get_db
+from db import bump_generation, get_db
+from helpers.executors import run_in
 from helpers.pdf import PdfHelper
 from helpers.session import require_role
 from dtos import CapstoneResponse
 from models import Author, Project, ProjectKeyword
+from rag.embedding_cache import store_encoded
+from rag.indexing import encode_abstract, reindex_project
 from sqlalchemy.orm import Session
 
 
@@ -24,38 +27,52 @@ def register_api_update_capstone_route(app: FastAPI):
         db: Session = Depends(get_db),
         claims=Depends(require_role(["Admin", "Staff"]))
     ):
-        capstone = db.query(Project).filter(Project.id == capstone_id).first()
-        if not capstone:
-            raise HTTPException(status_code=404, detail="Capstone not found")
+        # off the event loop: changed chunks are encoded on the embed executor, then only the
+        # write transaction takes a slot on the bounded DB executor
+        encoded = await run_in("embed", encode_abstract, abstract)
+        return await run_in("db", _update_capstone, db, capstone_id, title, abstract, authors, keywords, year, external_links, encoded)
 
-        capstone.title = title
-        capstone.abstract = abstract
-        capstone.year = year
-        capstone.external_links = external_links
-        
-        db.query(Author).filter_by(project_id=capstone.id).delete()
-        for author in authors.split(','):
-            author = author.strip()
-            db.add(Author(project_id=capstone.id, full_name=author))
-                
-        db.query(ProjectKeyword).filter_by(project_id=capstone.id).delete()
-        for keyword in keywords.split(','):
-            keyword = keyword.strip()
-            db.add(ProjectKeyword(project_id=capstone.id, keyword=keyword))
-        
-        db.commit()
-        db.refresh(capstone)
-        
-        authors = [r[0] for r in db.execute(text("SELECT full_name FROM authors WHERE project_id=:pid"), {"pid": capstone.id}).fetchall()]
-        keywords = [r[0] for r in db.execute(text("SELECT keyword FROM project_keywords WHERE project_id=:pid"), {"pid": capstone.id}).fetchall()]
-        
-        return {
-            "id": capstone.id, 
-            "title": title, 
-            "year": year, 
-            "abstract": abstract,
-            "external_links": external_links,
-            "authors": authors,
-            "keywords": keywords
-        }
+
+def _update_capstone(db: Session, capstone_id: int, title: str, abstract: str, authors: str, keywords: str, year: int, external_links: str,
+                     encoded: dict):
+    capstone = db.query(Project).filter(Project.id == capstone_id).first()
+    if not capstone:
+        raise HTTPException(status_code=404, detail="Capstone not found")
+
+    capstone.title = title
+    capstone.abstract = abstract
+    capstone.year = year
+    capstone.external_links = external_links
+    
+    db.query(Author).filter_by(project_id=capstone.id).delete()
+    for author in authors.split(','):
+        author = author.strip()
+        db.add(Author(project_id=capstone.id, full_name=author))
+            
+    # extracted keyphrases the editor kept stay marked as auto-generated
+    auto = {k for (k,) in db.query(ProjectKeyword.keyword).filter_by(project_id=capstone.id, auto_generated=True)}
+    db.query(ProjectKeyword).filter_by(project_id=capstone.id).delete()
+    for keyword in keywords.split(','):
+        keyword = keyword.strip()
+        db.add(ProjectKeyword(project_id=capstone.id, keyword=keyword, auto_generated=keyword in auto))
+    
+    # re-embeds only the abstract chunks that changed (encoded above) and refreshes the FTS row
+    store_encoded(db, encoded)
+    reindex_project(db, capstone)
+    bump_generation(db)
+    db.commit()
+    db.refresh(capstone)
+    
+    authors = [r[0] for r in db.execute(text("SELECT full_name FROM authors WHERE project_id=:pid"), {"pid": capstone.id}).fetchall()]
+    keywords = [r[0] for r in db.execute(text("SELECT keyword FROM project_keywords WHERE project_id=:pid"), {"pid": capstone.id}).fetchall()]
+    
+    return {
+        "id": capstone.id, 
+        "title": title, 
+        "year": year, 
+        "abstract": abstract,
+        "external_links": external_links,
+        "authors": authors,
+        "keywords": keywords
+    }
 
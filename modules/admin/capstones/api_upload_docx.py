@@ -1,37 +1,27 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, HTTPException, UploadFile
 from fastapi.params import Depends
 from db import get_db
-from helpers.docx_parser import parse_compilation_docx
-from rag.indexing import upsert_project_from_fields
+from rag.ingest_jobs import enqueue_docx, ingest_worker
 from sqlalchemy.orm import Session
-from http.client import HTTPException
+
+MIN_DOCX_BYTES = 500
 
 def register_api_upload_docx_route(app: FastAPI):
-    @app.post("/api/capstones/upload-docx")
-    async def upload_docx(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    # Parsing, embedding and indexing run in the ingest worker; poll
+    # GET /api/jobs/{job_id} for progress and the inserted/skipped entries.
+    @app.post("/api/capstones/upload-docx", status_code=202)
+    def upload_docx(file: UploadFile = File(...), db: Session = Depends(get_db)):
         if not file.filename.lower().endswith(".docx"):
             raise HTTPException(400, "Only .docx files are accepted.")
-        b = await file.read()
-        if len(b) < 500:
+        if file.size is not None and file.size < MIN_DOCX_BYTES:
             raise HTTPException(400, "DOCX too small or corrupt.")
 
-        entries = parse_compilation_docx(b)
-        if not entries:
-            raise HTTPException(400, "No capstone entries detected.")
-
-        created = []
-        for e in entries:
-            pid = upsert_project_from_fields(
-                db, file.filename, b,
-                title=e.get("title"),
-                researchers=e.get("researchers", []),
-                course=e.get("course"),
-                host=e.get("host"),
-                doc_type=e.get("doc_type"),
-                keywords=e.get("keywords", []),
-                abstract_text=e.get("abstract", ""),
-                year=e.get("year", None)
-            )
-            created.append(pid)
+        # streamed into the file store in chunks; the upload is never held in memory whole.
+        # file.size is not always known, so the bytes actually stored are checked as well
+        try:
+            job = enqueue_docx(db, file.filename, file.file, min_size=MIN_DOCX_BYTES)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
         db.commit()
-        return {"status": "ok", "inserted": created, "skipped": []}
\ No newline at end of file
+        ingest_worker().notify()
+        return {"status": "queued", "job_id": job.id}
@@ -0,0 +1,28 @@
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.params import Depends
+from db import get_db
+from helpers.session import require_role
+from models import Project
+from rag.ingest_jobs import enqueue_pdf, ingest_worker
+from sqlalchemy.orm import Session
+
+def register_api_upload_pdf_route(app: FastAPI):
+    # Indexes the full text (every section, not only the abstract) in the ingest
+    # worker; GET /api/jobs/{job_id} reports pages done out of total.
+    @app.post("/api/capstones/{capstone_id}/upload-pdf", status_code=202)
+    def upload_pdf(
+        capstone_id: int,
+        file: UploadFile = File(...),
+        db: Session = Depends(get_db),
+        claims=Depends(require_role(["Admin", "Staff"]))
+    ):
+        if not file.filename.lower().endswith(".pdf"):
+            raise HTTPException(400, "Only .pdf files are accepted.")
+        if db.get(Project, capstone_id) is None:
+            raise HTTPException(404, "Capstone not found")
+
+        # streamed into the file store in chunks; the upload is never held in memory whole
+        job = enqueue_pdf(db, capstone_id, file.filename, file.file)
+        db.commit()
+        ingest_worker().notify()
+        return {"status": "queued", "job_id": job.id}
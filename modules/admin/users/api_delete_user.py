@@ -2,7 +2,7 @@ from http.client import HTTPException
 from fastapi import FastAPI
 from fastapi.params import Depends
 
-from db import get_db
+from db import USERS, bump_generation, get_db
 from helpers.session import require_role
 from models import User
 from sqlalchemy.orm import Session
@@ -16,5 +16,6 @@ def register_api_delete_user_route(app: FastAPI):
         if not db_user:
             raise HTTPException(status_code=404, detail="User not found")
         db.delete(db_user)
+        bump_generation(db, USERS)
         db.commit()
         return {"message": f"User {db_user.email} deleted successfully"}
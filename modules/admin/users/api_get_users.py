@@ -1,7 +1,8 @@
 from typing import Optional
 from fastapi import Depends, FastAPI, Query
 
-from db import get_db
+from db import USERS, cached_count, get_read_db
+from helpers.cursor import decode_cursor, encode_cursor
 from helpers.session import require_role
 from sqlalchemy.orm import Session
 
@@ -10,18 +11,23 @@ from models import User
 def register_api_get_users_route(app: FastAPI):
     @app.get("/api/users")
     def list_users(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         page: int = Query(default=1, ge=1),
         per_page: int = Query(default=10, ge=1, le=50),
         search: Optional[str] = Query(default=None),
+        cursor: Optional[str] = Query(default=None),
         claims = Depends(require_role(["Admin"]))
     ):
         query = db.query(User)
         if search:
             keyword = f"%{search}%"
             query = query.filter(User.email.ilike(keyword) | User.role.ilike(keyword))
-        total = query.count()
-        users = query.offset((page - 1) * per_page).limit(per_page).all()
+        total = cached_count(db, ("users", search), query.count, name=USERS)
+        if cursor:
+            users = query.filter(User.id > decode_cursor(cursor, "id")["id"]).order_by(User.id).limit(per_page).all()
+        else:
+            users = query.order_by(User.id).offset((page - 1) * per_page).limit(per_page).all()
+        next_cursor = encode_cursor({"id": users[-1].id}) if len(users) == per_page else None
         results = [{"id": u.id, "email": u.email, "role": u.role} for u in users]
-        return {"total": total, "page": page, "per_page": per_page, "results": results}
+        return {"total": total, "page": page, "per_page": per_page, "results": results, "next_cursor": next_cursor}
 
@@ -2,7 +2,7 @@ from typing import Optional
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.params import Form
 from sqlalchemy.orm import Session
-from db import get_db
+from db import USERS, bump_generation, get_db
 from helpers.password import hash_password
 from helpers.session import require_role
 from dtos import UserResponse
@@ -35,6 +35,7 @@ def register_api_update_user_route(app: FastAPI):
         if role:
             db_user.role = role
 
+        bump_generation(db, USERS)
         db.commit()
         db.refresh(db_user)
         return db_user
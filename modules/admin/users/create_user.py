@@ -1,7 +1,7 @@
 from http.client import HTTPException
 from fastapi import Depends, FastAPI, Form
 
-from db import get_db
+from db import USERS, bump_generation, get_db
 from helpers.password import hash_password
 from helpers.session import require_role
 from dtos import UserResponse
@@ -24,6 +24,7 @@ def register_create_user_route(app: FastAPI):
         hashed_pw = hash_password(password)
         db_user = User(email=email, password=hashed_pw, role=role)
         db.add(db_user)
+        bump_generation(db, USERS)
         db.commit()
         db.refresh(db_user)
         return db_user
@@ -1,14 +1,14 @@
 from fastapi import FastAPI
 from fastapi.params import Depends
 from sqlalchemy.orm import Session
-from db import get_db
+from db import get_read_db
 from dtos import ProjectOut
 from sqlalchemy import text
 from http.client import HTTPException
 
 def register_api_get_capstone_route(app: FastAPI):
     @app.get("/api/capstones/{project_id}")
-    def get_project(project_id: int, db: Session = Depends(get_db)):
+    def get_project(project_id: int, db: Session = Depends(get_read_db)):
         p = db.execute(
             text("SELECT id, title, year, abstract, filename, sha256, course, host, doc_type, external_links FROM projects WHERE id=:pid"),
             {"pid": project_id}
@@ -2,51 +2,82 @@ from fastapi import FastAPI
 from fastapi.params import Depends, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from db import get_db
+from db import cached_count, get_read_db
 from dtos import PaginatedProjectOutput, ProjectOut
+from helpers.cursor import decode_cursor, encode_cursor
 from sqlalchemy import text
+from rag.search_backend import search_backend
+from repositories.project import ProjectRepository
 
 def register_api_get_capstones_route(app: FastAPI):
     @app.get("/api/capstones", response_model=PaginatedProjectOutput)
-    def list_projects(q: Optional[str] = Query(None), per_page: Optional[int] = 10, page: Optional[int] = 1, db: Session = Depends(get_db)):
+    def list_projects(
+        q: Optional[str] = Query(None),
+        per_page: Optional[int] = 10,
+        page: Optional[int] = 1,
+        cursor: Optional[str] = Query(None),
+        db: Session = Depends(get_read_db)
+    ):
+        # `cursor` (the next_cursor of the previous response) switches to keyset
+        # pagination: no OFFSET scan, so deep pages cost the same as the first.
         total = 0
         offset = per_page * (page-1)
-        
+        next_cursor = None
+
         if q:
-            sql = """
-                SELECT p.id, p.title, p.year, p.abstract, p.course, p.host, p.doc_type, p.external_links
-                FROM projects p JOIN projects_fts f ON f.project_id = p.id
-                WHERE projects_fts MATCH :q
+            fts = search_backend()
+            sql = f"""
+                SELECT p.id, p.title, p.year, p.abstract, p.course, p.host, p.doc_type, p.external_links,
+                       {fts.fts_score} AS score
+                FROM projects p {fts.fts_join}
+                WHERE {fts.fts_where}
                         """
+            params = {"q": q, "lim": per_page, "off": offset}
+            if cursor:
+                after = decode_cursor(cursor, "s", "id")
+                sql += f" AND ({fts.fts_score} > :s OR ({fts.fts_score} = :s AND p.id > :after_id))"
+                params.update({"s": after["s"], "after_id": after["id"], "off": 0})
             rows = db.execute(
-                text(f"""{sql} ORDER BY bm25(projects_fts) LIMIT :lim OFFSET :off"""),
-                {"q": q, "lim": per_page, "off": offset}
+                text(f"""{sql} ORDER BY score, p.id LIMIT :lim OFFSET :off"""),
+                params
             ).fetchall()
-            
-            total = db.execute(text(f"""SELECT COUNT(*) as total FROM ({sql}) x"""), {"q": q}).scalar_one()
+            if len(rows) == per_page:
+                next_cursor = encode_cursor({"s": rows[-1][-1], "id": rows[-1][0]})
+            rows = [r[:-1] for r in rows]
+
+            total = cached_count(db, ("projects", q), lambda: db.execute(text(f"""
+                SELECT COUNT(*) as total FROM projects p {fts.fts_join}
+                WHERE {fts.fts_where}"""), {"q": q}).scalar_one())
         else:
             sql = """
                 SELECT id, title, year, abstract, course, host, doc_type, external_links FROM projects
                 """
+            params = {"lim": per_page, "off": offset}
+            if cursor:
+                sql += " WHERE id < :after_id"
+                params.update({"after_id": decode_cursor(cursor, "id")["id"], "off": 0})
             rows = db.execute(
                 text(f"{sql} ORDER BY id DESC LIMIT :lim OFFSET :off"),
-                {"lim": per_page, "off": offset}
+                params
             ).fetchall()
-            
-            total = db.execute(text(f"""SELECT COUNT(*) as total FROM ({sql}) x"""), {"q": q}).scalar_one()
+            if len(rows) == per_page:
+                next_cursor = encode_cursor({"id": rows[-1][0]})
+
+            total = cached_count(db, ("projects", None), lambda: db.execute(
+                text("SELECT COUNT(*) as total FROM projects")).scalar_one())
 
         out = []
+        authors, keywords = ProjectRepository.get_authors_and_keywords(db, [r[0] for r in rows])
         for pid, title, year, abstract, course, host, doc_type, external_links in rows:
-            authors = [r[0] for r in db.execute(text("SELECT full_name FROM authors WHERE project_id=:pid"), {"pid": pid}).fetchall()]
-            keywords = [r[0] for r in db.execute(text("SELECT keyword FROM project_keywords WHERE project_id=:pid"), {"pid": pid}).fetchall()]
-            out.append(ProjectOut(id=pid, title=title, year=year, abstract=abstract, authors=authors,
-                                course=course, host=host, doc_type=doc_type, keywords=keywords, external_links=external_links))
+            out.append(ProjectOut(id=pid, title=title, year=year, abstract=abstract, authors=authors[pid],
+                                course=course, host=host, doc_type=doc_type, keywords=keywords[pid], external_links=external_links))
 
         print(f"q: {q} | per_page: {per_page} | offset: {offset} | page: {page}")
-        
+
         return {
             "total": total,
             "page": page,
             "per_page": per_page,
             "results": out,
-        }
\ No newline at end of file
+            "next_cursor": next_cursor,
+        }
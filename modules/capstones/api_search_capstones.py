@@ -1,24 +1,47 @@
+import json
 from typing import Dict
 from fastapi import Depends, FastAPI, Query
 from pydantic import BaseModel
-from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from db import get_db
+from config import CacheConfig
+from db import current_generation, get_read_db
+from helpers.embeddings import normalize_query
+from helpers.lru import LRUCache
 from rag.retrieval import hybrid_retrieve
+from repositories.project import ProjectRepository
+
+# Results are keyed by the corpus generation, so a write anywhere makes every
+# older entry unreachable; they are dropped as soon as a newer generation is seen.
+search_cache = LRUCache(
+    CacheConfig.SEARCH_CACHE_SIZE,
+    max_bytes=CacheConfig.SEARCH_CACHE_MAX_BYTES,
+    weigh=lambda payload: len(json.dumps(payload)),
+)
+_seen_generation = {"value": None}
 
 
 def register_api_search_capstones_routes(app: FastAPI):
     @app.get("/api/search")
-    def search(q: str = Query(...), k: int = 30, db: Session = Depends(get_db)):
+    def search(q: str = Query(...), k: int = 30, db: Session = Depends(get_read_db)):
+        generation = current_generation(db)
+        if _seen_generation["value"] != generation:
+            search_cache.clear()
+            _seen_generation["value"] = generation
+        key = (normalize_query(q), k, generation)
+        cached = search_cache.get(key)
+        if cached is not None:
+            return {"query": q, "results": cached}
+
         hits = hybrid_retrieve(db, q, k=k)
         grouped: Dict[int, Dict] = {}
         for h in hits:
             grouped.setdefault(h["project_id"], {"title": h["title"], "similarity": h["sim"], "year": h["year"], "snippets": []})
             grouped[h["project_id"]]["snippets"].append(h["content"])
-            authors = [r[0] for r in db.execute(text("SELECT full_name FROM authors WHERE project_id=:pid"), {"pid": h["project_id"]}).fetchall()]
-            keywords = [r[0] for r in db.execute(text("SELECT keyword FROM project_keywords WHERE project_id=:pid"), {"pid": h["project_id"]}).fetchall()]
-            grouped[h["project_id"]]["authors"] = authors
-            grouped[h["project_id"]]["keywords"] = keywords
+        authors, keywords = ProjectRepository.get_authors_and_keywords(db, grouped.keys())
+        for pid, meta in grouped.items():
+            meta["authors"] = authors[pid]
+            meta["keywords"] = keywords[pid]
         results = [{"project_id": pid, **meta} for pid, meta in grouped.items()]
+        search_cache.put(key, results)
         return {"query": q, "results": results}
@@ -0,0 +1,6 @@
+from fastapi import FastAPI
+
+from modules.jobs.api_get_job import register_api_get_job_route
+
+def configure_jobs_module(app: FastAPI):
+    register_api_get_job_route(app)
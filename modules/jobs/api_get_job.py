@@ -0,0 +1,15 @@
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy.orm import Session
+
+from db import get_read_db
+from helpers.session import require_role
+from models import IngestJob
+from rag.ingest_jobs import job_view
+
+def register_api_get_job_route(app: FastAPI):
+    @app.get("/api/jobs/{job_id}")
+    def get_job(job_id: int, db: Session = Depends(get_read_db), claims=Depends(require_role(["Admin", "Staff"]))):
+        job = db.get(IngestJob, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {"status": "ok", "data": job_view(job)}
@@ -0,0 +1,10 @@
+from fastapi import FastAPI
+
+from modules.system.api_cache_stats import register_api_cache_stats_route
+from modules.system.api_embedding_stats import register_api_embedding_stats_route
+from modules.system.api_ready import register_api_ready_route
+
+def configure_system_module(app: FastAPI):
+    register_api_cache_stats_route(app)
+    register_api_embedding_stats_route(app)
+    register_api_ready_route(app)
@@ -0,0 +1,18 @@
+from fastapi import Depends, FastAPI
+
+from db import count_cache
+from helpers.embeddings import query_cache
+from helpers.session import require_role
+from modules.capstones.api_search_capstones import search_cache
+
+def register_api_cache_stats_route(app: FastAPI):
+    @app.get("/api/system/cache")
+    def cache_stats(claims=Depends(require_role(["Admin"]))):
+        return {
+            "status": "ok",
+            "data": {
+                "query_embeddings": query_cache.stats(),
+                "search_results": search_cache.stats(),
+                "counts": count_cache.stats(),
+            }
+        }
@@ -0,0 +1,9 @@
+from fastapi import Depends, FastAPI
+
+from helpers.embeddings import embed_dispatcher
+from helpers.session import require_role
+
+def register_api_embedding_stats_route(app: FastAPI):
+    @app.get("/api/system/embeddings")
+    def embedding_stats(claims=Depends(require_role(["Admin"]))):
+        return {"status": "ok", "data": {"dispatcher": embed_dispatcher().stats()}}
@@ -0,0 +1,16 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from config import EmbeddingConfig
+from helpers.embeddings import models_ready
+from helpers.model_registry import status
+
+def register_api_ready_route(app: FastAPI):
+    # Unauthenticated so load balancers/orchestrators can probe it; 503 until
+    # the models the request path needs are loaded.
+    @app.get("/api/system/ready")
+    def ready():
+        data = {"models": status(), "embedding_server": EmbeddingConfig.EMBED_SERVER_SOCKET or None}
+        if models_ready():
+            return {"status": "ok", "data": data}
+        return JSONResponse(status_code=503, content={"status": "loading", "data": data})
@@ -0,0 +1,407 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from rag.vector_store import VectorStore, db_chunk_ids, fetch_vectors
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: only in-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# IVF (inverted file) ANN index
+# ------------------------------
+# Vectors are clustered with spherical k-means; each cluster ("list") is
+# stored as one contiguous slice of vectors.npy so a query only scores the
+# `nprobe` lists whose centroids are closest to it. The on-disk arrays are
+# opened memory-mapped and never written in place: inserts go to a small
+# in-memory delta that is scanned exactly, deletes become tombstones, and
+# `save()` folds both back into a fresh set of files. An index opened from
+# disk merges them itself once they reach ANN_MERGE_RATIO of the base (checked
+# every ANN_MERGE_INTERVAL seconds) and at shutdown, so online changes outlive
+# the process; other workers pick the merged files up on their next reconcile.
+
+FORMAT_VERSION = 1
+_ASSIGN_BATCH = 8192
+
+
+def _assign(vecs: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(vecs), dtype=np.int64)
+    for start in range(0, len(vecs), _ASSIGN_BATCH):
+        block = np.asarray(vecs[start:start + _ASSIGN_BATCH], dtype=np.float32)
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+def train_centroids(vecs: np.ndarray, nlist: int, iters: int = 12, sample: int = 256, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = len(vecs)
+    nlist = max(1, min(nlist, n))
+    train = vecs
+    if n > nlist * sample:
+        train = vecs[np.sort(rng.choice(n, nlist * sample, replace=False))]
+    train = np.asarray(train, dtype=np.float32)
+    centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = _assign(train, centroids)
+        counts = np.bincount(assign, minlength=nlist)
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        filled = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(train[order], starts[filled], axis=0)
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            # re-seed dead clusters from random training points
+            sums[empty] = train[rng.choice(len(train), len(empty), replace=False)]
+        centroids = _normalize(sums).astype(np.float32)
+    return centroids
+
+def default_nlist(n: int) -> int:
+    return max(1, int(4 * np.sqrt(n)))
+
+
+class IVFIndex:
+    persistent = False
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, ids: np.ndarray, vectors: np.ndarray, nprobe: int = 8,
+                 sorted_ids: Optional[np.ndarray] = None, path: Optional[Path] = None,
+                 merge_ratio: float = 0.1, merge_interval: float = 300):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.nprobe = nprobe
+        self.path = Path(path) if path is not None else None
+        self.merge_ratio = merge_ratio
+        self.merge_interval = merge_interval
+        self._lock = threading.RLock()
+        # base membership by binary search, so the memory-mapped ids are never loaded into a set
+        self._sorted_ids = np.sort(ids) if sorted_ids is None else sorted_ids
+        self._tombstones: Set[int] = set()
+        self._tombstone_array: Optional[np.ndarray] = None
+        # inserts since the build: one growable matrix, appended in place and scanned exactly
+        self._delta = VectorStore("float32")
+        # changes made while a merge writes its files, replayed onto the merged index
+        self._journal: Optional[list] = None
+        self._meta_stamp = self._stamp()
+        self._merger = None
+        self.loaded = False
+        self.generation = None
+
+    # ---- construction / persistence ----
+    @classmethod
+    def build(cls, ids: np.ndarray, vecs: np.ndarray, nlist: Optional[int] = None, nprobe: int = 8,
+              centroids: Optional[np.ndarray] = None, **train_kw) -> "IVFIndex":
+        ids = np.asarray(ids, dtype=np.int64)
+        vecs = np.asarray(vecs, dtype=np.float32)
+        if centroids is None:
+            centroids = train_centroids(vecs, nlist or default_nlist(len(vecs)), **train_kw)
+        assign = _assign(vecs, centroids) if len(vecs) else np.zeros(0, dtype=np.int64)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids, offsets, ids[order], vecs[order], nprobe=nprobe)
+
+    @classmethod
+    def open(cls, path: Path, nprobe: int = 8, **kw) -> "IVFIndex":
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported IVF index version: {meta.get('version')}")
+        sorted_ids = path / "sorted_ids.npy"
+        return cls(
+            np.load(path / "centroids.npy"),
+            np.load(path / "offsets.npy"),
+            np.load(path / "ids.npy", mmap_mode="r"),
+            np.load(path / "vectors.npy", mmap_mode="r"),
+            nprobe=nprobe,
+            # written since online merges; older indexes sort their ids once on open
+            sorted_ids=np.load(sorted_ids, mmap_mode="r") if sorted_ids.exists() else None,
+            path=path,
+            **kw,
+        )
+
+    def save(self, path: Path):
+        """Write base + delta - tombstones as a fresh index, keeping the centroids."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _file_lock(path):
+            self._write(path)
+
+    def _write(self, path: Path):
+        # base rows keep their lists and only delta rows are assigned; lists are
+        # copied one at a time into memory-mapped output, so memory stays bounded
+        with self._lock:
+            centroids, offsets, ids, vectors = self.centroids, self.offsets, self.ids, self.vectors
+            keep = self._base_keep()
+            delta_ids, delta_vecs = self._delta.snapshot()
+        nlist, dim = len(centroids), centroids.shape[1]
+        delta_assign = _assign(delta_vecs, centroids) if len(delta_ids) else np.zeros(0, dtype=np.int64)
+        order = np.argsort(delta_assign, kind="stable")
+        delta_ids, delta_vecs, delta_assign = delta_ids[order], delta_vecs[order], delta_assign[order]
+        delta_offsets = np.searchsorted(delta_assign, np.arange(nlist + 1))
+        kept_before = np.concatenate([[0], np.cumsum(keep)])
+        counts = kept_before[offsets[1:]] - kept_before[offsets[:-1]] + np.diff(delta_offsets)
+        new_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        total = int(new_offsets[-1])
+        out_vecs = np.lib.format.open_memmap(tmp / "vectors.npy", mode="w+", dtype=np.float32, shape=(total, dim))
+        out_ids = np.lib.format.open_memmap(tmp / "ids.npy", mode="w+", dtype=np.int64, shape=(total,))
+        for l in range(nlist):
+            pos = int(new_offsets[l])
+            start, end = int(offsets[l]), int(offsets[l + 1])
+            if end > start:
+                mask = keep[start:end]
+                n = int(mask.sum())
+                out_vecs[pos:pos + n] = np.asarray(vectors[start:end])[mask]
+                out_ids[pos:pos + n] = np.asarray(ids[start:end])[mask]
+                pos += n
+            d_start, d_end = int(delta_offsets[l]), int(delta_offsets[l + 1])
+            if d_end > d_start:
+                out_vecs[pos:pos + d_end - d_start] = delta_vecs[d_start:d_end]
+                out_ids[pos:pos + d_end - d_start] = delta_ids[d_start:d_end]
+        out_vecs.flush()
+        out_ids.flush()
+        np.save(tmp / "sorted_ids.npy", np.sort(out_ids))
+        del out_vecs, out_ids
+        np.save(tmp / "centroids.npy", centroids)
+        np.save(tmp / "offsets.npy", new_offsets)
+        (tmp / "meta.json").write_text(json.dumps({
+            "version": FORMAT_VERSION, "count": total, "nlist": int(nlist), "dim": int(dim),
+        }))
+        old = path.with_name(path.name + ".old")
+        shutil.rmtree(old, ignore_errors=True)
+        if path.exists():
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def needs_merge(self) -> bool:
+        with self._lock:
+            pending = len(self._delta) + len(self._tombstones)
+            return pending > 0 and pending >= self.merge_ratio * max(len(self.ids), 1)
+
+    def merge(self) -> bool:
+        """Fold the delta and tombstones into the files at `path` and serve from them."""
+        if self.path is None:
+            return False
+        with _file_lock(self.path):
+            with self._lock:
+                if self._journal is not None:
+                    return False
+                if self._stamp() != self._meta_stamp:
+                    # another worker merged first: build on its files, not the ones we opened
+                    self._adopt(IVFIndex.open(self.path, nprobe=self.nprobe))
+                if not (len(self._delta) or self._tombstones):
+                    return False
+                self._journal = []
+            try:
+                self._write(self.path)
+                merged = IVFIndex.open(self.path, nprobe=self.nprobe)
+            except BaseException:
+                with self._lock:
+                    self._journal = None
+                raise
+            with self._lock:
+                journal, self._journal = self._journal, None
+                self._swap_in(merged)
+                for op, chunk_ids, vecs in journal:
+                    if op == "add":
+                        self.add(chunk_ids, vecs)
+                    else:
+                        self.remove(chunk_ids)
+        return True
+
+    def close(self):
+        # at shutdown: keep this process's online changes for the next start
+        try:
+            self.merge()
+        except Exception:
+            logger.exception("IVF index merge at shutdown failed")
+
+    def _stamp(self):
+        if self.path is None:
+            return None
+        try:
+            st = (self.path / "meta.json").stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _swap_in(self, other: "IVFIndex"):
+        with self._lock:
+            self.centroids, self.offsets, self.ids, self.vectors = other.centroids, other.offsets, other.ids, other.vectors
+            self._sorted_ids = other._sorted_ids
+            self._tombstones, self._tombstone_array = set(), None
+            self._delta = VectorStore("float32")
+            self._meta_stamp = other._meta_stamp
+
+    def _adopt(self, other: "IVFIndex"):
+        # serve newer files while keeping this process's own unmerged changes
+        with self._lock:
+            delta_ids, delta_vecs = self._delta.snapshot()
+            tombstones = list(self._tombstones)
+            self._swap_in(other)
+            self.add(delta_ids, delta_vecs)
+            self.remove(tombstones)
+
+    def _in_base(self, chunk_ids: np.ndarray) -> np.ndarray:
+        if not len(self._sorted_ids) or not len(chunk_ids):
+            return np.zeros(len(chunk_ids), dtype=bool)
+        pos = np.minimum(np.searchsorted(self._sorted_ids, chunk_ids), len(self._sorted_ids) - 1)
+        return np.asarray(self._sorted_ids[pos]) == chunk_ids
+
+    def _tombstone(self, chunk_ids: np.ndarray):
+        fresh = set(chunk_ids.tolist()) - self._tombstones
+        if fresh:
+            self._tombstones |= fresh
+            self._tombstone_array = None
+
+    def _tombstoned(self) -> Optional[np.ndarray]:
+        if not self._tombstones:
+            return None
+        if self._tombstone_array is None:
+            self._tombstone_array = np.fromiter(self._tombstones, dtype=np.int64)
+        return self._tombstone_array
+
+    def _base_keep(self) -> np.ndarray:
+        tombstones = self._tombstoned()
+        if tombstones is None:
+            return np.ones(len(self.ids), dtype=bool)
+        return ~np.isin(self.ids, tombstones)
+
+    # ---- store interface (same as VectorStore) ----
+    def __len__(self) -> int:
+        return len(self.ids) - len(self._tombstones) + len(self._delta)
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.reconcile(db)
+                    self._start_merger()
+                    self.loaded = True
+
+    def reconcile(self, db: Session):
+        """Bring the index in line with the embeddings table (rows written after the last build)."""
+        with self._lock:
+            if self.path is not None and self._journal is None and self._stamp() != self._meta_stamp:
+                # another worker merged into new files: serve those, the diff below covers the rest
+                self._adopt(IVFIndex.open(self.path, nprobe=self.nprobe))
+        db_ids = db_chunk_ids(db)
+        with self._lock:
+            indexed = np.asarray(self.ids)[self._base_keep()]
+            indexed = np.union1d(indexed, self._delta.snapshot()[0])
+        self.remove(np.setdiff1d(indexed, db_ids).tolist())
+        for ids, vecs in fetch_vectors(db, np.setdiff1d(db_ids, indexed).tolist()):
+            self.add(ids, vecs)
+
+    def add(self, chunk_ids: Sequence[int], vecs: np.ndarray):
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        if not len(chunk_ids):
+            return
+        vecs = np.asarray(vecs, dtype=np.float32).reshape(len(chunk_ids), -1)
+        with self._lock:
+            # a re-embedded base row is hidden there and served from the delta
+            self._tombstone(chunk_ids[self._in_base(chunk_ids)])
+            self._delta.add(chunk_ids, vecs)
+            if self._journal is not None:
+                self._journal.append(("add", chunk_ids, vecs))
+
+    def remove(self, chunk_ids: Iterable[int]):
+        chunk_ids = np.fromiter((int(c) for c in chunk_ids), dtype=np.int64)
+        if not len(chunk_ids):
+            return
+        with self._lock:
+            self._delta.remove(chunk_ids.tolist())
+            self._tombstone(chunk_ids[self._in_base(chunk_ids)])
+            if self._journal is not None:
+                self._journal.append(("remove", chunk_ids, None))
+
+    def search(self, qvec: np.ndarray, k: int, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        if k <= 0:
+            return []
+        q = np.asarray(qvec, dtype=np.float32)
+        with self._lock:
+            centroids, offsets, base_ids, vectors = self.centroids, self.offsets, self.ids, self.vectors
+            tombstones = self._tombstoned()
+            # the delta's own top k is all it can contribute to the overall top k
+            delta_hits = self._delta.search(q, k)
+        nprobe = max(1, min(nprobe or self.nprobe, len(centroids)))
+        cscores = centroids @ q
+        probe = np.argpartition(-cscores, nprobe - 1)[:nprobe] if nprobe < len(cscores) else np.arange(len(cscores))
+
+        cand_ids, cand_scores = [], []
+        for l in probe:
+            start, end = int(offsets[l]), int(offsets[l + 1])
+            if end > start:
+                cand_ids.append(np.asarray(base_ids[start:end]))
+                cand_scores.append(vectors[start:end] @ q)
+        if cand_ids and tombstones is not None:
+            keep = [~np.isin(ids, tombstones) for ids in cand_ids]
+            cand_ids = [ids[m] for ids, m in zip(cand_ids, keep)]
+            cand_scores = [scores[m] for scores, m in zip(cand_scores, keep)]
+        if delta_hits:
+            cand_ids.append(np.asarray([cid for cid, _ in delta_hits], dtype=np.int64))
+            cand_scores.append(np.asarray([score for _, score in delta_hits], dtype=np.float32))
+        if not cand_ids:
+            return []
+        ids = np.concatenate(cand_ids)
+        scores = np.concatenate(cand_scores)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def _start_merger(self):
+        if self._merger is not None or self.path is None or self.merge_interval <= 0:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.merge_interval)
+                try:
+                    if self.needs_merge():
+                        self.merge()
+                except Exception:
+                    logger.exception("IVF index merge failed")
+
+        self._merger = threading.Thread(target=loop, name="ivf-index-merger", daemon=True)
+        self._merger.start()
+
+
+@contextmanager
+def _file_lock(path: Path):
+    # one merge at a time across the workers sharing the index directory
+    lock = path.with_name(path.name + ".lock")
+    with open(lock, "a+") as fh:
+        if fcntl:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh, fcntl.LOCK_UN)
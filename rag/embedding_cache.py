@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import EmbeddingConfig
+from helpers.embeddings import embed_texts, pack_vector, unpack_vector
+from helpers.executors import bounded
+from helpers.hash import sha256_bytes
+from models import EmbeddingCacheEntry
+
+# ------------------------------
+# Content-addressed embedding cache
+# ------------------------------
+# Chunk vectors are looked up by (model, sha256 of the chunk text) before
+# encoding, so re-importing a compilation or correcting one abstract only
+# encodes the chunks whose text actually changed. Entries are written in the
+# caller's transaction and always stored as float32 (VECTOR_FORMAT applies to
+# the embeddings table, not here).
+_LOOKUP_BATCH = 500
+
+def model_key() -> str:
+    backend = EmbeddingConfig.EMBEDDING_BACKEND
+    # backends agree closely but not bit-for-bit, so they don't share entries
+    return EmbeddingConfig.EMBEDDING_MODEL if backend == "torch" else f"{EmbeddingConfig.EMBEDDING_MODEL}:{backend}"
+
+def new_cache_stats() -> Dict[str, int]:
+    return {"hits": 0, "misses": 0}
+
+def cache_report(stats: Dict[str, int]) -> Dict:
+    total = stats["hits"] + stats["misses"]
+    return {**stats, "hit_rate": round(stats["hits"] / total, 4) if total else None}
+
+def embed_texts_cached(db: Session, texts: List[str], stats: Optional[Dict[str, int]] = None) -> np.ndarray:
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, EmbeddingConfig.EMBEDDING_DIM), dtype=np.float32)
+    keys = [sha256_bytes(t.encode("utf-8")) for t in texts]
+    found = _lookup(db, list(dict.fromkeys(keys)))
+
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    if missing:
+        first_text = {}
+        for key, t in zip(keys, texts):
+            first_text.setdefault(key, t)
+        with bounded("embed"):
+            vecs = embed_texts([first_text[key] for key in missing])
+        encoded = dict(zip(missing, vecs))
+        store_encoded(db, encoded)
+        found.update(encoded)
+
+    if stats is not None:
+        stats["misses"] += len(missing)
+        stats["hits"] += len(texts) - len(missing)
+    return np.vstack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+def encode_uncached(db: Session, texts: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Encode the texts the cache has no entry for, writing nothing: the result
+    (text sha256 -> vector) is passed to store_encoded in the write
+    transaction, where embed_texts_cached then finds every text. The caller
+    holds the "embed" limit (run_in("embed", ...)); db may be read-only.
+    """
+    texts = list(dict.fromkeys(texts))
+    keys = [sha256_bytes(t.encode("utf-8")) for t in texts]
+    found = _lookup(db, keys)
+    missing = [(key, t) for key, t in zip(keys, texts) if key not in found]
+    if not missing:
+        return {}
+    return dict(zip([key for key, _ in missing], embed_texts([t for _, t in missing])))
+
+def store_encoded(db: Session, encoded: Dict[str, np.ndarray]):
+    if encoded:
+        db.execute(
+            text("""INSERT INTO embedding_cache(model, text_sha256, vector) VALUES (:m, :k, :v)
+                    ON CONFLICT DO NOTHING"""),
+            [{"m": model_key(), "k": key, "v": pack_vector(vec, "float32")} for key, vec in encoded.items()]
+        )
+
+def _lookup(db: Session, keys: List[str]) -> Dict[str, np.ndarray]:
+    model = model_key()
+    found = {}
+    for i in range(0, len(keys), _LOOKUP_BATCH):
+        rows = db.query(EmbeddingCacheEntry.text_sha256, EmbeddingCacheEntry.vector).filter(
+            EmbeddingCacheEntry.model == model,
+            EmbeddingCacheEntry.text_sha256.in_(keys[i:i + _LOOKUP_BATCH]),
+        )
+        found.update((key, unpack_vector(blob)) for key, blob in rows)
+    return found
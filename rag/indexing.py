@@ -1,17 +1,28 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import insert, text, update
 
-from db import get_db_session, insert_fts_row, delete_fts_row
+from config import EmbeddingConfig
+from db import ReadSessionLocal, bump_generation, get_db_session
 from helpers.hash import sha256_bytes
-from helpers.text import sentence_chunks
-from helpers.embeddings import embed_texts, pack_vector
+from helpers.chunking import token_chunks_batch
+from helpers.embeddings import pack_vector
 from models import Project, Author, ProjectKeyword, Section, Chunk, Embedding
+from rag.embedding_cache import embed_texts_cached, encode_uncached
+from rag.keyphrases import add_keyphrases
+from rag.search_backend import search_backend
+from rag.vector_store import stage_add, stage_remove
+
+def entry_sha(title: Optional[str], researchers: List[str], abstract_text: str) -> str:
+    # deterministic ID for this entry within the docx
+    basis = (title or "") + "|" + ",".join(researchers) + "|" + (abstract_text or "")[:1000]
+    return sha256_bytes(basis.encode("utf-8"))
 
 def upsert_project_from_fields(
     db: Session,
     filename: str,
-    file_bytes: bytes,
+    source_sha256: Optional[str],
     *,
     title: Optional[str],
     researchers: List[str],
@@ -20,61 +31,194 @@ def upsert_project_from_fields(
     doc_type: Optional[str],
     keywords: List[str],
     abstract_text: str,
-    year: int
+    year: int,
+    cache_stats: Optional[Dict[str, int]] = None
 ) -> int:
-    # deterministic ID for this entry within the docx
-    basis = (title or "") + "|" + ",".join(researchers) + "|" + abstract_text[:1000]
-    sha = sha256_bytes(basis.encode("utf-8"))
-
-    # store original .docx (once)
-    from config import PathConfig
-    UPLOAD_DIR = PathConfig.UPLOAD_DIR
-    path = UPLOAD_DIR / f"{sha}.docx"
-    if not path.exists():
-        path.write_bytes(file_bytes)
-
-    proj = db.query(Project).filter_by(sha256=sha).one_or_none()
-    if proj:
-        delete_fts_row(db, proj.id)
-        db.query(Author).filter_by(project_id=proj.id).delete()
-        db.query(ProjectKeyword).filter_by(project_id=proj.id).delete()
-        db.query(Embedding).filter(Embedding.chunk_id.in_(
-            db.query(Chunk.id).filter_by(project_id=proj.id)
-        )).delete(synchronize_session=False)
-        db.query(Chunk).filter_by(project_id=proj.id).delete()
-        db.query(Section).filter_by(project_id=proj.id).delete()
-
-        proj.filename = filename
-        proj.title = title
-        proj.year = None
-        proj.abstract = abstract_text
-        proj.course = course
-        proj.host = host
-        proj.doc_type = doc_type
-        proj.year = year
-    else:
-        proj = Project(
-            sha256=sha, filename=filename, title=title, year=year, abstract=abstract_text,
-            course=course, host=host, doc_type=doc_type
+    entry = {
+        "title": title, "researchers": researchers, "course": course, "host": host,
+        "doc_type": doc_type, "keywords": keywords, "abstract": abstract_text, "year": year,
+    }
+    return upsert_entries(db, filename, source_sha256, [entry], cache_stats)[0]
+
+def upsert_entries(
+    db: Session,
+    filename: str,
+    source_sha256: Optional[str],
+    entries: List[Dict],
+    cache_stats: Optional[Dict[str, int]] = None,
+    chunk_stats: Optional[Dict[str, int]] = None
+) -> List[int]:
+    """
+    Index parsed compilation entries (see parse_compilation_docx) in the
+    caller's transaction and return their project ids in entry order.
+    The uploaded file itself is stored once by the caller (helpers/file_store);
+    entries only record its hash in source_sha256.
+    Every stage works on all entries at once: one lookup of existing
+    projects, bulk deletes/inserts with RETURNING for ids, and chunk
+    embedding in INGEST_EMBED_BATCH sized model calls. Re-imported entries
+    are diffed (sync_abstract_chunks) rather than rebuilt; the chunks and
+    model tokens their abstracts produce are added up in chunk_stats. Keyphrases from
+    the abstracts (rag/keyphrases) are stored as auto-generated keywords;
+    callers holding the whole compilation run add_keyphrases on it first.
+    """
+    shas = [entry_sha(e.get("title"), e.get("researchers", []), e.get("abstract", "")) for e in entries]
+    # an entry repeated within the file: the last copy wins (as when upserted one by one)
+    latest = {sha: i for i, sha in enumerate(shas)}
+    order = sorted(latest.values())
+
+    existing = dict(db.query(Project.sha256, Project.id).filter(Project.sha256.in_(list(latest))))
+    if existing:
+        ids = list(existing.values())
+        db.query(Author).filter(Author.project_id.in_(ids)).delete(synchronize_session=False)
+        db.query(ProjectKeyword).filter(ProjectKeyword.project_id.in_(ids)).delete(synchronize_session=False)
+
+    def fields(e: Dict) -> Dict:
+        return {
+            "filename": filename, "source_sha256": source_sha256, "title": e.get("title"), "year": e.get("year"),
+            "abstract": e.get("abstract", ""), "course": e.get("course"),
+            "host": e.get("host"), "doc_type": e.get("doc_type"),
+        }
+
+    updates = [{"id": existing[shas[i]], **fields(entries[i])} for i in order if shas[i] in existing]
+    if updates:
+        db.execute(update(Project), updates)
+    fresh = [i for i in order if shas[i] not in existing]
+    pids = dict(existing)
+    if fresh:
+        rows = db.execute(
+            insert(Project).returning(Project.sha256, Project.id),
+            [{"sha256": shas[i], **fields(entries[i])} for i in fresh]
         )
-        db.add(proj); db.flush()
-
-    for a in researchers:
-        db.add(Author(project_id=proj.id, full_name=a))
-    for k in keywords:
-        db.add(ProjectKeyword(project_id=proj.id, keyword=k))
-
-    # index abstract as a section with chunks + embeddings
-    if abstract_text:
-        sec = Section(project_id=proj.id, heading="ABSTRACT", content=abstract_text, order_no=1)
-        db.add(sec); db.flush()
-        parts = sentence_chunks(abstract_text)
-        if parts:
-            vecs = embed_texts(parts)
-            for j, (part, vec) in enumerate(zip(parts, vecs), start=1):
-                ch = Chunk(project_id=proj.id, section_id=sec.id, content=part, ord_in_sec=j)
-                db.add(ch); db.flush()
-                db.add(Embedding(chunk_id=ch.id, vector=pack_vector(vec)))
-
-    insert_fts_row(db, proj.id, proj.title or "", proj.abstract or "", abstract_text or "")
-    return proj.id
+        pids.update((sha, pid) for sha, pid in rows)
+
+    authors = [{"project_id": pids[shas[i]], "full_name": a} for i in order for a in entries[i].get("researchers", [])]
+    add_keyphrases([entries[i] for i in order])
+    keywords = [{"project_id": pids[shas[i]], "keyword": k, "auto_generated": False}
+                for i in order for k in entries[i].get("keywords", [])]
+    keywords += [{"project_id": pids[shas[i]], "keyword": k, "auto_generated": True}
+                 for i in order for k in entries[i].get("auto_keywords", [])]
+    if authors:
+        db.execute(insert(Author), authors)
+    if keywords:
+        db.execute(insert(ProjectKeyword), keywords)
+
+    # projects seen before keep the chunks (ids, embeddings) their abstract still has
+    stats = sync_abstract_chunks(db, {pids[shas[i]]: entries[i].get("abstract") for i in order}, cache_stats)
+    if chunk_stats is not None:
+        for key in ("chunks", "tokens"):
+            chunk_stats[key] = chunk_stats.get(key, 0) + stats[key]
+    search_backend().upsert_fts_rows(db, [
+        (pids[shas[i]], entries[i].get("title") or "", entries[i].get("abstract") or "", entries[i].get("abstract") or "")
+        for i in order
+    ])
+    bump_generation(db)
+    return [pids[sha] for sha in shas]
+
+def reindex_project(db: Session, project: Project, cache_stats: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Bring the search data of an edited project (abstract chunks, embeddings,
+    FTS row) in line with its current title and abstract, in the caller's
+    transaction. Only chunks whose text changed are embedded again.
+    """
+    stats = sync_abstract_chunks(db, {project.id: project.abstract}, cache_stats)
+    search_backend().upsert_fts_rows(db, [(project.id, project.title or "", project.abstract or "", project.abstract or "")])
+    return stats
+
+def encode_abstract(abstract: Optional[str]) -> Dict[str, np.ndarray]:
+    """
+    Chunk an abstract and encode the chunks the embedding cache lacks, on a
+    read-only session. Endpoints run this on the "embed" executor and pass the
+    result to store_encoded in their write transaction, so the db worker only
+    writes (its embed_texts_cached calls then hit the cache).
+    """
+    if not abstract:
+        return {}
+    db = ReadSessionLocal()
+    try:
+        return encode_uncached(db, [part for part, _ in token_chunks_batch([abstract])[0]])
+    finally:
+        db.close()
+
+def sync_abstract_chunks(
+    db: Session,
+    abstracts: Dict[int, Optional[str]],
+    cache_stats: Optional[Dict[str, int]] = None
+) -> Dict[str, int]:
+    """
+    Diff the token-budget chunks (helpers/chunking) of each project's abstract
+    against the chunks stored in its ABSTRACT section. A chunk whose text is
+    still present keeps its id and embedding (only ord_in_sec moves); new or
+    edited text becomes a new chunk (ids are never reused, see Chunk), and
+    chunks no longer present are deleted. Returns counts of kept, added and
+    removed chunks, plus the chunks and model tokens the abstracts now have.
+    """
+    pids = list(abstracts)
+    sections: Dict[int, Tuple[int, str]] = {}
+    for sid, pid, content in db.query(Section.id, Section.project_id, Section.content).filter(
+        # PDF sections (source_sha256 set) may also be headed ABSTRACT; they belong to rag/pdf_ingest
+        Section.project_id.in_(pids), Section.heading == "ABSTRACT", Section.source_sha256.is_(None)
+    ).order_by(Section.id):
+        sections.setdefault(pid, (sid, content))
+    stored: Dict[int, Dict[str, List[Tuple[int, Optional[int]]]]] = {pid: {} for pid in pids}
+    if sections:
+        for cid, pid, content, ord_ in db.query(Chunk.id, Chunk.project_id, Chunk.content, Chunk.ord_in_sec).filter(
+            Chunk.section_id.in_([sid for sid, _ in sections.values()])
+        ).order_by(Chunk.ord_in_sec, Chunk.id):
+            stored[pid].setdefault(content, []).append((cid, ord_))
+
+    new_sections, section_updates, drop_sections = [], [], []
+    for pid, abstract in abstracts.items():
+        if not abstract:
+            if pid in sections:
+                drop_sections.append(sections[pid][0])
+        elif pid not in sections:
+            new_sections.append({"project_id": pid, "heading": "ABSTRACT", "content": abstract, "order_no": 1})
+        elif sections[pid][1] != abstract:
+            section_updates.append({"id": sections[pid][0], "content": abstract})
+    if section_updates:
+        db.execute(update(Section), section_updates)
+    section_ids = {pid: sid for pid, (sid, _) in sections.items()}
+    if new_sections:
+        # RETURNING rows are matched on natural keys, not position, so inserts stay batched
+        section_ids.update(db.execute(insert(Section).returning(Section.project_id, Section.id), new_sections).all())
+
+    chunked = token_chunks_batch(abstracts.values())
+    kept, moved, added, removed = 0, [], [], []
+    for (pid, abstract), parts in zip(abstracts.items(), chunked):
+        unused = stored[pid]
+        for j, (part, _) in enumerate(parts, start=1):
+            same = unused.get(part)
+            if same:
+                cid, ord_ = same.pop(0)
+                kept += 1
+                if ord_ != j:
+                    moved.append({"id": cid, "ord_in_sec": j})
+            else:
+                added.append({"project_id": pid, "section_id": section_ids[pid], "content": part, "ord_in_sec": j})
+        removed += [cid for ids in unused.values() for cid, _ in ids]
+
+    if removed:
+        stage_remove(db, removed)
+        db.query(Embedding).filter(Embedding.chunk_id.in_(removed)).delete(synchronize_session=False)
+        db.query(Chunk).filter(Chunk.id.in_(removed)).delete(synchronize_session=False)
+    if drop_sections:
+        db.query(Section).filter(Section.id.in_(drop_sections)).delete(synchronize_session=False)
+    if moved:
+        db.execute(update(Chunk), moved)
+    batch = EmbeddingConfig.INGEST_EMBED_BATCH
+    for start in range(0, len(added), batch):
+        insert_chunks(db, added[start:start + batch], cache_stats)
+    return {"kept": kept, "added": len(added), "removed": len(removed),
+            "chunks": sum(len(parts) for parts in chunked), "tokens": sum(n for parts in chunked for _, n in parts)}
+
+def insert_chunks(db: Session, chunks: List[Dict], cache_stats: Optional[Dict[str, int]]):
+    vecs = embed_texts_cached(db, [c["content"] for c in chunks], cache_stats)
+    ids = {(sec, ord_): cid for sec, ord_, cid in db.execute(
+        insert(Chunk).returning(Chunk.section_id, Chunk.ord_in_sec, Chunk.id), chunks
+    )}
+    chunk_ids = [ids[(c["section_id"], c["ord_in_sec"])] for c in chunks]
+    db.execute(insert(Embedding), [
+        {"chunk_id": cid, "vector": pack_vector(vec)} for cid, vec in zip(chunk_ids, vecs)
+    ])
+    stage_add(db, chunk_ids, vecs)
+    search_backend().index_vectors(db, chunk_ids, vecs)
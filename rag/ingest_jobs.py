@@ -0,0 +1,282 @@
+import json
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from config import JobConfig
+from db import SessionLocal
+from helpers.docx_parser import parse_compilation_docx
+from helpers.executors import call
+from helpers.file_store import store_file, store_stream
+from models import IngestJob
+from rag.embedding_cache import cache_report, new_cache_stats
+from rag.indexing import upsert_entries
+from rag.keyphrases import add_keyphrases
+from rag.pdf_ingest import index_pdf
+
+# ------------------------------
+# Persistent ingestion job queue
+# ------------------------------
+# Uploads are written once to helpers/file_store, where the job reads them and
+# the resulting projects keep referencing them, and recorded as an ingest_jobs
+# row; worker threads claim jobs and index JOB_BATCH_SIZE entries per
+# transaction, committing per-entry progress together with the data. A job
+# whose worker died (restart, crash) stops heartbeating and is claimed again
+# after JOB_LEASE_SECONDS, resuming at the first entry not yet committed. The
+# heartbeat comes from a thread that lives as long as the job, so a long stage
+# (parsing, keyphrases, one large PDF section) does not let the lease expire.
+# Jobs of kind "pdf" index the full text of one capstone (rag/pdf_ingest).
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _enqueue(db: Session, kind: str, filename: str, stream: BinaryIO, project_id: Optional[int] = None,
+             min_size: int = 0) -> IngestJob:
+    sha, path, size = store_stream(stream, f".{kind}")
+    if size < min_size:
+        # nothing references the stored file; scripts.gc_uploads removes it
+        raise ValueError(f"{kind.upper()} too small or corrupt.")
+    job = IngestJob(kind=kind, status="queued", filename=filename, spool_path=str(path), source_sha256=sha,
+                    project_id=project_id, total=0, done=0, failed=0, attempts=0, created_at=_now())
+    db.add(job)
+    db.flush()
+    return job
+
+def enqueue_docx(db: Session, filename: str, stream: BinaryIO, min_size: int = 0) -> IngestJob:
+    return _enqueue(db, "docx", filename, stream, min_size=min_size)
+
+def enqueue_pdf(db: Session, project_id: int, filename: str, stream: BinaryIO) -> IngestJob:
+    """Queue the full text of a capstone's PDF for indexing (rag/pdf_ingest)."""
+    return _enqueue(db, "pdf", filename, stream, project_id)
+
+def job_view(job: IngestJob) -> Dict:
+    end = job.finished_at or (_now() if job.started_at else None)
+    elapsed = (end.replace(tzinfo=None) - job.started_at.replace(tzinfo=None)).total_seconds() if job.started_at else None
+    return {
+        "id": job.id, "kind": job.kind, "status": job.status, "filename": job.filename, "project_id": job.project_id,
+        "total": job.total, "done": job.done, "failed": job.failed, "attempts": job.attempts,
+        "entries": json.loads(job.progress) if job.progress else [],
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at, "started_at": job.started_at, "finished_at": job.finished_at,
+        "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+    }
+
+def claim_next_job(db: Session) -> Optional[int]:
+    now = _now()
+    stale = now - timedelta(seconds=JobConfig.JOB_LEASE_SECONDS)
+    claimable = or_(IngestJob.status == "queued",
+                    and_(IngestJob.status == "running", IngestJob.heartbeat_at < stale))
+    next_id = select(IngestJob.id).where(claimable).order_by(IngestJob.id).limit(1).scalar_subquery()
+    # the claimable re-check makes the claim atomic when several workers race
+    job_id = db.execute(
+        update(IngestJob).where(IngestJob.id == next_id, claimable)
+        .values(status="running", heartbeat_at=now, attempts=IngestJob.attempts + 1,
+                started_at=func.coalesce(IngestJob.started_at, now))
+        .returning(IngestJob.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.commit()
+    return job_id
+
+def _touch(db: Session, job_id: int):
+    db.execute(update(IngestJob).where(IngestJob.id == job_id, IngestJob.status == "running")
+               .values(heartbeat_at=_now()).execution_options(synchronize_session=False))
+    db.commit()
+
+@contextmanager
+def _heartbeat(job_id: int):
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(JobConfig.JOB_LEASE_SECONDS / 4):
+            db = SessionLocal()
+            try:
+                call("db", _touch, db, job_id)
+            except Exception:
+                # a missed beat is retried on the next tick; the lease allows several
+                traceback.print_exc()
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"ingest-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def process_job(job_id: int):
+    with _heartbeat(job_id):
+        _process_job(job_id)
+
+def _process_job(job_id: int):
+    db = SessionLocal()
+    try:
+        job = db.get(IngestJob, job_id)
+        if job.attempts > JobConfig.JOB_MAX_ATTEMPTS:
+            return _finish(db, job, "failed", error=f"gave up after {job.attempts - 1} attempts")
+        if job.kind == "pdf":
+            return _process_pdf(db, job)
+        try:
+            if job.source_sha256 is None:
+                # queued before uploads went to the file store: move the spooled copy there
+                sha, path = store_file(Path(job.spool_path))
+                os.unlink(job.spool_path)
+                job.source_sha256, job.spool_path = sha, str(path)
+                db.commit()
+            t0 = time.perf_counter()
+            entries = call("parse", parse_compilation_docx, job.spool_path)
+            parse_ms = round((time.perf_counter() - t0) * 1000, 1)
+        except Exception as e:
+            return _finish(db, job, "failed", error=f"{type(e).__name__}: {e}")
+        if not entries:
+            return _finish(db, job, "failed", error="No capstone entries detected.")
+
+        progress = json.loads(job.progress) if job.progress else [
+            {"index": i, "title": e.get("title"), "status": "pending", "project_id": None, "error": None, "ms": None}
+            for i, e in enumerate(entries)
+        ]
+        pending = [p["index"] for p in progress if p["status"] == "pending"]
+        # one nlp.pipe pass over everything left to index instead of one per batch
+        t0 = time.perf_counter()
+        add_keyphrases([entries[i] for i in pending])
+        keyphrase_ms = round((time.perf_counter() - t0) * 1000, 1)
+        result = json.loads(job.result) if job.result else {
+            "parse_ms": parse_ms, "keyphrase_ms": keyphrase_ms, "cache": new_cache_stats(),
+            "chunks": {"chunks": 0, "tokens": 0}}
+        job.total = len(entries)
+
+        for start in range(0, len(pending), JobConfig.JOB_BATCH_SIZE):
+            batch = pending[start:start + JobConfig.JOB_BATCH_SIZE]
+            # each batch is one write transaction, under the shared DB write limit
+            if not call("db", _run_batch, db, job, entries, batch, progress, result):
+                # one bad entry must not sink the batch: retry them one by one
+                for i in batch:
+                    call("db", _run_batch, db, job, entries, [i], progress, result)
+            job = db.get(IngestJob, job_id)
+
+        inserted = [p["project_id"] for p in progress if p["status"] == "done"]
+        skipped = [{"title": p["title"], "reason": p["error"]} for p in progress if p["status"] == "failed"]
+        result.update(inserted=inserted, skipped=skipped, embedding_cache=cache_report(result["cache"]))
+        job.result = json.dumps(result)
+        _finish(db, job, "done")
+    finally:
+        db.close()
+
+def _process_pdf(db: Session, job: IngestJob):
+    # total/done count pages; a restarted job indexes the PDF again from the first page
+    cache = new_cache_stats()
+
+    def on_progress(stats: Dict):
+        current = db.get(IngestJob, job.id)
+        current.total, current.done = stats["pages"], stats["pages_done"]
+        current.result = json.dumps(stats)
+        current.heartbeat_at = _now()
+
+    t0 = time.perf_counter()
+    try:
+        stats = index_pdf(db, job.project_id, job.spool_path, job.source_sha256, cache, on_progress)
+    except Exception as e:
+        db.rollback()
+        return _finish(db, db.get(IngestJob, job.id), "failed", error=f"{type(e).__name__}: {e}")
+    job = db.get(IngestJob, job.id)
+    job.total = job.done = stats["pages"]
+    stats.update(seconds=round(time.perf_counter() - t0, 3), embedding_cache=cache_report(cache))
+    job.result = json.dumps(stats)
+    _finish(db, job, "done")
+
+def _run_batch(db: Session, job: IngestJob, entries: List[Dict], batch: List[int], progress, result) -> bool:
+    t0 = time.perf_counter()
+    cache = dict(result["cache"])
+    chunks = dict(result.get("chunks", {}))
+    try:
+        pids = upsert_entries(db, job.filename, job.source_sha256, [entries[i] for i in batch], cache, chunks)
+    except Exception as e:
+        db.rollback()
+        if len(batch) > 1:
+            return False
+        progress[batch[0]].update(status="failed", error=f"{type(e).__name__}: {e}")
+        pids = None
+    else:
+        ms = round((time.perf_counter() - t0) * 1000 / len(batch), 1)
+        for i, pid in zip(batch, pids):
+            progress[i].update(status="done", project_id=pid, ms=ms)
+        result["cache"], result["chunks"] = cache, chunks
+    # progress is committed with the entries it describes
+    job = db.get(IngestJob, job.id)
+    job.progress = json.dumps(progress)
+    job.result = json.dumps(result)
+    job.done = sum(p["status"] == "done" for p in progress)
+    job.failed = sum(p["status"] == "failed" for p in progress)
+    job.heartbeat_at = _now()
+    db.commit()
+    return True
+
+def _finish(db: Session, job: IngestJob, status: str, error: Optional[str] = None):
+    job.status = status
+    job.error = error
+    job.finished_at = _now()
+    db.commit()
+
+
+class IngestWorker:
+    def __init__(self, threads: int, poll_seconds: float):
+        self.threads = threads
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    def start(self):
+        for n in range(self.threads - len(self._workers)):
+            t = threading.Thread(target=self._run, name=f"ingest-worker-{n}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job_id = claim_next_job(db)
+            except Exception:
+                job_id = None
+            finally:
+                db.close()
+            if job_id is not None:
+                try:
+                    process_job(job_id)
+                except Exception:
+                    # left "running": the lease expires and the job is retried
+                    traceback.print_exc()
+                continue
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def ingest_worker() -> IngestWorker:
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = IngestWorker(JobConfig.JOB_WORKER_THREADS, JobConfig.JOB_POLL_SECONDS)
+    return _worker
@@ -0,0 +1,98 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from config import KeyphraseConfig
+from helpers.embeddings import SPACY_MODEL, nlp
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# Keyphrase extraction from abstracts (ingest stage)
+# ------------------------------
+# Noun chunks from spaCy's parser, normalised to their content words and
+# grouped by lemma, ranked by frequency with longer phrases weighted up.
+# A whole compilation goes through one nlp.pipe call, so batching (and,
+# with KEYPHRASE_N_PROCESS > 1, the worker processes) spans every entry.
+
+MAX_PHRASE_TOKENS = 4
+_EDGE_POS = {"DET", "PRON", "ADP", "CCONJ", "SCONJ", "PART", "PUNCT", "NUM", "SYM", "AUX", "SPACE"}
+_HEAD_POS = {"NOUN", "PROPN"}
+# single words every capstone abstract uses about itself
+_GENERIC = {
+    "study", "system", "project", "paper", "research", "researcher", "proponent", "result", "purpose",
+    "objective", "respondent", "user", "data", "development", "use", "way", "time", "part", "capstone",
+}
+
+_unavailable: Optional[str] = None
+
+def _model():
+    # a missing spaCy model must not fail the import it only enriches; remember and skip
+    global _unavailable
+    if _unavailable is None:
+        try:
+            return nlp()
+        except Exception as e:
+            _unavailable = f"{type(e).__name__}: {e}"
+            hint = f" (install it with: python -m spacy download {SPACY_MODEL})" if isinstance(e, OSError) else ""
+            logger.warning("keyphrase extraction disabled: %s%s", _unavailable, hint)
+    return None
+
+def enabled() -> bool:
+    return KeyphraseConfig.KEYPHRASES != "off" and _unavailable is None
+
+def doc_keyphrases(doc, top_k: int) -> List[str]:
+    scores: Counter = Counter()
+    surface: Dict[str, str] = {}
+    for chunk in doc.noun_chunks:
+        tokens = list(chunk)
+        # trim determiners, pronouns, numbers and stop words off both ends ("the proposed system" -> "proposed system")
+        while tokens and (tokens[0].pos_ in _EDGE_POS or tokens[0].is_stop or not tokens[0].is_alpha):
+            tokens.pop(0)
+        while tokens and (tokens[-1].pos_ in _EDGE_POS or tokens[-1].is_stop or not tokens[-1].is_alpha):
+            tokens.pop()
+        if not tokens or len(tokens) > MAX_PHRASE_TOKENS or tokens[-1].pos_ not in _HEAD_POS:
+            continue
+        key = " ".join(t.lemma_.lower() for t in tokens)
+        if len(key) < 3 or (len(tokens) == 1 and key in _GENERIC):
+            continue
+        scores[key] += 1 + 0.5 * (len(tokens) - 1)
+        surface.setdefault(key, " ".join(t.text.lower() for t in tokens))
+    # Counter.most_common keeps first-seen order among equal scores
+    return [surface[key] for key, _ in scores.most_common(top_k)]
+
+def extract_keyphrases(
+    texts: Iterable[str],
+    top_k: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    n_process: Optional[int] = None,
+) -> Optional[List[List[str]]]:
+    """Keyphrases for each text, in order; None when spaCy cannot be loaded."""
+    model = _model()
+    if model is None:
+        return None
+    top_k = top_k or KeyphraseConfig.KEYPHRASE_TOP_K
+    docs = model.pipe(
+        (t or "" for t in texts),
+        batch_size=batch_size or KeyphraseConfig.KEYPHRASE_BATCH_SIZE,
+        n_process=n_process or KeyphraseConfig.KEYPHRASE_N_PROCESS,
+    )
+    return [doc_keyphrases(doc, top_k) for doc in docs]
+
+def add_keyphrases(entries: List[Dict]) -> List[Dict]:
+    """
+    Set entry["auto_keywords"] on parsed compilation entries from their
+    abstracts, leaving out phrases the entry already lists as keywords.
+    Entries that already have the key are not processed again; with
+    KEYPHRASES=off (or no spaCy model) entries are returned unchanged.
+    """
+    todo = [e for e in entries if "auto_keywords" not in e]
+    if not todo or not enabled():
+        return entries
+    phrases = extract_keyphrases([e.get("abstract") for e in todo])
+    if phrases is None:
+        return entries
+    for e, found in zip(todo, phrases):
+        listed = {k.strip().lower() for k in e.get("keywords", [])}
+        e["auto_keywords"] = [p for p in found if p not in listed]
+    return entries
@@ -0,0 +1,166 @@
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from config import EmbeddingConfig, PdfConfig
+from db import bump_generation
+from helpers.chunking import token_chunks_batch
+from helpers.executors import call, limit, submit
+from helpers.pdf_parser import PdfLine, extract_pdf_lines, iter_pdf_sections, pdf_page_count
+from models import Chunk, Embedding, Project, Section
+from rag.indexing import insert_chunks
+from rag.vector_store import stage_remove
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# Full-text PDF ingestion
+# ------------------------------
+# Pages are extracted PDF_PAGES_PER_TASK at a time on the parse workers, at
+# most two tasks per worker ahead of the consumer, and grouped into sections
+# under detected headings as they arrive. Sections are chunked to the token
+# budget and written (sections, chunks, embeddings) once INGEST_EMBED_BATCH
+# chunks are pending, one transaction each. Memory therefore depends on
+# those settings, not on the number of pages. The previous PDF's sections
+# are dropped in a last transaction, so search keeps them until then; a run
+# that fails part way drops the new file's sections instead.
+
+def iter_pdf_lines(path: str) -> Iterator[PdfLine]:
+    total = pdf_page_count(path)
+    step = PdfConfig.PDF_PAGES_PER_TASK
+    starts = iter(range(0, total, step))
+    in_flight = deque()
+    try:
+        for start in starts:
+            in_flight.append(submit("parse", extract_pdf_lines, path, start, start + step))
+            if len(in_flight) >= max(limit("parse"), 1) * 2:
+                break
+        while in_flight:
+            lines = in_flight.popleft().result()
+            start = next(starts, None)
+            if start is not None:
+                in_flight.append(submit("parse", extract_pdf_lines, path, start, start + step))
+            yield from lines
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+def _delete_sections(db: Session, section_ids: List[int]):
+    if not section_ids:
+        return
+    chunk_ids = [cid for (cid,) in db.query(Chunk.id).filter(Chunk.section_id.in_(section_ids))]
+    if chunk_ids:
+        stage_remove(db, chunk_ids)
+        db.query(Embedding).filter(Embedding.chunk_id.in_(chunk_ids)).delete(synchronize_session=False)
+        db.query(Chunk).filter(Chunk.id.in_(chunk_ids)).delete(synchronize_session=False)
+    db.query(Section).filter(Section.id.in_(section_ids)).delete(synchronize_session=False)
+
+def _pdf_section_ids(db: Session, project_id: int, sha: str, same: bool) -> List[int]:
+    q = db.query(Section.id).filter(Section.project_id == project_id, Section.source_sha256.isnot(None))
+    q = q.filter(Section.source_sha256 == sha) if same else q.filter(Section.source_sha256 != sha)
+    return [sid for (sid,) in q]
+
+def _begin(db: Session, project_id: int, sha: str) -> bool:
+    project = db.get(Project, project_id)
+    if project is None:
+        raise ValueError(f"Capstone {project_id} not found")
+    # sections left by an interrupted run of this same file are rebuilt from the start
+    _delete_sections(db, _pdf_section_ids(db, project_id, sha, same=True))
+    bump_generation(db)
+    db.commit()
+    return bool(project.abstract)
+
+def _write(db: Session, project_id: int, sha: str, sections: List[Tuple[Dict, List[Tuple[str, int]]]],
+           cache_stats: Optional[Dict[str, int]], on_commit: Optional[Callable[[], None]]):
+    ids = dict(db.execute(insert(Section).returning(Section.order_no, Section.id), [
+        {"project_id": project_id, "heading": s["heading"], "content": s["content"],
+         "order_no": s["order_no"], "source_sha256": sha} for s, _ in sections
+    ]).all())
+    chunks = [{"project_id": project_id, "section_id": ids[s["order_no"]], "content": part, "ord_in_sec": j}
+              for s, parts in sections for j, (part, _) in enumerate(parts, start=1)]
+    batch = EmbeddingConfig.INGEST_EMBED_BATCH
+    for start in range(0, len(chunks), batch):
+        insert_chunks(db, chunks[start:start + batch], cache_stats)
+    bump_generation(db)
+    if on_commit:
+        on_commit()
+    db.commit()
+
+def _abort(db: Session, project_id: int, sha: str):
+    # the previous PDF (if any) stays the indexed one
+    db.rollback()
+    _delete_sections(db, _pdf_section_ids(db, project_id, sha, same=True))
+    bump_generation(db)
+    db.commit()
+
+def _finish(db: Session, project_id: int, sha: str):
+    _delete_sections(db, _pdf_section_ids(db, project_id, sha, same=False))
+    db.get(Project, project_id).pdf_sha256 = sha
+    bump_generation(db)
+    db.commit()
+
+def index_pdf(
+    db: Session,
+    project_id: int,
+    path: str,
+    sha: str,
+    cache_stats: Optional[Dict[str, int]] = None,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Index the full text of the PDF at `path` (stored under `sha`) as
+    sections and chunks of project `project_id`, replacing the sections of
+    a PDF indexed before. The ABSTRACT section stays as it is; a section
+    headed "Abstract" in the PDF is skipped when the project has an
+    abstract. `on_progress(stats)` runs inside each write transaction, so
+    progress is committed with the data. If indexing fails, the sections
+    already committed for this file are deleted before the error is
+    re-raised. Returns pages, sections, chunks and tokens.
+    """
+    stats = {"pages": pdf_page_count(path), "pages_done": 0, "sections": 0, "chunks": 0, "tokens": 0}
+    skip_abstract = call("db", _begin, db, project_id, sha)
+    pending: List[Tuple[Dict, List[Tuple[str, int]]]] = []
+    pending_chunks = 0
+
+    def flush(pages_done: int):
+        nonlocal pending, pending_chunks
+        def progress():
+            stats["pages_done"] = pages_done
+            if on_progress:
+                on_progress(stats)
+        call("db", _write, db, project_id, sha, pending, cache_stats, progress)
+        pending, pending_chunks = [], 0
+
+    try:
+        order_no = 1  # after ABSTRACT
+        sections = iter_pdf_sections(iter_pdf_lines(path), PdfConfig.PDF_MAX_SECTION_CHARS, PdfConfig.PDF_HEADING_SIZE_RATIO)
+        for section in sections:
+            if skip_abstract and (section["heading"] or "").strip(" :.").lower() == "abstract":
+                continue
+            parts = token_chunks_batch([section["content"]])[0]
+            if not parts:
+                continue
+            order_no += 1
+            section["order_no"] = order_no
+            pending.append((section, parts))
+            pending_chunks += len(parts)
+            stats["sections"] += 1
+            stats["chunks"] += len(parts)
+            stats["tokens"] += sum(n for _, n in parts)
+            if pending_chunks >= EmbeddingConfig.INGEST_EMBED_BATCH:
+                # pages before this section's start are complete
+                flush(section["page"])
+        if pending:
+            flush(stats["pages"])
+        call("db", _finish, db, project_id, sha)
+    except BaseException:
+        try:
+            call("db", _abort, db, project_id, sha)
+        except Exception:
+            logger.exception("could not drop the partial sections of PDF %s", sha)
+        raise
+    stats["pages_done"] = stats["pages"]
+    return stats
@@ -1,29 +1,30 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy import bindparam, text
-from helpers.embeddings import embed_texts, unpack_vector
+from helpers.embeddings import embed_query
+from db import current_generation
+from rag.search_backend import search_backend
+from rag.vector_store import sync_store, vector_store
 
 def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b))
 
 def hybrid_retrieve(db: Session, query: str, k: int = 12, limit: int = 10) -> List[Dict]:
-    # FTS5 (project-level)
-    fts_rows = db.execute(
-        text("""SELECT project_id, bm25(projects_fts) AS score
-                FROM projects_fts WHERE projects_fts MATCH :q
-                ORDER BY score LIMIT :limit"""), {"q": query, "limit": limit}
-    ).fetchall()
-    fts_ids = {row[0] for row in fts_rows}
+    backend = search_backend()
+    # Full text (project-level)
+    fts_ids = {row[0] for row in backend.fts_search(db, query, limit)}
 
-    # Embedding scan (good for small/medium corpora)
-    chunk_rows = db.execute(text("SELECT chunk_id, vector FROM embeddings")).fetchall()
-    if not chunk_rows:
-        return []
-    qvec = embed_texts([query])[0]
-    scored = [(cid, cosine_sim(qvec, unpack_vector(vec))) for cid, vec in chunk_rows]
-    scored.sort(key=lambda x: x[1], reverse=True)
-    top = scored[:k]
+    # Vector search: in the database when the backend supports it (pgvector),
+    # otherwise against the resident matrix (one mat-vec per query)
+    qvec = embed_query(query)
+    top = backend.vector_search(db, qvec, k)
+    if top is None:
+        store = vector_store()
+        sync_store(store, db, current_generation(db))
+        if not len(store):
+            return []
+        top = store.search(qvec, k)
 
     rows = db.execute(
         text("""SELECT c.id, c.content, c.project_id, c.section_id, p.title, p.year
@@ -0,0 +1,30 @@
+from typing import Optional
+
+import numpy as np
+
+# ------------------------------
+# Brute-force scoring of resident vectors
+# ------------------------------
+# Shared by the in-process stores (rag/vector_store, rag/vector_segment); kept
+# free of database imports so the stores can be used without opening DB_URL.
+_SCORE_BLOCK = 2048
+
+def score_rows(matrix: np.ndarray, qvec: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inner product of qvec with every row of a float32, float16 or int8 matrix.
+
+    Quantized rows are widened one block at a time so the temporary float32
+    copy stays bounded; int8 scores are rescaled by the per-row scales.
+    The widening is paid on every call, so quantization saves memory, not
+    time (see EmbeddingConfig.VECTOR_FORMAT).
+    """
+    q = np.asarray(qvec, dtype=np.float32)
+    if matrix.dtype == np.float32:
+        out = matrix @ q
+    else:
+        out = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), _SCORE_BLOCK):
+            block = matrix[start:start + _SCORE_BLOCK]
+            out[start:start + len(block)] = block.astype(np.float32) @ q
+    if scales is not None:
+        out *= scales
+    return out
@@ -0,0 +1,192 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from config import EmbeddingConfig, VectorIndexConfig
+from helpers.embeddings import unpack_vector
+
+# ------------------------------
+# Database-specific full text and vector search
+# ------------------------------
+# SQLite uses an FTS5 virtual table with bm25() and leaves vector search to
+# the in-process stores (rag/vector_store). PostgreSQL keeps a tsvector
+# column with a GIN index and a pgvector column on embeddings, so several
+# app servers can share one database without per-process vector copies.
+#
+# SQL fragments assume `projects p` joined to the FTS table as `f`, and the
+# score expression sorts ascending (best first) on every backend.
+
+class SqliteSearchBackend:
+    name = "sqlite"
+    fts_join = "JOIN projects_fts f ON f.project_id = p.id"
+    fts_where = "projects_fts MATCH :q"
+    fts_score = "bm25(projects_fts)"
+
+    def create_schema(self, connection):
+        connection.exec_driver_sql("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts
+        USING fts5(title, abstract, content, project_id UNINDEXED, tokenize="porter");
+        """)
+
+    def drop_schema(self, connection):
+        connection.exec_driver_sql("DROP TABLE IF EXISTS projects_fts")
+
+    def insert_fts_row(self, db: Session, project_id: int, title: str, abstract: str, fullbody: str):
+        self.insert_fts_rows(db, [(project_id, title, abstract, fullbody)])
+
+    def insert_fts_rows(self, db: Session, rows: Sequence[Tuple[int, str, str, str]]):
+        if rows:
+            db.execute(
+                text("INSERT INTO projects_fts(rowid, title, abstract, content, project_id) VALUES (:pid,:t,:a,:c,:pid)"),
+                [{"pid": pid, "t": t or "", "a": a or "", "c": c or ""} for pid, t, a, c in rows]
+            )
+
+    def upsert_fts_rows(self, db: Session, rows: Sequence[Tuple[int, str, str, str]]):
+        # FTS5 tables have no ON CONFLICT: update the rows that exist in place, insert the rest
+        if not rows:
+            return
+        present = {pid for (pid,) in db.execute(
+            text("SELECT rowid FROM projects_fts WHERE rowid IN :pids").bindparams(bindparam("pids", expanding=True)),
+            {"pids": [pid for pid, *_ in rows]}
+        )}
+        updates = [{"pid": pid, "t": t or "", "a": a or "", "c": c or ""} for pid, t, a, c in rows if pid in present]
+        if updates:
+            db.execute(text("UPDATE projects_fts SET title=:t, abstract=:a, content=:c WHERE rowid=:pid"), updates)
+        self.insert_fts_rows(db, [row for row in rows if row[0] not in present])
+
+    def delete_fts_row(self, db: Session, project_id: int):
+        self.delete_fts_rows(db, [project_id])
+
+    def delete_fts_rows(self, db: Session, project_ids: Sequence[int]):
+        if project_ids:
+            db.execute(text("DELETE FROM projects_fts WHERE rowid=:pid"), [{"pid": pid} for pid in project_ids])
+
+    def fts_search(self, db: Session, query: str, limit: int) -> List[Tuple[int, float]]:
+        return db.execute(
+            text(f"""SELECT p.id, {self.fts_score} AS score
+                     FROM projects p {self.fts_join} WHERE {self.fts_where}
+                     ORDER BY score LIMIT :limit"""), {"q": query, "limit": limit}
+        ).fetchall()
+
+    def index_vectors(self, db: Session, chunk_ids: Sequence[int], vecs):
+        pass
+
+    def backfill_vectors(self, connection, batch: int = 1000) -> int:
+        return 0
+
+    def vector_search(self, db: Session, qvec: np.ndarray, k: int) -> Optional[List[Tuple[int, float]]]:
+        # None: use the process-wide vector store
+        return None
+
+
+class PostgresSearchBackend(SqliteSearchBackend):
+    name = "postgresql"
+    fts_where = "f.document @@ websearch_to_tsquery('english', :q)"
+    fts_score = "-ts_rank_cd(f.document, websearch_to_tsquery('english', :q))"
+
+    def create_schema(self, connection):
+        dim = EmbeddingConfig.EMBEDDING_DIM
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS vector")
+        connection.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS projects_fts (
+            project_id INTEGER PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+            title TEXT NOT NULL DEFAULT '',
+            abstract TEXT NOT NULL DEFAULT '',
+            content TEXT NOT NULL DEFAULT '',
+            document tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', title), 'A') ||
+                setweight(to_tsvector('english', abstract), 'B') ||
+                setweight(to_tsvector('english', content), 'C')
+            ) STORED
+        )""")
+        connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_projects_fts_document ON projects_fts USING gin (document)")
+        connection.exec_driver_sql(f"ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS embedding vector({dim})")
+        if VectorIndexConfig.PG_VECTOR_INDEX == "ivfflat":
+            connection.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_embedding ON embeddings "
+                f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {VectorIndexConfig.PG_IVFFLAT_LISTS})")
+        else:
+            connection.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_embedding ON embeddings "
+                "USING hnsw (embedding vector_cosine_ops)")
+
+    def drop_schema(self, connection):
+        connection.exec_driver_sql("DROP INDEX IF EXISTS ix_embeddings_embedding")
+        connection.exec_driver_sql("ALTER TABLE embeddings DROP COLUMN IF EXISTS embedding")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS projects_fts")
+
+    def insert_fts_rows(self, db: Session, rows: Sequence[Tuple[int, str, str, str]]):
+        if rows:
+            db.execute(
+                text("INSERT INTO projects_fts(project_id, title, abstract, content) VALUES (:pid,:t,:a,:c)"),
+                [{"pid": pid, "t": t or "", "a": a or "", "c": c or ""} for pid, t, a, c in rows]
+            )
+
+    def upsert_fts_rows(self, db: Session, rows: Sequence[Tuple[int, str, str, str]]):
+        if rows:
+            db.execute(
+                text("""INSERT INTO projects_fts(project_id, title, abstract, content) VALUES (:pid,:t,:a,:c)
+                        ON CONFLICT (project_id) DO UPDATE
+                        SET title = EXCLUDED.title, abstract = EXCLUDED.abstract, content = EXCLUDED.content"""),
+                [{"pid": pid, "t": t or "", "a": a or "", "c": c or ""} for pid, t, a, c in rows]
+            )
+
+    def delete_fts_rows(self, db: Session, project_ids: Sequence[int]):
+        if project_ids:
+            db.execute(text("DELETE FROM projects_fts WHERE project_id=:pid"), [{"pid": pid} for pid in project_ids])
+
+    def index_vectors(self, db: Session, chunk_ids: Sequence[int], vecs):
+        if not len(chunk_ids):
+            return
+        db.flush()
+        _set_vectors(db, chunk_ids, vecs)
+
+    def backfill_vectors(self, connection, batch: int = 1000) -> int:
+        """Fill the pgvector column from the stored vectors of rows that have none
+        (rows written before the column existed). Returns the rows filled."""
+        filled = last_id = 0
+        while rows := connection.execute(
+            text("""SELECT chunk_id, vector FROM embeddings WHERE embedding IS NULL AND chunk_id > :last
+                    ORDER BY chunk_id LIMIT :n"""), {"last": last_id, "n": batch}
+        ).fetchall():
+            _set_vectors(connection, [cid for cid, _ in rows], [unpack_vector(blob) for _, blob in rows])
+            filled += len(rows)
+            last_id = rows[-1][0]
+        return filled
+
+    def vector_search(self, db: Session, qvec: np.ndarray, k: int) -> Optional[List[Tuple[int, float]]]:
+        if VectorIndexConfig.PG_VECTOR_INDEX == "ivfflat":
+            db.execute(text(f"SET LOCAL ivfflat.probes = {int(VectorIndexConfig.ANN_NPROBE)}"))
+        else:
+            db.execute(text(f"SET LOCAL hnsw.ef_search = {int(VectorIndexConfig.PG_HNSW_EF_SEARCH)}"))
+        rows = db.execute(
+            text("""SELECT chunk_id, 1 - (embedding <=> CAST(:q AS vector)) AS sim
+                    FROM embeddings WHERE embedding IS NOT NULL
+                    ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"""),
+            {"q": _vector_literal(qvec), "k": k}
+        ).fetchall()
+        return [(int(cid), float(sim)) for cid, sim in rows]
+
+
+def _set_vectors(connection, chunk_ids: Sequence[int], vecs):
+    connection.execute(
+        text("UPDATE embeddings SET embedding = CAST(:v AS vector) WHERE chunk_id = :cid"),
+        [{"cid": int(cid), "v": _vector_literal(vec)} for cid, vec in zip(chunk_ids, vecs)]
+    )
+
+def _vector_literal(vec) -> str:
+    return "[" + ",".join(f"{x:.7g}" for x in np.asarray(vec, dtype=np.float32).tolist()) + "]"
+
+
+_BACKENDS = {"sqlite": SqliteSearchBackend(), "postgresql": PostgresSearchBackend()}
+
+def backend_for(dialect_name: str):
+    if dialect_name not in _BACKENDS:
+        raise ValueError(f"Unsupported database for search: {dialect_name}")
+    return _BACKENDS[dialect_name]
+
+def search_backend():
+    from db import engine
+    return backend_for(engine.dialect.name)
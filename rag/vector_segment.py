@@ -0,0 +1,324 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from helpers.embeddings import unpack_vector
+from rag.scoring import score_rows
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: only in-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# Memory-mapped vector segment
+# ------------------------------
+# An append-only pair of raw files per generation:
+#   seg-<gen>.f32  float32 rows, row-major (n x dim)
+#   seg-<gen>.ids  int64 chunk id per row, -1 once the row is deleted
+# meta.json names the current generation. Appends and tombstones are made
+# under an flock so every uvicorn worker can write; readers map the files
+# read-only and pick up growth (or a new generation after compaction) by
+# checking sizes before each search. The embeddings table stays the source
+# of truth: check()/reconcile() compare against it and rebuild() re-derives
+# the segment from it. Searches never scan the table: every worker's commits
+# already reach the shared files, and the gaps a crash between commit and
+# append leaves are repaired by the maintenance thread, which reconciles when
+# it starts and before each compaction check.
+
+FORMAT_VERSION = 1
+_ID_BYTES = 8
+_DEAD = -1
+_COPY_BATCH = 65536
+# meta.json re-reads when a generation's files vanish (compaction racing a reader)
+_REFRESH_ATTEMPTS = 5
+
+
+class SegmentStore:
+    persistent = True
+
+    def __init__(self, path: Path, compact_ratio: float = 0.25, compact_interval: float = 300):
+        self.path = Path(path)
+        self.compact_ratio = compact_ratio
+        self.compact_interval = compact_interval
+        self._lock = threading.RLock()
+        self._meta_stamp = None
+        self._gen = None
+        self._dim = None
+        self._vecs = None
+        self._ids = None
+        self._n = 0
+        self._rows: Dict[int, int] = {}
+        self._compactor = None
+        self.loaded = False
+        self.generation = None
+
+    # ---- files ----
+    def _files(self, gen: int) -> Tuple[Path, Path]:
+        return self.path / f"seg-{gen}.f32", self.path / f"seg-{gen}.ids"
+
+    def _read_meta(self) -> Optional[dict]:
+        meta = self.path / "meta.json"
+        return json.loads(meta.read_text()) if meta.exists() else None
+
+    def _write_meta(self, gen: int, dim: int):
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps({"version": FORMAT_VERSION, "generation": gen, "dim": dim}))
+        os.replace(tmp, self.path / "meta.json")
+
+    @contextmanager
+    def _exclusive(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path / "lock", "a+") as fh:
+            if fcntl:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Re-map if another writer appended rows or compaction switched generations."""
+        with self._lock:
+            meta_path = self.path / "meta.json"
+            for attempt in range(_REFRESH_ATTEMPTS):
+                try:
+                    st = meta_path.stat()
+                except FileNotFoundError:
+                    self._gen, self._vecs, self._ids, self._n, self._rows = None, None, None, 0, {}
+                    return
+                stamp = (st.st_mtime_ns, st.st_size)
+                if stamp != self._meta_stamp:
+                    meta = self._read_meta()
+                    if meta.get("version") != FORMAT_VERSION:
+                        raise ValueError(f"Unsupported vector segment version: {meta.get('version')}")
+                    self._meta_stamp = stamp
+                    if meta["generation"] != self._gen:
+                        self._gen, self._dim = meta["generation"], meta["dim"]
+                        self._vecs, self._ids, self._n, self._rows = None, None, 0, {}
+                vec_file, id_file = self._files(self._gen)
+                try:
+                    rows = min(vec_file.stat().st_size // (4 * self._dim), id_file.stat().st_size // _ID_BYTES)
+                except FileNotFoundError:
+                    # compacted underneath us between reading meta.json and the files: read meta.json again
+                    self._meta_stamp = None
+                    time.sleep(0.01 * attempt)
+                    continue
+                if rows != self._n:
+                    self._map(rows)
+                return
+            raise RuntimeError(
+                f"Vector segment generation {self._gen} named by {meta_path} is missing; "
+                f"rebuild it with `python -m scripts.vector_segment rebuild`")
+
+    def _map(self, rows: int):
+        vec_file, id_file = self._files(self._gen)
+        old_n = self._n if rows >= self._n else 0
+        if rows == 0:
+            self._vecs = np.zeros((0, self._dim), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+        else:
+            self._vecs = np.memmap(vec_file, dtype=np.float32, mode="r", shape=(rows, self._dim))
+            self._ids = np.memmap(id_file, dtype=np.int64, mode="r", shape=(rows,))
+        if old_n == 0:
+            self._rows = {}
+        for offset, cid in enumerate(np.asarray(self._ids[old_n:rows]).tolist(), start=old_n):
+            if cid != _DEAD:
+                self._rows[cid] = offset
+        self._n = rows
+
+    # ---- store interface ----
+    def __len__(self) -> int:
+        return self.stats()["live"]
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self._refresh()
+                    self._start_compactor()
+                    self.loaded = True
+
+    def search(self, qvec: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            self._refresh()
+            n, vecs, ids = self._n, self._vecs, self._ids
+        if n == 0 or k <= 0:
+            return []
+        ids = np.asarray(ids[:n])
+        scores = np.asarray(score_rows(vecs[:n], qvec))
+        live = np.flatnonzero(ids != _DEAD)
+        if len(live) == 0:
+            return []
+        scores, ids = scores[live], ids[live]
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def add(self, chunk_ids: Sequence[int], vecs: np.ndarray):
+        if not len(chunk_ids):
+            return
+        vecs = np.ascontiguousarray(vecs, dtype=np.float32).reshape(len(chunk_ids), -1)
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+        with self._exclusive():
+            if self._gen is None:
+                self._gen, self._dim = 1, vecs.shape[1]
+                for f in self._files(self._gen):
+                    f.touch()
+                self._write_meta(self._gen, self._dim)
+            self._tombstone(ids.tolist())
+            vec_file, id_file = self._files(self._gen)
+            # drop a torn tail from an interrupted append before adding rows
+            os.truncate(vec_file, self._n * 4 * self._dim)
+            os.truncate(id_file, self._n * _ID_BYTES)
+            with open(vec_file, "ab") as f:
+                f.write(vecs.tobytes())
+            with open(id_file, "ab") as f:
+                f.write(ids.tobytes())
+            self._refresh()
+
+    def remove(self, chunk_ids: Iterable[int]):
+        with self._exclusive():
+            self._tombstone([int(c) for c in chunk_ids])
+
+    def _tombstone(self, chunk_ids: List[int], scan: bool = False):
+        """Mark rows dead; `scan` also catches older duplicate rows that _rows no longer points at."""
+        if self._gen is None or not chunk_ids:
+            return
+        rows = [self._rows.pop(cid, None) for cid in chunk_ids]
+        rows = [r for r, cid in zip(rows, chunk_ids) if r is not None and int(self._ids[r]) == cid]
+        if scan:
+            ids = np.asarray(self._ids[:self._n])
+            rows = set(rows) | set(np.flatnonzero(np.isin(ids, chunk_ids)).tolist())
+        dead = np.array([_DEAD], dtype=np.int64).tobytes()
+        _, id_file = self._files(self._gen)
+        fd = os.open(id_file, os.O_WRONLY)
+        try:
+            for row in rows:
+                os.pwrite(fd, dead, row * _ID_BYTES)
+        finally:
+            os.close(fd)
+
+    # ---- maintenance ----
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            dead = int(np.count_nonzero(np.asarray(self._ids[:self._n]) == _DEAD)) if self._n else 0
+            return {"generation": self._gen, "rows": self._n, "live": self._n - dead, "dead": dead}
+
+    def compact(self) -> dict:
+        """Rewrite live rows into a new generation; readers switch on their next refresh."""
+        with self._exclusive():
+            if self._gen is None:
+                return self.stats()
+            old_gen, n, ids, vecs = self._gen, self._n, self._ids, self._vecs
+
+            def live_batches():
+                for start in range(0, n, _COPY_BATCH):
+                    block_ids = np.asarray(ids[start:start + _COPY_BATCH])
+                    keep = block_ids != _DEAD
+                    yield block_ids[keep], np.asarray(vecs[start:start + _COPY_BATCH])[keep]
+
+            self._write_generation(old_gen + 1, self._dim, live_batches())
+            for f in self._files(old_gen):
+                f.unlink(missing_ok=True)
+            return self.stats()
+
+    def rebuild(self, db: Session) -> dict:
+        """Re-derive the whole segment from the embeddings table."""
+        result = db.execute(text("SELECT chunk_id, vector FROM embeddings ORDER BY chunk_id"))
+
+        def batches():
+            while rows := result.fetchmany(_COPY_BATCH):
+                yield (np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+                       np.vstack([unpack_vector(r[1]) for r in rows]))
+
+        with self._exclusive():
+            old_gen = self._gen
+            source = batches()
+            first = next(source, None)
+            if first is None:
+                return self.stats()
+            self._write_generation((old_gen or 0) + 1, first[1].shape[1], itertools.chain([first], source))
+            if old_gen is not None:
+                for f in self._files(old_gen):
+                    f.unlink(missing_ok=True)
+            return self.stats()
+
+    def _write_generation(self, gen: int, dim: int, batches):
+        vec_file, id_file = self._files(gen)
+        with open(vec_file, "wb") as fv, open(id_file, "wb") as fi:
+            for ids, vecs in batches:
+                fv.write(np.ascontiguousarray(vecs, dtype=np.float32).tobytes())
+                fi.write(np.asarray(ids, dtype=np.int64).tobytes())
+        self._write_meta(gen, dim)
+        self._refresh()
+
+    def check(self, db: Session) -> dict:
+        """Compare live segment rows with the embeddings table."""
+        with self._lock:
+            self._refresh()
+            ids = np.asarray(self._ids[:self._n]) if self._n else np.zeros(0, dtype=np.int64)
+        live = ids[ids != _DEAD]
+        uniq, counts = np.unique(live, return_counts=True)
+        from rag.vector_store import db_chunk_ids
+        db_ids = db_chunk_ids(db)
+        return {
+            "missing": np.setdiff1d(db_ids, uniq).tolist(),
+            "stale": np.setdiff1d(uniq, db_ids).tolist(),
+            "duplicates": uniq[counts > 1].tolist(),
+        }
+
+    def reconcile(self, db: Session) -> dict:
+        report = self.check(db)
+        with self._exclusive():
+            self._tombstone(report["stale"] + report["duplicates"], scan=bool(report["duplicates"]))
+        from rag.vector_store import fetch_vectors
+        # duplicates were dropped entirely above and are re-appended once from the DB
+        for ids, vecs in fetch_vectors(db, report["missing"] + report["duplicates"]):
+            self.add(ids, vecs)
+        return {key: len(val) for key, val in report.items()}
+
+    def _start_compactor(self):
+        if self._compactor is not None or self.compact_interval <= 0:
+            return
+
+        def loop():
+            from db import ReadSessionLocal
+            while True:
+                try:
+                    db = ReadSessionLocal()
+                    try:
+                        self.reconcile(db)
+                    finally:
+                        db.close()
+                except Exception:
+                    logger.exception("vector segment reconcile failed")
+                try:
+                    s = self.stats()
+                    if s["rows"] and s["dead"] / s["rows"] >= self.compact_ratio:
+                        self.compact()
+                except Exception:
+                    logger.exception("vector segment compaction failed")
+                time.sleep(self.compact_interval)
+
+        self._compactor = threading.Thread(target=loop, name="vector-segment-compactor", daemon=True)
+        self._compactor.start()
+
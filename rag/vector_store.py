@@ -0,0 +1,248 @@
+import threading
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session
+
+from config import EmbeddingConfig, VectorIndexConfig
+from helpers.embeddings import quantize_int8, unpack_vector
+from rag.scoring import score_rows
+
+# ------------------------------
+# Resident vector store
+# ------------------------------
+# One contiguous matrix (row i <-> chunk_ids[i]) shared by the whole process,
+# held as float32, float16 or int8 + per-row scale (EmbeddingConfig.VECTOR_FORMAT).
+# It is loaded from the embeddings table once and then kept in sync by the
+# write paths through stage_add/stage_remove, which are applied only when the
+# owning session commits.
+
+_PENDING_KEY = "vector_store_ops"
+_LOAD_BATCH = 4096
+_FETCH_BATCH = 500
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+class VectorStore:
+    # persistent stores must see every commit; in-memory ones re-read the DB on load
+    persistent = False
+
+    def __init__(self, fmt=None):
+        self.fmt = fmt or EmbeddingConfig.VECTOR_FORMAT
+        self._dtype = _DTYPES[self.fmt]
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, 0), dtype=self._dtype)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._slots: Dict[int, int] = {}
+        self._size = 0
+        self.loaded = False
+        self.generation = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(db)
+
+    def load(self, db: Session):
+        result = db.execute(text("SELECT chunk_id, vector FROM embeddings"))
+        with self._lock:
+            self._reset()
+            # decode in batches so a quantized store never holds the full float32 copy
+            while rows := result.fetchmany(_LOAD_BATCH):
+                ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+                self._append(ids, *self._encode(np.vstack([unpack_vector(r[1]) for r in rows])))
+            self.loaded = True
+
+    def reconcile(self, db: Session):
+        """Apply rows other workers added/removed since this process loaded."""
+        db_ids = db_chunk_ids(db)
+        with self._lock:
+            held = self._ids[:self._size].copy()
+        self.remove(np.setdiff1d(held, db_ids).tolist())
+        for ids, vecs in fetch_vectors(db, np.setdiff1d(db_ids, held).tolist()):
+            self.add(ids, vecs)
+
+    def add(self, chunk_ids: Sequence[int], vecs: np.ndarray):
+        if not len(chunk_ids):
+            return
+        rows, scales = self._encode(np.asarray(vecs, dtype=np.float32).reshape(len(chunk_ids), -1))
+        with self._lock:
+            fresh = []
+            for i, cid in enumerate(chunk_ids):
+                slot = self._slots.get(int(cid))
+                if slot is None:
+                    fresh.append(i)
+                else:
+                    self._matrix[slot] = rows[i]
+                    self._scales[slot] = scales[i]
+            if fresh:
+                ids = np.asarray([int(chunk_ids[i]) for i in fresh], dtype=np.int64)
+                self._append(ids, rows[fresh], scales[fresh])
+
+    def remove(self, chunk_ids: Iterable[int]):
+        with self._lock:
+            for cid in chunk_ids:
+                slot = self._slots.pop(int(cid), None)
+                if slot is None:
+                    continue
+                last = self._size - 1
+                if slot != last:
+                    # keep the live rows contiguous by moving the tail into the hole
+                    moved = int(self._ids[last])
+                    self._matrix[slot] = self._matrix[last]
+                    self._scales[slot] = self._scales[last]
+                    self._ids[slot] = moved
+                    self._slots[moved] = slot
+                self._size = last
+
+    def search(self, qvec: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            n = self._size
+            if n == 0 or k <= 0:
+                return []
+            scales = self._scales[:n] if self.fmt == "int8" else None
+            scores = score_rows(self._matrix[:n], qvec, scales)
+            ids = self._ids[:n].copy()
+        if k < n:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the held chunk ids and their vectors, decoded to float32."""
+        with self._lock:
+            n = self._size
+            vecs = self._matrix[:n].astype(np.float32)
+            if self.fmt == "int8":
+                vecs *= self._scales[:n, None]
+            return self._ids[:n].copy(), vecs
+
+    @property
+    def nbytes(self) -> int:
+        return self._size * (self._matrix.shape[1] * self._matrix.itemsize + 4 + 8)
+
+    def _encode(self, vecs: np.ndarray):
+        if self.fmt == "int8":
+            return quantize_int8(vecs)
+        return vecs.astype(self._dtype), np.ones(len(vecs), dtype=np.float32)
+
+    def _reset(self):
+        self._matrix = np.zeros((0, 0), dtype=self._dtype)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._slots = {}
+        self._size = 0
+
+    def _append(self, ids: np.ndarray, rows: np.ndarray, scales: np.ndarray):
+        need = self._size + len(ids)
+        if self._matrix.shape[1] != rows.shape[1] and self._size == 0:
+            self._matrix = np.zeros((0, rows.shape[1]), dtype=self._dtype)
+        if need > len(self._matrix):
+            cap = max(need, 2 * len(self._matrix), 1024)
+            grown = np.zeros((cap, rows.shape[1]), dtype=self._dtype)
+            grown[:self._size] = self._matrix[:self._size]
+            grown_scales = np.ones(cap, dtype=np.float32)
+            grown_scales[:self._size] = self._scales[:self._size]
+            grown_ids = np.zeros(cap, dtype=np.int64)
+            grown_ids[:self._size] = self._ids[:self._size]
+            self._matrix, self._scales, self._ids = grown, grown_scales, grown_ids
+        self._matrix[self._size:need] = rows
+        self._scales[self._size:need] = scales
+        self._ids[self._size:need] = ids
+        for offset, cid in enumerate(ids.tolist()):
+            self._slots[cid] = self._size + offset
+        self._size = need
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def vector_store():
+    """The process-wide store: the IVF index when one has been built, else the exact backend."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _open_store()
+    return _store
+
+def close_store():
+    """At shutdown: let the store persist what it holds only in memory (IVF delta/tombstones)."""
+    close = getattr(_store, "close", None)
+    if close is not None:
+        close()
+
+def _open_store():
+    index_dir = VectorIndexConfig.ANN_INDEX_DIR
+    if VectorIndexConfig.ANN_ENABLED and (index_dir / "meta.json").exists():
+        from rag.ann_index import IVFIndex
+        return IVFIndex.open(index_dir, nprobe=VectorIndexConfig.ANN_NPROBE,
+                             merge_ratio=VectorIndexConfig.ANN_MERGE_RATIO,
+                             merge_interval=VectorIndexConfig.ANN_MERGE_INTERVAL)
+    if VectorIndexConfig.VECTOR_BACKEND == "segment":
+        from rag.vector_segment import SegmentStore
+        return SegmentStore(VectorIndexConfig.SEGMENT_DIR,
+                            compact_ratio=VectorIndexConfig.SEGMENT_COMPACT_RATIO,
+                            compact_interval=VectorIndexConfig.SEGMENT_COMPACT_INTERVAL)
+    return VectorStore()
+
+# ------------------------------
+# Sync with the embeddings table
+# ------------------------------
+def db_chunk_ids(db: Session) -> np.ndarray:
+    return np.fromiter((r[0] for r in db.execute(text("SELECT chunk_id FROM embeddings"))), dtype=np.int64)
+
+def fetch_vectors(db: Session, chunk_ids: List[int]) -> Iterator[Tuple[List[int], np.ndarray]]:
+    stmt = text("SELECT chunk_id, vector FROM embeddings WHERE chunk_id IN :ids").bindparams(
+        bindparam("ids", expanding=True))
+    for start in range(0, len(chunk_ids), _FETCH_BATCH):
+        rows = db.execute(stmt, {"ids": chunk_ids[start:start + _FETCH_BATCH]}).fetchall()
+        if rows:
+            yield [r[0] for r in rows], np.vstack([unpack_vector(r[1]) for r in rows])
+
+def sync_store(store, db: Session, generation: int):
+    """Load the store on first use and reconcile it whenever the corpus generation moved.
+
+    Commits made through this process are already applied by the session hooks
+    below; the generation check catches writes made by other workers. Persistent
+    stores already hold those (every worker writes the shared files) and
+    reconcile off the search path.
+    """
+    if not store.loaded:
+        store.ensure_loaded(db)
+    elif generation != store.generation and not store.persistent:
+        store.reconcile(db)
+    store.generation = generation
+
+def stage_add(db: Session, chunk_ids: Sequence[int], vecs):
+    db.info.setdefault(_PENDING_KEY, []).append(("add", list(chunk_ids), np.asarray(vecs, dtype=np.float32)))
+
+def stage_remove(db: Session, chunk_ids: Sequence[int]):
+    db.info.setdefault(_PENDING_KEY, []).append(("remove", list(chunk_ids), None))
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session):
+    ops = session.info.pop(_PENDING_KEY, None)
+    if not ops:
+        # most commits stage nothing; don't open (or build) the store for them
+        return
+    store = vector_store()
+    if not (store.loaded or store.persistent):
+        return
+    for op, chunk_ids, vecs in ops:
+        if op == "add":
+            store.add(chunk_ids, vecs)
+        else:
+            store.remove(chunk_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,28 @@
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+_AUTHORS = text(
+    "SELECT project_id, full_name FROM authors WHERE project_id IN :pids ORDER BY project_id, id"
+).bindparams(bindparam("pids", expanding=True))
+
+_KEYWORDS = text(
+    "SELECT project_id, keyword FROM project_keywords WHERE project_id IN :pids ORDER BY project_id, id"
+).bindparams(bindparam("pids", expanding=True))
+
+class ProjectRepository:
+
+    @staticmethod
+    def get_authors_and_keywords(db: Session, project_ids: Iterable[int]) -> Tuple[Dict[int, List[str]], Dict[int, List[str]]]:
+        """Authors and keywords for a whole result page: two queries regardless of page size."""
+        pids = list(dict.fromkeys(project_ids))
+        authors: Dict[int, List[str]] = {pid: [] for pid in pids}
+        keywords: Dict[int, List[str]] = {pid: [] for pid in pids}
+        if not pids:
+            return authors, keywords
+        for pid, name in db.execute(_AUTHORS, {"pids": pids}):
+            authors[pid].append(name)
+        for pid, keyword in db.execute(_KEYWORDS, {"pids": pids}):
+            keywords[pid].append(keyword)
+        return authors, keywords
@@ -0,0 +1,41 @@
+
+# ------------------------------
+# Build the IVF index for chunk embeddings (offline)
+#   python -m scripts.build_ann_index [--nlist N] [--iters N]
+# ------------------------------
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from config import VectorIndexConfig
+from db import SessionLocal
+from helpers.embeddings import unpack_vector
+from rag.ann_index import IVFIndex, default_nlist
+
+def build_ann_index(nlist=None, iters=12):
+    db = SessionLocal()
+    try:
+        rows = db.execute(text("SELECT chunk_id, vector FROM embeddings")).fetchall()
+    finally:
+        db.close()
+    if not rows:
+        print("No embeddings to index.")
+        return
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    vecs = np.vstack([unpack_vector(r[1]) for r in rows])
+    nlist = nlist or default_nlist(len(ids))
+
+    t0 = time.perf_counter()
+    index = IVFIndex.build(ids, vecs, nlist=nlist, iters=iters)
+    index.save(VectorIndexConfig.ANN_INDEX_DIR)
+    print(f"Indexed {len(ids)} vectors into {nlist} lists in {time.perf_counter() - t0:.1f}s "
+          f"-> {VectorIndexConfig.ANN_INDEX_DIR}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the IVF ANN index next to the SQLite DB")
+    parser.add_argument("--nlist", type=int, default=None, help="number of clusters (default 4*sqrt(N))")
+    parser.add_argument("--iters", type=int, default=12, help="k-means iterations")
+    args = parser.parse_args()
+    build_ann_index(args.nlist, args.iters)
@@ -0,0 +1,78 @@
+
+# ------------------------------
+# Abstract chunking: size report and re-chunking of stored projects
+#   python -m scripts.chunk_corpus report [--max-tokens 128 256] [--overlap 0 1] [--model-max-tokens 256]
+#   python -m scripts.chunk_corpus apply [--batch 200]
+# `report` shows how many chunks and model tokens the stored abstracts give
+# for each budget/overlap (embedding cost grows with tokens), next to the
+# old 1200-character chunker and the tokens the encoder truncates from it.
+# `apply` re-chunks every project with the current CHUNK_* settings; chunks
+# whose text does not change keep their ids and embeddings.
+# ------------------------------
+import argparse
+
+from config import EmbeddingConfig
+from db import ReadSessionLocal, SessionLocal, bump_generation
+from helpers.chunking import SPECIAL_TOKENS, count_tokens, token_chunks_batch
+from helpers.text import sentence_chunks
+from models import Chunk, Project
+from rag.indexing import sync_abstract_chunks
+
+def load_abstracts():
+    db = ReadSessionLocal()
+    try:
+        abstracts = dict(db.query(Project.id, Project.abstract).order_by(Project.id))
+        stored = db.query(Chunk).count()
+    finally:
+        db.close()
+    return abstracts, stored
+
+def row(label, counts, model_max):
+    tokens = sum(counts)
+    truncated = sum(max(0, n - model_max) for n in counts)
+    print(f"{label:<22} {len(counts):>8} {tokens:>10} {tokens / max(len(counts), 1):>8.0f} "
+          f"{max(counts, default=0):>6} {truncated:>10}")
+
+def report(max_tokens, overlaps, model_max):
+    abstracts, stored = load_abstracts()
+    texts = [a for a in abstracts.values() if a]
+    print(f"{len(abstracts)} projects, {len(texts)} with an abstract, {stored} chunks stored")
+    print(f"{'chunker':<22} {'chunks':>8} {'tokens':>10} {'avg':>8} {'max':>6} {'truncated':>10}")
+    old = [c for t in texts for c in sentence_chunks(t)]
+    row("1200 chars (old)", [n + SPECIAL_TOKENS for n in count_tokens(old)], model_max)
+    for budget in max_tokens:
+        for overlap in overlaps:
+            chunked = token_chunks_batch(texts, budget, overlap)
+            row(f"{budget} tokens, overlap {overlap}", [n for parts in chunked for _, n in parts], model_max)
+
+def apply(batch):
+    abstracts, _ = load_abstracts()
+    pids = list(abstracts)
+    totals = {"kept": 0, "added": 0, "removed": 0, "chunks": 0, "tokens": 0}
+    db = SessionLocal()
+    try:
+        for start in range(0, len(pids), batch):
+            part = {pid: abstracts[pid] for pid in pids[start:start + batch]}
+            stats = sync_abstract_chunks(db, part)
+            bump_generation(db)
+            db.commit()
+            for key in totals:
+                totals[key] += stats[key]
+            print(f"  {min(start + batch, len(pids))}/{len(pids)} projects")
+    finally:
+        db.close()
+    print(f"re-chunked at {EmbeddingConfig.CHUNK_MAX_TOKENS} tokens, overlap {EmbeddingConfig.CHUNK_OVERLAP_SENTENCES}: {totals}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Abstract chunk report / re-chunking")
+    parser.add_argument("command", choices=["report", "apply"])
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[128, EmbeddingConfig.CHUNK_MAX_TOKENS])
+    parser.add_argument("--overlap", type=int, nargs="+", default=[0, 1])
+    parser.add_argument("--model-max-tokens", type=int, default=256,
+                        help="encoder max sequence length; longer chunks are truncated (all-MiniLM-L6-v2: 256)")
+    parser.add_argument("--batch", type=int, default=200, help="projects per transaction for apply")
+    args = parser.parse_args()
+    if args.command == "report":
+        report(args.max_tokens, args.overlap, args.model_max_tokens)
+    else:
+        apply(args.batch)
@@ -0,0 +1,40 @@
+
+# ------------------------------
+# Shared embedding server for all uvicorn workers
+#   python -m scripts.embedding_server [--socket /tmp/capstone-embed.sock]
+# then start the app with EMBED_SERVER_SOCKET set to the same path
+# ------------------------------
+import argparse
+import os
+import signal
+import sys
+
+from config import EmbeddingConfig
+from helpers.embedding_dispatcher import EmbeddingDispatcher
+from helpers.embedding_server import EmbeddingServer
+from helpers.embeddings import embedder, encode_local
+
+def main(path: str):
+    embedder()  # load before accepting connections
+    # requests from different workers are coalesced the same way as within one
+    dispatcher = EmbeddingDispatcher(
+        encode_local,
+        max_batch=EmbeddingConfig.EMBED_BATCH_MAX_SIZE,
+        max_wait_ms=EmbeddingConfig.EMBED_BATCH_MAX_WAIT_MS,
+    )
+    server = EmbeddingServer(path, dispatcher.embed, EmbeddingConfig.EMBEDDING_MODEL)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"serving {EmbeddingConfig.EMBEDDING_MODEL} on {path}")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Embedding server")
+    parser.add_argument("--socket", default=EmbeddingConfig.EMBED_SERVER_SOCKET or "/tmp/capstone-embed.sock")
+    main(parser.parse_args().socket)
@@ -0,0 +1,29 @@
+
+# ------------------------------
+# Export the embedding model to ONNX (fp32 + dynamic int8) for
+# EMBEDDING_BACKEND=onnx | onnx-int8
+#   python -m scripts.export_onnx [--quant-config avx2] [--out models/all-MiniLM-L6-v2-onnx]
+# ------------------------------
+import argparse
+from pathlib import Path
+
+from config import EmbeddingConfig
+
+def main(out: Path, quant_config: str):
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    # backend="onnx" converts the torch checkpoint through optimum on first load
+    model = SentenceTransformer(EmbeddingConfig.EMBEDDING_MODEL, backend="onnx")
+    model.save_pretrained(str(out))
+    export_dynamic_quantized_onnx_model(model, quant_config, str(out))
+    for f in sorted((out / "onnx").glob("*.onnx")):
+        print(f"{f}  {f.stat().st_size / 1e6:.1f} MB")
+    print("check equivalence/throughput with: python -m benchmarks.embedding_backends")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--out", type=Path, default=EmbeddingConfig.ONNX_MODEL_DIR)
+    parser.add_argument("--quant-config", default=EmbeddingConfig.ONNX_QUANT_CONFIG,
+                        choices=["avx2", "avx512", "avx512_vnni", "arm64"])
+    args = parser.parse_args()
+    main(args.out, args.quant_config)
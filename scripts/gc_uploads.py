@@ -0,0 +1,78 @@
+
+# ------------------------------
+# Remove stored upload files that nothing refers to any more (offline)
+#   python -m scripts.gc_uploads [--dry-run] [--min-age-minutes 60] [--adopt-legacy]
+# Covers the file store (uploads/compilations/, see helpers/file_store) and
+# the older per-entry copies uploads/{entry sha256}.docx. PDFs saved directly
+# under uploads/ and any other file there are never touched.
+# ------------------------------
+import argparse
+import re
+import time
+
+from config import PathConfig
+from db import SessionLocal
+from helpers.file_store import blob_dir, blob_path, store_file
+from models import IngestJob, Project
+
+LEGACY_COPY = re.compile(r"^[0-9a-f]{64}\.docx$")
+
+def adopt_legacy(db, legacy: dict) -> int:
+    # projects imported before the file store: move their copy in (identical
+    # compilations collapse into one file) so the per-entry copy becomes garbage
+    adopted = 0
+    for project in db.query(Project).filter(Project.sha256.in_(list(legacy)), Project.source_sha256.is_(None)):
+        project.source_sha256, _ = store_file(legacy[project.sha256])
+        adopted += 1
+    db.commit()
+    return adopted
+
+def gc_uploads(dry_run: bool = False, min_age_minutes: float = 60, adopt: bool = False):
+    # young files may belong to an upload or import that has not committed yet
+    cutoff = time.time() - min_age_minutes * 60
+    legacy = {p.stem: p for p in PathConfig.UPLOAD_DIR.glob("*.docx") if LEGACY_COPY.match(p.name)}
+    db = SessionLocal()
+    try:
+        if adopt and legacy and not dry_run:
+            print(f"adopted {adopt_legacy(db, legacy)} legacy copies into the file store")
+        referenced = {sha for (sha,) in db.query(Project.source_sha256).filter(Project.source_sha256.isnot(None)).distinct()}
+        referenced |= {sha for (sha,) in db.query(Project.pdf_sha256).filter(Project.pdf_sha256.isnot(None)).distinct()}
+        referenced |= {sha for (sha,) in db.query(IngestJob.source_sha256).filter(
+            IngestJob.status.in_(["queued", "running"]), IngestJob.source_sha256.isnot(None))}
+        projects = dict(db.query(Project.sha256, Project.source_sha256).filter(Project.sha256.in_(list(legacy)))) if legacy else {}
+    finally:
+        db.close()
+
+    garbage = []
+    if blob_dir().is_dir():
+        for path in blob_dir().iterdir():
+            # .part files are writes that never finished
+            if path.suffix == ".part" or path.stem not in referenced:
+                garbage.append(path)
+    for sha, path in legacy.items():
+        if sha not in projects:
+            garbage.append(path)  # the project is gone
+        elif projects[sha] and blob_path(projects[sha]).exists():
+            garbage.append(path)  # superseded by the stored source file
+
+    removed = freed = 0
+    for path in garbage:
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        removed += 1
+        freed += stat.st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+    print(f"{'would remove' if dry_run else 'removed'} {removed} file(s), {freed / 1e6:.1f} MB; "
+          f"{len(referenced)} stored source file(s) in use")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Garbage-collect unreferenced upload files")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    parser.add_argument("--min-age-minutes", type=float, default=60,
+                        help="leave files younger than this alone (default 60)")
+    parser.add_argument("--adopt-legacy", action="store_true",
+                        help="first move per-entry copies of older imports into the file store")
+    args = parser.parse_args()
+    gc_uploads(args.dry_run, args.min_age_minutes, args.adopt_legacy)
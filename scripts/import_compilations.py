@@ -0,0 +1,125 @@
+
+# ------------------------------
+# Bulk-import a directory of compilation .docx files (offline)
+#   python -m scripts.import_compilations DIR [--workers N] [--force]
+# Files are parsed in a process pool while this process embeds and writes
+# them through one session, one transaction per file. Imported files are
+# recorded by sha256, so an interrupted run picks up where it stopped.
+# ------------------------------
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from db import SessionLocal
+from helpers.file_store import store_file
+from helpers.hash import sha256_bytes
+from models import ImportedFile
+
+def _parse(path: str):
+    # runs in a pool process: only the parser is imported there, never the model
+    from helpers.docx_parser import parse_compilation_docx
+    t0 = time.perf_counter()
+    entries = parse_compilation_docx(path)
+    return entries, time.perf_counter() - t0
+
+def find_files(root: Path):
+    # "~$name.docx" are Word lock files
+    return sorted(p for p in root.rglob("*.docx") if not p.name.startswith("~$"))
+
+def import_compilations(root: Path, workers: int, force: bool = False):
+    from helpers.embeddings import warm_up_models
+    from rag.embedding_cache import cache_report, new_cache_stats
+    from rag.indexing import upsert_entries
+
+    db = SessionLocal()
+    try:
+        done = set() if force else {sha for (sha,) in db.query(ImportedFile.sha256)}
+        todo, seen, skipped = [], set(), 0
+        for path in find_files(root):
+            sha = sha256_bytes(path.read_bytes())
+            if sha in done or sha in seen:
+                skipped += 1
+                continue
+            seen.add(sha)
+            todo.append((path, sha))
+        print(f"{len(todo)} file(s) to import, {skipped} already imported or duplicate")
+        if not todo:
+            return
+
+        # spawn, not fork: pool processes start clean instead of inheriting the model
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        warm_up_models("blocking")
+        stats = new_cache_stats()
+        chunks = {"chunks": 0, "tokens": 0}
+        totals = {"files": 0, "failed": 0, "entries": 0, "parse": 0.0, "write": 0.0}
+        t_start = time.perf_counter()
+        pending = deque()
+        queue = iter(todo)
+        try:
+            # keep a bounded number of parses in flight so memory stays flat
+            for path, sha in queue:
+                pending.append((path, sha, pool.submit(_parse, str(path))))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                path, sha, future = pending.popleft()
+                nxt = next(queue, None)
+                if nxt is not None:
+                    pending.append((nxt[0], nxt[1], pool.submit(_parse, str(nxt[0]))))
+                try:
+                    entries, parse_s = future.result()
+                except Exception as e:
+                    totals["failed"] += 1
+                    print(f"  FAILED {path}: {type(e).__name__}: {e}")
+                    continue
+
+                t0 = time.perf_counter()
+                try:
+                    if entries:
+                        store_file(path, sha)
+                        upsert_entries(db, path.name, sha, entries, stats, chunks)
+                    db.merge(ImportedFile(sha256=sha, path=str(path), entries=len(entries)))
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    totals["failed"] += 1
+                    print(f"  FAILED {path}: {type(e).__name__}: {e}")
+                    continue
+                write_s = time.perf_counter() - t0
+
+                totals["files"] += 1
+                totals["entries"] += len(entries)
+                totals["parse"] += parse_s
+                totals["write"] += write_s
+                elapsed = time.perf_counter() - t_start
+                print(f"  [{totals['files'] + totals['failed']}/{len(todo)}] {path.name}: {len(entries)} entries "
+                      f"(parse {parse_s:.2f}s, embed+write {write_s:.2f}s) "
+                      f"{totals['entries'] / elapsed * 60:,.0f} entries/min")
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+        elapsed = time.perf_counter() - t_start
+        print(f"imported {totals['files']} file(s), {totals['entries']} entries in {elapsed:.1f}s "
+              f"= {totals['entries'] / elapsed * 60:,.0f} entries/min; {totals['failed']} failed")
+        print(f"parse (summed over {workers} worker(s)) {totals['parse']:.1f}s, embed+write {totals['write']:.1f}s, "
+              f"embedding cache {cache_report(stats)}")
+        print(f"{chunks['chunks']} chunk(s), {chunks['tokens']} model tokens "
+              f"({chunks['tokens'] / max(chunks['chunks'], 1):.0f} per chunk)")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import a directory of compilation .docx files")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) - 1, 1),
+                        help="parser processes (default: CPU count - 1)")
+    parser.add_argument("--force", action="store_true", help="re-import files that were already imported")
+    args = parser.parse_args()
+    if not args.directory.is_dir():
+        sys.exit(f"{args.directory} is not a directory")
+    import_compilations(args.directory, args.workers, args.force)
@@ -0,0 +1,26 @@
+
+# ------------------------------
+# Run ingestion jobs outside the web processes (set JOB_WORKER_THREADS=0 for the app)
+#   python -m scripts.ingest_worker [--threads 1]
+# ------------------------------
+import argparse
+import time
+
+from config import JobConfig
+from helpers.embeddings import warm_up_models
+from rag.ingest_jobs import IngestWorker
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingestion job worker")
+    parser.add_argument("--threads", type=int, default=max(JobConfig.JOB_WORKER_THREADS, 1))
+    args = parser.parse_args()
+
+    warm_up_models("blocking")
+    worker = IngestWorker(args.threads, JobConfig.JOB_POLL_SECONDS)
+    worker.start()
+    print(f"ingest worker running with {args.threads} thread(s)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        worker.stop()
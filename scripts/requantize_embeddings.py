@@ -0,0 +1,50 @@
+
+# ------------------------------
+# Re-encode stored chunk vectors in another format
+#   python -m scripts.requantize_embeddings --format int8
+# ------------------------------
+import argparse
+
+from sqlalchemy import text
+
+from db import SessionLocal
+from helpers.embeddings import VECTOR_FORMATS, decode_vector, pack_vector, unpack_vector
+
+BATCH = 1000
+
+def requantize_embeddings(fmt: str):
+    db = SessionLocal()
+    converted = skipped = before = after = 0
+    try:
+        last_id = 0
+        while True:
+            rows = db.execute(
+                text("SELECT chunk_id, vector FROM embeddings WHERE chunk_id > :last ORDER BY chunk_id LIMIT :n"),
+                {"last": last_id, "n": BATCH}
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for cid, blob in rows:
+                before += len(blob)
+                if decode_vector(blob)[0] == fmt:
+                    skipped += 1; after += len(blob)
+                    continue
+                packed = pack_vector(unpack_vector(blob), fmt)
+                updates.append({"cid": cid, "v": packed})
+                after += len(packed)
+            if updates:
+                db.execute(text("UPDATE embeddings SET vector=:v WHERE chunk_id=:cid"), updates)
+                db.commit()
+                converted += len(updates)
+            last_id = rows[-1][0]
+    finally:
+        db.close()
+    print(f"Re-encoded {converted} vectors to {fmt} ({skipped} already {fmt}); "
+          f"{before / 1024:.0f} KiB -> {after / 1024:.0f} KiB")
+    print("Set VECTOR_FORMAT to match and restart the app (or run VACUUM to shrink the DB file).")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Re-encode the embeddings table")
+    parser.add_argument("--format", choices=sorted(VECTOR_FORMATS), required=True)
+    requantize_embeddings(parser.parse_args().format)
@@ -0,0 +1,33 @@
+
+# ------------------------------
+# Maintain the memory-mapped vector segment
+#   python -m scripts.vector_segment check|reconcile|compact|rebuild
+# ------------------------------
+import argparse
+
+from config import VectorIndexConfig
+from db import SessionLocal
+from rag.vector_segment import SegmentStore
+
+def main(command: str):
+    store = SegmentStore(VectorIndexConfig.SEGMENT_DIR, compact_interval=0)
+    db = SessionLocal()
+    try:
+        if command == "check":
+            report = store.check(db)
+            for key, ids in report.items():
+                print(f"{key}: {len(ids)}" + (f" e.g. {ids[:10]}" if ids else ""))
+            print("consistent" if not any(report.values()) else "INCONSISTENT (run reconcile)")
+        elif command == "reconcile":
+            print(store.reconcile(db))
+        elif command == "compact":
+            print(store.compact())
+        elif command == "rebuild":
+            print(store.rebuild(db))
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Vector segment maintenance")
+    parser.add_argument("command", choices=["check", "reconcile", "compact", "rebuild"])
+    main(parser.parse_args().command)
@@ -32,7 +32,8 @@ wordDocumentInput.addEventListener('change', async () => {
       throw new Error(errorData.detail || 'Upload failed');
     }
 
-    const data = await res.json();
+    const { job_id } = await res.json();
+    const data = await waitForJob(job_id);
     let html = `
             <div class="alert alert-success">✅ Inserted: ${data.inserted.length}</div>
             <div class="alert alert-warning">⚠️ Skipped: ${data.skipped.length}</div>
@@ -55,6 +56,19 @@ wordDocumentInput.addEventListener('change', async () => {
   }
 });
 
+async function waitForJob(jobId) {
+  // uploads are indexed in the background; poll until the job settles
+  while (true) {
+    const res = await fetch(`/api/jobs/${jobId}`, { credentials: 'include' });
+    if (!res.ok) throw new Error('Could not read import progress');
+    const { data: job } = await res.json();
+    if (job.status === 'done') return job.result;
+    if (job.status === 'failed') throw new Error(job.error || 'Import failed');
+    uploadResultDiv.innerHTML = `<div class="text-info">⏳ Importing... ${job.done + job.failed}/${job.total || '?'}</div>`;
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+  }
+}
+
 function addCapModal() {
   new bootstrap.Modal(document.getElementById('addModal')).show();
 }
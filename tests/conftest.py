@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# the app's engine is created on import of `db`; point it at a scratch database first
+os.environ.setdefault("DB_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
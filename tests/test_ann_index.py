@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from rag.ann_index import IVFIndex
+
+
+def unit_vectors(n, dim=32, seed=0):
+    vecs = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def exact(ids, vecs, q, k):
+    scores = vecs @ q
+    top = np.argsort(-scores, kind="stable")[:k]
+    return [int(ids[i]) for i in top]
+
+
+@pytest.fixture
+def index(tmp_path):
+    ids = np.arange(1, 601, dtype=np.int64) * 3
+    vecs = unit_vectors(600)
+    IVFIndex.build(ids, vecs, nlist=8).save(tmp_path / "ivf")
+    return IVFIndex.open(tmp_path / "ivf", nprobe=8, merge_ratio=0.1, merge_interval=0), ids, vecs
+
+
+def test_full_probe_matches_exact_search(index):
+    idx, ids, vecs = index
+    q = unit_vectors(1, seed=1)[0]
+    assert [cid for cid, _ in idx.search(q, 10)] == exact(ids, vecs, q, 10)
+
+
+def test_delta_and_tombstones_are_searched(index):
+    idx, ids, vecs = index
+    new_ids, new_vecs = np.array([5000, 5001]), unit_vectors(2, seed=2)
+    idx.add(new_ids, new_vecs)
+    # re-embedding a base row hides the old vector
+    idx.add([ids[0]], -vecs[:1])
+    idx.remove([int(ids[1]), 5001])
+    assert len(idx) == 600 - 1 + 1
+    assert idx.search(new_vecs[0], 1)[0][0] == 5000
+    assert idx.search(vecs[0], 1)[0][0] != ids[0]
+    assert int(ids[1]) not in [cid for cid, _ in idx.search(vecs[1], 5)]
+    assert idx.search(-vecs[0], 1)[0][0] == ids[0]
+
+
+def test_merge_persists_online_changes(index, tmp_path):
+    idx, ids, vecs = index
+    assert not idx.needs_merge()
+    added = np.arange(10_000, 10_070)
+    added_vecs = unit_vectors(70, seed=3)
+    idx.add(added, added_vecs)
+    idx.remove(ids[:5].tolist())
+    assert idx.needs_merge()
+    assert idx.merge()
+    assert len(idx._delta) == 0 and not idx._tombstones
+    assert len(idx) == len(idx.ids) == 665
+
+    reopened = IVFIndex.open(tmp_path / "ivf")
+    live_ids = np.concatenate([ids[5:], added])
+    live_vecs = np.vstack([vecs[5:], added_vecs])
+    q = unit_vectors(1, seed=4)[0]
+    assert [cid for cid, _ in reopened.search(q, 10, nprobe=8)] == exact(live_ids, live_vecs, q, 10)
+    assert np.array_equal(reopened._sorted_ids, np.sort(live_ids))
+    # the centroids are kept; nothing is left to merge
+    assert np.array_equal(reopened.centroids, idx.centroids)
+    assert not reopened.merge()
+
+
+def test_merge_builds_on_another_workers_files(index, tmp_path):
+    idx, ids, _ = index
+    other = IVFIndex.open(tmp_path / "ivf")
+    other.add([7000], unit_vectors(1, seed=5))
+    other.close()
+    idx.add([8000], unit_vectors(1, seed=6))
+    idx.merge()
+    assert {7000, 8000} <= set(IVFIndex.open(tmp_path / "ivf").ids.tolist())
+
+
+def test_base_lookup_uses_sorted_ids(index):
+    idx, ids, _ = index
+    found = idx._in_base(np.array([ids[0], ids[-1], 1, 2, 10**9], dtype=np.int64))
+    assert found.tolist() == [True, True, False, False, False]
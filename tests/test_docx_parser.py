@@ -0,0 +1,36 @@
+import io
+
+import pytest
+
+pytest.importorskip("docx")
+
+from benchmarks.bulk_import import synthetic_entries
+from benchmarks.docx_parser import reference_paragraphs, reference_parse, tricky_docx
+from helpers.docx_parser import iter_compilation_entries, iter_docx_paragraphs, parse_compilation_docx
+
+
+@pytest.fixture(scope="module")
+def compilation():
+    # formatted runs, tabs, line breaks, hyperlinks, tracked insertions, tables and empty paragraphs
+    return tricky_docx(synthetic_entries(40))
+
+
+def test_paragraphs_match_python_docx(compilation):
+    assert list(iter_docx_paragraphs(compilation)) == reference_paragraphs(compilation)
+
+
+def test_entries_match_the_python_docx_parser(compilation, tmp_path):
+    expected = reference_parse(compilation)
+    assert len(expected) == 41
+    assert parse_compilation_docx(compilation) == expected
+    assert list(iter_compilation_entries(io.BytesIO(compilation))) == expected
+    path = tmp_path / "compilation.docx"
+    path.write_bytes(compilation)
+    # ingest jobs parse the stored file by path
+    assert parse_compilation_docx(str(path)) == expected
+    # the hand-built entry: run formatting and tabs in the title, breaks and a hyperlink in the
+    # abstract, the table's "Title:" not starting an entry
+    last = expected[-1]
+    assert last["title"] == "Split Run\tTitle"
+    assert last["researchers"] == ["Ana Reyes", "Ben Cruz", "Carla Diaz"]
+    assert last["abstract"] == "First line\nsecond lineafter page break.\n\nSee the portal for details."
@@ -0,0 +1,179 @@
+import re
+
+import numpy as np
+import pytest
+
+pymupdf = pytest.importorskip("pymupdf")
+
+import rag.embedding_cache as embedding_cache
+import helpers.chunking as chunking
+from config import EmbeddingConfig, ExecutorConfig
+from db import SessionLocal
+from helpers.hash import sha256_bytes
+from helpers.pdf_parser import PdfLine, is_heading, iter_pdf_sections
+from models import Chunk, Embedding, Project, Section
+from modules.admin.capstones.api_update_capstone import _update_capstone
+from rag.indexing import encode_abstract
+from rag.pdf_ingest import index_pdf
+
+
+class WordTokenizer:
+    # stands in for the model tokenizer: one token per word or punctuation mark
+    def _offsets(self, text):
+        return [m.span() for m in re.finditer(r"\w+|[^\w\s]", text)]
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False):
+        single = isinstance(text, str)
+        offsets = [self._offsets(t) for t in ([text] if single else text)]
+        out = {"input_ids": [[0] * len(o) for o in offsets]}
+        if return_offsets_mapping:
+            out["offset_mapping"] = offsets
+        if single:
+            out = {k: v[0] for k, v in out.items()}
+        return out
+
+
+def fake_embed(texts):
+    vecs = np.random.default_rng(len(texts)).random((len(texts), EmbeddingConfig.EMBEDDING_DIM), dtype=np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+@pytest.fixture(autouse=True)
+def no_models(monkeypatch):
+    monkeypatch.setattr(embedding_cache, "embed_texts", fake_embed)
+    monkeypatch.setattr(chunking, "tokenizer", lambda: WordTokenizer())
+    monkeypatch.setattr(ExecutorConfig, "PARSE_WORKERS", 0)
+
+
+def write_pdf(path, body_words):
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "ABSTRACT", fontsize=14, fontname="hebo")
+    page.insert_textbox(pymupdf.Rect(72, 90, 540, 300), f"This thesis studies {body_words}. It reports results.",
+                        fontsize=11, fontname="helv")
+    page.insert_text((72, 330), "CHAPTER I", fontsize=14, fontname="hebo")
+    page.insert_text((72, 352), "INTRODUCTION", fontsize=14, fontname="hebo")
+    page.insert_textbox(pymupdf.Rect(72, 370, 540, 700), f"The introduction explains {body_words} in detail.",
+                        fontsize=11, fontname="helv")
+    doc.save(path)
+    doc.close()
+    return sha256_bytes(path.read_bytes())
+
+
+def test_abstract_edit_between_pdf_ingests_keeps_sections_apart(tmp_path):
+    db = SessionLocal()
+    try:
+        project = Project(sha256="pdf-abstract-test", filename="t.docx", title="Rice Monitor", abstract=None)
+        db.add(project)
+        db.commit()
+        pid = project.id
+
+        first = tmp_path / "first.pdf"
+        first_sha = write_pdf(first, "rice field sensors")
+        index_pdf(db, pid, str(first), first_sha)
+        pdf_abstract = db.query(Section).filter_by(project_id=pid, heading="ABSTRACT").one()
+        assert pdf_abstract.source_sha256 == first_sha
+
+        abstract = "An edited abstract about monitoring rice fields with low cost sensors."
+        _update_capstone(db, pid, "Rice Monitor", abstract, "Ana Reyes", "rice", 2024, None, encode_abstract(abstract))
+        db.expire_all()
+        own = db.query(Section).filter_by(project_id=pid, heading="ABSTRACT", source_sha256=None).one()
+        assert own.content == abstract
+        assert db.get(Section, pdf_abstract.id).source_sha256 == first_sha
+        assert "rice field sensors" in db.get(Section, pdf_abstract.id).content
+
+        second = tmp_path / "second.pdf"
+        second_sha = write_pdf(second, "irrigation schedules")
+        index_pdf(db, pid, str(second), second_sha)
+        db.expire_all()
+
+        sections = db.query(Section).filter_by(project_id=pid).all()
+        assert {s.source_sha256 for s in sections} == {None, second_sha}
+        own = db.query(Section).filter_by(project_id=pid, source_sha256=None).one()
+        assert own.content == abstract
+        assert [c.content for c in db.query(Chunk).filter_by(section_id=own.id)] == [abstract]
+        assert db.get(Project, pid).pdf_sha256 == second_sha
+    finally:
+        db.close()
+
+
+def line(text, size=11.0, bold=False, block_start=True, page=0):
+    return PdfLine(page, text, size, bold, block_start)
+
+
+@pytest.mark.parametrize("text, size, bold, block_start, expected", [
+    ("CHAPTER II", 11.0, False, False, True),
+    ("Review of Related Literature", 14.0, False, False, True),
+    ("STATEMENT OF THE PROBLEM", 11.0, False, True, True),
+    ("STATEMENT OF THE PROBLEM", 11.0, False, False, False),
+    ("1.2 Scope and Limitations", 11.0, True, False, True),
+    ("1.2 Scope and Limitations", 11.0, False, True, False),
+    ("Table 3 Respondents by age", 14.0, True, True, False),
+    ("THE SYSTEM WAS TESTED.", 11.0, True, True, False),
+    ("A sentence of body text that is set in the body font size", 11.0, False, True, False),
+])
+def test_is_heading(text, size, bold, block_start, expected):
+    assert is_heading(line(text, size, bold, block_start), 11.0, 1.15) is expected
+
+
+def test_iter_pdf_sections_groups_lines_under_headings():
+    lines = [
+        line("Front matter text.", page=0),
+        line("CHAPTER I", 14.0, True, page=1),
+        line("INTRODUCTION", 14.0, True, page=1),
+        line("1.1 Background", 11.0, True, page=1),
+        line("Farmers track rice fields by hand-", page=1),
+        line("written logs.", block_start=False, page=1),
+        line("A second paragraph.", page=2),
+        line("CHAPTER II", 14.0, True, page=3),
+        line("Related work.", page=3),
+    ]
+    assert list(iter_pdf_sections(lines)) == [
+        {"heading": None, "content": "Front matter text.", "page": 0},
+        {"heading": "CHAPTER I INTRODUCTION / 1.1 Background",
+         "content": "Farmers track rice fields by handwritten logs.\nA second paragraph.", "page": 1},
+        {"heading": "CHAPTER II", "content": "Related work.", "page": 3},
+    ]
+    # an oversized section is split, keeping its heading
+    parts = list(iter_pdf_sections([line("ABSTRACT", 14.0, True)] + [line("word " * 10)] * 6, max_chars=100))
+    assert [p["heading"] for p in parts] == ["ABSTRACT"] * 3
+
+
+def pdf_state(db, pid):
+    db.expire_all()
+    sections = db.query(Section).filter_by(project_id=pid).all()
+    chunk_ids = [c.id for c in db.query(Chunk).filter_by(project_id=pid)]
+    embedded = db.query(Embedding).filter(Embedding.chunk_id.in_(chunk_ids)).count()
+    return {s.source_sha256 for s in sections}, len(chunk_ids), embedded, db.get(Project, pid).pdf_sha256
+
+
+def test_replacing_a_pdf_keeps_the_old_one_until_the_new_one_is_complete(tmp_path, monkeypatch):
+    # one write transaction per section
+    monkeypatch.setattr(EmbeddingConfig, "INGEST_EMBED_BATCH", 1)
+    db = SessionLocal()
+    try:
+        project = Project(sha256="pdf-replace-test", filename="t.docx", title="Irrigation", abstract=None)
+        db.add(project)
+        db.commit()
+        pid = project.id
+        first, second = tmp_path / "first.pdf", tmp_path / "second.pdf"
+        first_sha = write_pdf(first, "soil moisture")
+        second_sha = write_pdf(second, "water pumps")
+        index_pdf(db, pid, str(first), first_sha)
+        before = pdf_state(db, pid)
+        assert before[0] == {first_sha} and before[1] == before[2] > 0
+
+        def fail_after_first_write(stats):
+            if stats["sections"] > 1:
+                raise RuntimeError("worker died")
+
+        with pytest.raises(RuntimeError):
+            index_pdf(db, pid, str(second), second_sha, on_progress=fail_after_first_write)
+        assert pdf_state(db, pid) == before
+
+        index_pdf(db, pid, str(second), second_sha)
+        sections, chunks, embedded, pdf_sha = pdf_state(db, pid)
+        assert sections == {second_sha} and pdf_sha == second_sha
+        assert chunks == embedded == before[1]
+    finally:
+        db.close()
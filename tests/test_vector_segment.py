@@ -0,0 +1,40 @@
+import numpy as np
+
+from config import EmbeddingConfig
+from db import SessionLocal
+from helpers.embeddings import pack_vector
+from models import Chunk, Embedding, Project
+from rag.vector_segment import SegmentStore
+from rag.vector_store import db_chunk_ids, sync_store
+
+
+def test_search_path_leaves_reconcile_to_the_maintenance_side(tmp_path):
+    db = SessionLocal()
+    try:
+        project = Project(sha256="segment-test", filename="t.docx", title="Segments")
+        db.add(project)
+        db.flush()
+        chunks = [Chunk(project_id=project.id, content=f"chunk {i}") for i in range(10)]
+        db.add_all(chunks)
+        db.flush()
+        vecs = np.random.default_rng(0).random((10, EmbeddingConfig.EMBEDDING_DIM), dtype=np.float32)
+        db.add_all([Embedding(chunk_id=c.id, vector=pack_vector(v)) for c, v in zip(chunks, vecs)])
+        db.commit()
+        ids = [c.id for c in chunks]
+        others = np.setdiff1d(db_chunk_ids(db), ids)
+
+        store = SegmentStore(tmp_path / "segment", compact_interval=0)
+        # two commits whose appends were lost, and a row deleted from the DB but not the segment
+        store.add(ids[:8], vecs[:8])
+        store.add([10**9], vecs[:1])
+        sync_store(store, db, 1)
+        sync_store(store, db, 2)
+        assert len(store) == 9
+
+        report = store.reconcile(db)
+        assert report == {"missing": 2 + len(others), "stale": 1, "duplicates": 0}
+        assert len(store) == 10 + len(others)
+        assert store.search(vecs[9], 1)[0][0] == ids[9]
+        assert not any(store.check(db).values())
+    finally:
+        db.close()